@@ -0,0 +1,234 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import struct
+import sys
+from datetime import date, datetime
+from typing import BinaryIO, Iterator, Optional
+
+from retention import ARCHIVE_DIR, list_partitions, partition_day_span
+
+# --- Constants ---
+EXPORT_CHUNK_ROWS = 5000            # Rows fetched from the cursor and written per chunk (one Parquet row group)
+EXPORT_FORMATS = ["csv", "jsonl", "parquet", "columnar"]
+CSV_HEADER = ["Timestamp", "Emp ID", "Status", "Response", "Remark"]
+COLUMNAR_MAGIC = b"WFMCOL1\n"
+NULL_LENGTH = 0xFFFFFFFF
+
+# Source table per database; responses.db has no emp_id column
+SOURCES = {
+    "activity": ("activity_log", "t.emp_id"),
+    "responses": ("responses", "NULL"),
+}
+
+
+# --- Reading ---
+def iter_chunks(db_file: str, source: str = "activity", since: Optional[date] = None, until: Optional[date] = None,
+                emp_ids: Optional[list[str]] = None, archive_dir: str = ARCHIVE_DIR,
+                chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[list[tuple]]:
+    """(epoch, emp_id, status, response, remark) rows in time order, across archive partitions and the live DB.
+
+    Files are read one at a time with fetchmany, so memory holds one chunk; partitions outside
+    [since, until) are skipped by name without being opened.
+    """
+    table, emp_column = SOURCES[source]
+    where, params = [], []
+    if since is not None:
+        where.append("t.timestamp >= ?")
+        params.append(int(datetime.combine(since, datetime.min.time()).timestamp()))
+    if until is not None:
+        where.append("t.timestamp < ?")
+        params.append(int(datetime.combine(until, datetime.min.time()).timestamp()))
+    if emp_ids:
+        if emp_column == "NULL":
+            raise ValueError(f"{source} rows have no emp_id to filter on")
+        where.append(f"t.emp_id IN ({', '.join('?' * len(emp_ids))})")
+        params += emp_ids
+    sql = f'''
+        SELECT t.timestamp, {emp_column}, s.name, t.response, t.remark
+        FROM {table} t LEFT JOIN status_dict s ON s.id = t.status_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY t.timestamp, t.id
+    '''
+
+    files = []
+    for path in list_partitions(db_file, archive_dir):
+        span = partition_day_span(path)
+        if span and ((since and span[1] <= since) or (until and span[0] >= until)):
+            continue
+        files.append(path)
+    files.append(db_file)
+
+    for path in files:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Warning: Skipping {path}: {e}")
+        finally:
+            conn.close()
+
+
+# --- Writers ---
+def _local_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def write_csv(chunks: Iterator[list[tuple]], out: BinaryIO) -> int:
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for rows in chunks:
+        writer.writerows((_local_time(ts), emp_id, status, response, remark)
+                         for ts, emp_id, status, response, remark in rows)
+        count += len(rows)
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_jsonl(chunks: Iterator[list[tuple]], out: BinaryIO) -> int:
+    count = 0
+    for rows in chunks:
+        out.write("".join(json.dumps({"ts": ts, "time": _local_time(ts), "emp_id": emp_id, "status": status,
+                                      "response": response, "remark": remark}, ensure_ascii=False) + "\n"
+                          for ts, emp_id, status, response, remark in rows).encode("utf-8"))
+        count += len(rows)
+    return count
+
+
+def write_parquet(chunks: Iterator[list[tuple]], path: str, compress: bool) -> int:
+    import pyarrow as pa  # Optional dependency; only needed for Parquet output
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("ts", pa.int64()), ("emp_id", pa.dictionary(pa.int32(), pa.string())),
+                        ("status", pa.dictionary(pa.int8(), pa.string())), ("response", pa.string()),
+                        ("remark", pa.string())])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd" if compress else "snappy") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(columns[0], pa.int64()),
+                 pa.array(columns[1], pa.string()).dictionary_encode().cast(schema.field("emp_id").type),
+                 pa.array(columns[2], pa.string()).dictionary_encode().cast(schema.field("status").type),
+                 pa.array(columns[3], pa.string()), pa.array(columns[4], pa.string())], schema=schema))
+            count += len(rows)
+    return count
+
+
+def _pack_texts(values) -> bytes:
+    encoded = [None if value is None else value.encode("utf-8") for value in values]
+    lengths = [NULL_LENGTH if value is None else len(value) for value in encoded]
+    return struct.pack(f"<{len(lengths)}I", *lengths) + b"".join(value for value in encoded if value)
+
+
+def write_columnar(chunks: Iterator[list[tuple]], out: BinaryIO) -> int:
+    """Compact column-per-chunk binary format for when pyarrow is not installed.
+
+    Layout (little-endian): magic, then per chunk b"C", row count (u32), timestamps (i64 each),
+    new emp_id and status dictionary entries (u32 count + texts), one u32 dictionary code per
+    row for each, then response and remark as texts. Texts are u32 lengths (NULL_LENGTH for
+    None) followed by the UTF-8 bytes. A final b"E" marks a complete file. See read_columnar.
+    """
+    out.write(COLUMNAR_MAGIC)
+    dictionaries: list[dict] = [{}, {}]
+    count = 0
+    for rows in chunks:
+        ts, emp_ids, statuses, responses, remarks = zip(*rows)
+        out.write(b"C" + struct.pack("<I", len(rows)) + struct.pack(f"<{len(rows)}q", *ts))
+        for dictionary, values in zip(dictionaries, (emp_ids, statuses)):
+            new = [value for value in dict.fromkeys(values) if value not in dictionary]
+            for value in new:
+                dictionary[value] = len(dictionary)
+            out.write(struct.pack("<I", len(new)) + _pack_texts(new))
+            out.write(struct.pack(f"<{len(values)}I", *(dictionary[value] for value in values)))
+        out.write(_pack_texts(responses) + _pack_texts(remarks))
+        count += len(rows)
+    out.write(b"E")
+    return count
+
+
+def _read_texts(data: BinaryIO, n: int) -> list[Optional[str]]:
+    lengths = struct.unpack(f"<{n}I", data.read(4 * n))
+    return [None if length == NULL_LENGTH else data.read(length).decode("utf-8") for length in lengths]
+
+
+def read_columnar(path: str) -> Iterator[tuple]:
+    """Rows back out of a write_columnar file (gzip-compressed or not)."""
+    with open(path, "rb") as raw:
+        compressed = raw.read(2) == b"\x1f\x8b"
+    with (gzip.open(path, "rb") if compressed else open(path, "rb")) as data:
+        if data.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar export")
+        dictionaries: list[list] = [[], []]
+        while (marker := data.read(1)) == b"C":
+            (n,) = struct.unpack("<I", data.read(4))
+            ts = struct.unpack(f"<{n}q", data.read(8 * n))
+            coded = []
+            for dictionary in dictionaries:
+                (new,) = struct.unpack("<I", data.read(4))
+                dictionary.extend(_read_texts(data, new))
+                coded.append([dictionary[code] for code in struct.unpack(f"<{n}I", data.read(4 * n))])
+            responses, remarks = _read_texts(data, n), _read_texts(data, n)
+            yield from zip(ts, coded[0], coded[1], responses, remarks)
+        if marker != b"E":
+            raise ValueError(f"{path} is truncated")
+
+
+def export(db_file: str, out_path: str, fmt: str = "csv", source: str = "activity", since: Optional[date] = None,
+           until: Optional[date] = None, emp_ids: Optional[list[str]] = None, compress: bool = False,
+           archive_dir: str = ARCHIVE_DIR) -> int:
+    """Streams matching rows into out_path and returns how many were written."""
+    chunks = iter_chunks(db_file, source, since, until, emp_ids, archive_dir)
+    if fmt == "parquet":
+        try:
+            return write_parquet(chunks, out_path, compress)
+        except ImportError:
+            print("⚠️ Warning: pyarrow is not installed; writing the compact columnar format instead.")
+            fmt = "columnar"
+
+    with (gzip.open(out_path, "wb", compresslevel=6) if compress else open(out_path, "wb")) as out:
+        if fmt == "csv":
+            return write_csv(chunks, out)
+        if fmt == "jsonl":
+            return write_jsonl(chunks, out)
+        return write_columnar(chunks, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream activity history to CSV, JSON lines or a columnar file.")
+    parser.add_argument("--db", default="prototype.db")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="activity")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--since", type=date.fromisoformat, help="First local day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="Day after the last one to include (YYYY-MM-DD)")
+    parser.add_argument("--emp-id", action="append", help="Only these employees (repeatable)")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output (zstd for Parquet)")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"⚠️ Warning: {args.db} not found.")
+        sys.exit(1)
+    if args.emp_id and args.source == "responses":
+        print("⚠️ Warning: responses.db rows have no emp_id; drop --emp-id.")
+        sys.exit(1)
+    count = export(args.db, args.out, args.format, args.source, args.since, args.until, args.emp_id, args.gzip,
+                   args.archive_dir)
+    print(f"✅ Exported {count} row(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
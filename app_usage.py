@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from db_writer import WRITER_BUSY_TIMEOUT_MS, configure_connection
+
+# --- Constants ---
+UNCATEGORIZED = "Other"   # Reported category of apps no rule matches
+UNKNOWN_APP = "(unknown)" # Reported name of windows whose process could not be resolved
+NO_RESPONSE = ""          # Bucket for foreground time before the employee's first logged response
+GROUPINGS = {
+    "app": "a.name",
+    "category": f"COALESCE(a.category, '{UNCATEGORIZED}')",
+}
+
+
+# --- Category Map ---
+def set_category_rules(conn: sqlite3.Connection, rules: list[tuple[str, str]]):
+    """Replaces the category rules ((GLOB on the lower-case process name, category), first match wins)
+    and re-categorizes every known app. Totals are stored per app, so nothing is re-aggregated.
+    """
+    with conn:
+        conn.execute("DELETE FROM app_category_rules")
+        conn.executemany("INSERT INTO app_category_rules (priority, pattern, category) VALUES (?, ?, ?)",
+                         [(i, pattern.lower(), category) for i, (pattern, category) in enumerate(rules)])
+        conn.execute('''
+            UPDATE app_dict SET category = (
+                SELECT r.category FROM app_category_rules r WHERE lower(app_dict.name) GLOB r.pattern
+                ORDER BY r.priority LIMIT 1)
+        ''')
+
+
+def load_category_rules(path: str) -> list[tuple[str, str]]:
+    """Reads rules from a JSON object {"pattern": "category", ...} (order is priority)."""
+    with open(path, encoding="utf-8") as file:
+        return list(json.load(file).items())
+
+
+# --- Queries ---
+def app_totals(conn: sqlite3.Connection, first_day: str, last_day: str, emp_ids: Optional[Iterable[str]] = None,
+               by: str = "app") -> dict[str, dict[str, dict[str, int]]]:
+    """{emp_id: {app or category: {status: seconds}}} for local days in [first_day, last_day].
+
+    Reads only the pre-aggregated daily_app_totals rows; `by` is "app" or "category".
+    """
+    label = GROUPINGS[by]
+    sql = f'''
+        SELECT d.emp_id, {label}, s.name, SUM(d.seconds)
+        FROM daily_app_totals d
+        JOIN app_dict a ON a.id = d.app_id
+        JOIN status_dict s ON s.id = d.status_id
+        WHERE d.day BETWEEN ? AND ?
+    '''
+    params: list = [first_day, last_day]
+    if emp_ids is not None:
+        emp_ids = list(emp_ids)
+        sql += f" AND d.emp_id IN ({', '.join('?' * len(emp_ids))})"
+        params += emp_ids
+    sql += " GROUP BY 1, 2, 3"
+
+    totals: dict[str, dict[str, dict[str, int]]] = defaultdict(lambda: defaultdict(dict))
+    for emp_id, name, status, seconds in conn.execute(sql, params):
+        totals[emp_id][name or UNKNOWN_APP][status] = seconds
+    return {emp_id: dict(apps) for emp_id, apps in totals.items()}
+
+
+def app_time_by_response(conn: sqlite3.Connection, emp_id: str, day: str, by: str = "app") -> dict[str, dict[str, int]]:
+    """{response text: {app or category: seconds}} for one employee and local day.
+
+    Each logged response is taken to describe the work until the next one. Computed from
+    that day's window runs and activity rows (a few hundred of each), using the
+    (emp_id, timestamp) and (emp_id, start_ts) indexes.
+    """
+    first = date.fromisoformat(day)
+    start_ts = int(datetime.combine(first, datetime.min.time()).timestamp())
+    end_ts = int(datetime.combine(first + timedelta(days=1), datetime.min.time()).timestamp())
+    responses = conn.execute('''
+        SELECT timestamp, response FROM activity_log
+        WHERE emp_id = ? AND timestamp >= ? AND timestamp < ? AND response != ''
+        ORDER BY timestamp, id
+    ''', (emp_id, start_ts, end_ts)).fetchall()
+    carried = conn.execute('''
+        SELECT response FROM activity_log WHERE emp_id = ? AND timestamp < ? AND response != ''
+        ORDER BY timestamp DESC, id DESC LIMIT 1
+    ''', (emp_id, start_ts)).fetchone()
+    runs = conn.execute(f'''
+        SELECT w.start_ts, w.end_ts, {GROUPINGS[by]}
+        FROM window_intervals w JOIN app_dict a ON a.id = w.app_id
+        WHERE w.emp_id = ? AND w.start_ts >= ? AND w.start_ts < ?
+        ORDER BY w.start_ts
+    ''', (emp_id, start_ts, end_ts)).fetchall()
+
+    # Response segments [ts, next ts); the day opens with the last response before it, if any
+    bounds = [start_ts] + [ts for ts, _ in responses] + [end_ts]
+    labels = [carried[0] if carried else NO_RESPONSE] + [response for _, response in responses]
+    result: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    segment = 0
+    for run_start, run_end, name in runs:
+        while segment + 1 < len(bounds) - 1 and bounds[segment + 1] <= run_start:
+            segment += 1
+        index = segment
+        while index < len(labels) and bounds[index] < run_end:
+            seconds = min(run_end, bounds[index + 1]) - max(run_start, bounds[index])
+            if seconds > 0:
+                result[labels[index]][name or UNKNOWN_APP] += seconds
+            index += 1
+    return {response: dict(apps) for response, apps in result.items()}
+
+
+if __name__ == "__main__":
+    # Usage: python app_usage.py prototype.db [categories.json]
+    db = sys.argv[1] if len(sys.argv) > 1 else "prototype.db"
+    if not os.path.exists(db):
+        print(f"⚠️ Warning: {db} not found.")
+        sys.exit(1)
+    connection = sqlite3.connect(db, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+    configure_connection(connection)
+    if len(sys.argv) > 2:
+        set_category_rules(connection, load_category_rules(sys.argv[2]))
+        print(f"✅ Category rules loaded from {sys.argv[2]}.")
+    today = date.today().isoformat()
+    for emp, categories in sorted(app_totals(connection, today, today, by="category").items()):
+        print(f"{emp}: " + ", ".join(f"{name} {sum(statuses.values()) // 60}m" for name, statuses in sorted(categories.items())))
+    connection.close()
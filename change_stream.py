@@ -0,0 +1,152 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from rollups import STARTED_PREFIX
+from status_intervals import current_statuses
+
+# --- Constants ---
+FRAME_INTERVAL_SECONDS = 1.0   # At most one frame per subscriber per second; bursts are merged
+KEEPALIVE_SECONDS = 15.0       # SSE comment sent on a quiet stream so proxies keep it open
+MAX_SUBSCRIBERS = 200
+
+
+class Subscription:
+    """One subscriber's pending changes, coalesced by emp_id (only the newest state is kept)."""
+
+    def __init__(self, board: "StatusBoard"):
+        self.board = board
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._last_frame = 0.0
+
+    def offer(self, emp_id: str, state: dict):
+        with self._lock:
+            self._pending[emp_id] = state
+        self._ready.set()
+
+    def next_frame(self, timeout: float = KEEPALIVE_SECONDS) -> Optional[dict[str, dict]]:
+        """Blocks until changes are pending and a frame interval has passed; None on timeout."""
+        if not self._ready.wait(timeout):
+            return None
+        wait = self._last_frame + FRAME_INTERVAL_SECONDS - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)  # Everything published meanwhile lands in the same frame
+        with self._lock:
+            changes, self._pending = self._pending, {}
+            self._ready.clear()
+        self._last_frame = time.monotonic()
+        return changes
+
+    def close(self):
+        self.board.unsubscribe(self)
+
+
+class StatusBoard:
+    """Latest status per emp_id plus a publish/subscribe stream of transitions.
+
+    Publishers call apply() for every stored event; only real transitions (a new status, not a
+    resend or an older event) update the index and are pushed to subscribers. A timed status's
+    "Started for N minutes." row comes after the row that switched to it, so a same-status row
+    that sets the expected length is pushed too.
+    """
+
+    def __init__(self):
+        self.states: dict[str, dict] = {}
+        self.transitions = 0
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def load(self, conn: sqlite3.Connection):
+        """Seeds the index from the store's open intervals (one indexed query)."""
+        with self._lock:
+            for emp_id, status, since, expected in current_statuses(conn):
+                if emp_id is not None:
+                    self.states[emp_id] = {"status": status, "since": since, "ts": since, "expected_seconds": expected}
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return dict(self.states)
+
+    def apply(self, emp_id: Optional[str], status: str, timestamp: int, remark: Optional[str] = None) -> bool:
+        if not emp_id:
+            return False
+        expected = _expected_seconds(remark)
+        with self._lock:
+            current = self.states.get(emp_id)
+            if current is not None and timestamp < current["ts"]:
+                return False  # Late resend of an older event
+            if current is not None and current["status"] == status:
+                current["ts"] = timestamp
+                if expected is None or expected == current["expected_seconds"]:
+                    return False
+                state = dict(current, expected_seconds=expected)
+            else:
+                state = {"status": status, "since": timestamp, "ts": timestamp, "expected_seconds": expected}
+                self.transitions += 1
+            self.states[emp_id] = state
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(emp_id, state)
+        return True
+
+    def subscribe(self) -> Optional[Subscription]:
+        with self._lock:
+            if len(self._subscribers) >= MAX_SUBSCRIBERS:
+                return None
+            subscription = Subscription(self)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+def _expected_seconds(remark: Optional[str]) -> Optional[int]:
+    """Expected length from a "Started for N minutes." remark; None for any other remark."""
+    if remark and remark.startswith(STARTED_PREFIX) and remark.endswith(" minutes."):
+        try:
+            return int(remark[len(STARTED_PREFIX):-len(" minutes.")]) * 60
+        except ValueError:
+            pass
+    return None
+
+
+def serve_sse(handler, board: StatusBoard, stopping: threading.Event):
+    """Streams the board to one HTTP client as server-sent events: a snapshot, then coalesced changes."""
+    subscription = board.subscribe()
+    if subscription is None:
+        body = b'{"error": "too many subscribers"}'
+        handler.send_response(503)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        return
+    handler.close_connection = True
+    try:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.wfile.write(b"event: snapshot\ndata: " + json.dumps(board.snapshot()).encode() + b"\n\n")
+        handler.wfile.flush()
+        while not stopping.is_set():
+            changes = subscription.next_frame()
+            if changes is None:
+                handler.wfile.write(b": keepalive\n\n")
+            else:
+                handler.wfile.write(b"event: changes\ndata: " + json.dumps(changes).encode() + b"\n\n")
+            handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # Supervisor closed the board
+    finally:
+        subscription.close()
@@ -0,0 +1,452 @@
+import argparse
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from app_usage import GROUPINGS, app_time_by_response, app_totals
+from retention import ARCHIVE_DIR, HISTORY_MAX_PARTITIONS, open_history, partition_day_span, partitions_between
+from rollups import team_totals
+from status_intervals import current_statuses, status_durations, timeline
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+DASHBOARD_DB_FILE = "central.db"  # Any activity_log store works (central.db or a tracker's prototype.db)
+DASHBOARD_HOST = "127.0.0.1"
+DASHBOARD_PORT = 8766
+DASHBOARD_LOG_FILE = "dashboard_api.jsonl"  # Structured log (JSON lines, rotated daily or at 5 MB, old files gzipped)
+
+# --- Constants ---
+PAGE_DEFAULT_ROWS = 200
+PAGE_MAX_ROWS = 1000
+STREAM_FETCH_ROWS = 500        # Rows pulled from the cursor per chunk when streaming
+READER_CONNECTIONS = 8         # Read-only connections; also caps concurrent queries
+CACHE_ENTRIES = 256            # Cached JSON responses (LRU)
+CACHE_MAX_BODY_BYTES = 1 << 20 # Larger responses are not cached
+TIMELINE_MAX_DAYS = 31
+EVENT_COLUMNS = "id, timestamp, emp_id, status_id, response, remark"  # Present in partitions of every schema version
+
+
+# --- Queries (read-only, keyset paginated) ---
+def encode_cursor(timestamp: int, row_id: int) -> str:
+    return f"{timestamp}.{row_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    timestamp, row_id = cursor.split(".")
+    return int(timestamp), int(row_id)
+
+
+def _event_query(emp_id: Optional[str], status: Optional[str], since: Optional[int], until: Optional[int],
+                 after: Optional[str], descending: bool, table: str = "activity_log") -> tuple[str, list]:
+    """SELECT over `table` ordered by (timestamp, id); `after` is the last key of the previous page."""
+    where, params = [], []
+    if emp_id is not None:
+        where.append("a.emp_id = ?")
+        params.append(emp_id)
+    if status is not None:
+        where.append("a.status_id = (SELECT id FROM status_dict WHERE name = ?)")
+        params.append(status)
+    if since is not None:
+        where.append("a.timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("a.timestamp < ?")
+        params.append(until)
+    if after:
+        where.append(f"(a.timestamp, a.id) {'<' if descending else '>'} (?, ?)")
+        params += decode_cursor(after)
+    order = "DESC" if descending else "ASC"
+    sql = f'''
+        SELECT a.id, a.timestamp, a.emp_id, s.name, a.response, a.remark
+        FROM {table} a LEFT JOIN status_dict s ON s.id = a.status_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY a.timestamp {order}, a.id {order}
+    '''
+    return sql, params
+
+
+def _event_dict(row: tuple) -> dict:
+    row_id, timestamp, emp_id, status, response, remark = row
+    return {"id": row_id, "ts": timestamp, "emp_id": emp_id, "status": status, "response": response, "remark": remark}
+
+
+def list_events(conn: sqlite3.Connection, emp_id: Optional[str] = None, status: Optional[str] = None,
+                since: Optional[int] = None, until: Optional[int] = None, after: Optional[str] = None,
+                limit: int = PAGE_DEFAULT_ROWS, descending: bool = False,
+                table: str = "activity_log") -> tuple[list[dict], Optional[str]]:
+    """One page of events and the cursor for the next page (None on the last page)."""
+    sql, params = _event_query(emp_id, status, since, until, after, descending, table)
+    rows = conn.execute(sql + " LIMIT ?", params + [limit + 1]).fetchall()
+    next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+    return [_event_dict(row) for row in rows[:limit]], next_cursor
+
+
+def iter_events(conn: sqlite3.Connection, emp_id: Optional[str] = None, status: Optional[str] = None,
+                since: Optional[int] = None, until: Optional[int] = None,
+                descending: bool = False, table: str = "activity_log") -> Iterator[list[dict]]:
+    """Every matching event in chunks of STREAM_FETCH_ROWS, straight off the cursor."""
+    cursor = conn.execute(*_event_query(emp_id, status, since, until, None, descending, table))
+    while True:
+        rows = cursor.fetchmany(STREAM_FETCH_ROWS)
+        if not rows:
+            return
+        yield [_event_dict(row) for row in rows]
+
+
+# --- Plumbing ---
+class ReaderPool:
+    """Fixed set of read-only connections shared by request threads."""
+
+    def __init__(self, db_file: str, size: int = READER_CONNECTIONS):
+        self._pool: queue.Queue = queue.Queue()
+        for _ in range(size):
+            self._pool.put(sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False))
+        # PRAGMA data_version changes whenever another connection commits, so it keys the cache
+        self._version_conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False)
+        self._version_lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, timeout: float = 30.0):
+        conn = self._pool.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def data_version(self) -> int:
+        with self._version_lock:
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._version_conn.close()
+
+
+class ResponseCache:
+    """LRU of encoded responses keyed on (data version, request); new commits make old keys unreachable."""
+
+    def __init__(self, entries: int = CACHE_ENTRIES):
+        self.entries = entries
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > CACHE_MAX_BODY_BYTES:
+            return
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.entries:
+                self._items.popitem(last=False)
+
+
+def _day_bounds(first_day: str, last_day: str) -> tuple[int, int]:
+    first = date.fromisoformat(first_day)
+    last = date.fromisoformat(last_day)
+    if last < first or (last - first).days >= TIMELINE_MAX_DAYS:
+        raise ValueError(f"day range must be 1..{TIMELINE_MAX_DAYS} days")
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    return int(start.timestamp()), int(end.timestamp())
+
+
+class DashboardAPI:
+    """Read-only HTTP API for the admin dashboard.
+
+    GET /v1/agents/current                        current status of every employee
+    GET /v1/events?emp_id&status&since&until&after&limit&order   one page of events
+    GET /v1/events/stream?emp_id&status&since&until&order        all matches as JSON lines
+    GET /v1/employees/<emp_id>/timeline?first_day&last_day       intervals and totals
+    GET /v1/team/summary?first_day&last_day&emp_id=...           per-employee status totals
+    GET /v1/team/apps?first_day&last_day&by=app|category&emp_id=...  per-employee app time by status
+    GET /v1/employees/<emp_id>/apps?day&by=app|category           app time per logged response
+
+    Event queries reaching archived days also read the overlapping partitions in archive_dir,
+    attaching them a window at a time (see event_windows), so any range can be paged or streamed.
+    """
+
+    def __init__(self, db_file: str = DASHBOARD_DB_FILE, host: str = DASHBOARD_HOST, port: int = DASHBOARD_PORT,
+                 archive_dir: str = ARCHIVE_DIR):
+        self.db_file = db_file
+        self.archive_dir = archive_dir
+        self.readers = ReaderPool(db_file)
+        self.cache = ResponseCache()
+        self.server = ThreadingHTTPServer((host, port), _DashboardHandler)
+        self.server.daemon_threads = True
+        self.server.api = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="dashboard-http", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        print(f"✅ Dashboard API on http://{host}:{port}/v1/ (read-only: {self.db_file})")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.readers.close()
+
+    def event_windows(self, since: Optional[int], until: Optional[int],
+                      descending: bool) -> list[tuple[list[str], Optional[int], Optional[int]]]:
+        """[(partitions, since, until)] covering [since, until) in read order, each attachable at once.
+
+        Every window reads the live DB plus at most HISTORY_MAX_PARTITIONS partitions; while more
+        partitions follow, the window's range is clipped at its last partition's edge, so rows from
+        a partition that is not attached yet cannot be skipped by the keyset order.
+        """
+        partitions = partitions_between(self.db_file, since, until, self.archive_dir)
+        if descending:
+            partitions.reverse()
+        windows = []
+        while True:
+            window, partitions = partitions[:HISTORY_MAX_PARTITIONS], partitions[HISTORY_MAX_PARTITIONS:]
+            window_since, window_until = since, until
+            edge = _partition_bounds(window[-1]) if partitions else None
+            if edge and descending:
+                window_since = edge[0] if since is None else max(since, edge[0])
+            elif edge:
+                window_until = edge[1] if until is None else min(until, edge[1])
+            windows.append((sorted(window), window_since, window_until))
+            if not partitions:
+                return windows
+            if descending:
+                until = window_since
+            else:
+                since = window_until
+
+    @contextmanager
+    def event_source(self, conn: sqlite3.Connection, partitions: list[str]) -> Iterator[tuple[sqlite3.Connection, str]]:
+        """(connection, table): the pooled connection when no partition is needed, else one with them attached."""
+        if not partitions:
+            yield conn, "activity_log"
+            return
+        history = open_history(self.db_file, "activity_log", self.archive_dir, partitions=partitions, columns=EVENT_COLUMNS)
+        try:
+            yield history, "activity_log_history"
+        finally:
+            history.close()
+
+    # --- Endpoints (return JSON-serialisable results) ---
+    def current(self, conn: sqlite3.Connection, args: dict) -> dict:
+        now = int(time.time())
+        agents = [{"emp_id": emp_id, "status": status, "since": since, "seconds": now - since,
+                   "exceeded": expected is not None and now - since > expected}
+                  for emp_id, status, since, expected in current_statuses(conn)]
+        return {"as_of": now, "agents": agents}
+
+    def events(self, conn: sqlite3.Connection, args: dict) -> dict:
+        limit = min(int(args.get("limit", PAGE_DEFAULT_ROWS)), PAGE_MAX_ROWS)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        since, until = _int(args, "since"), _int(args, "until")
+        after, descending = args.get("after"), args.get("order") == "desc"
+        # Only partitions at or beyond the cursor can hold the rest of the listing
+        low, high = since, until
+        if after:
+            after_ts = decode_cursor(after)[0]
+            if descending:
+                high = after_ts + 1 if high is None else min(high, after_ts + 1)
+            else:
+                low = after_ts if low is None else max(low, after_ts)
+
+        events: list[dict] = []
+        next_cursor = None
+        windows = self.event_windows(low, high, descending)
+        for i, (partitions, window_since, window_until) in enumerate(windows):
+            with self.event_source(conn, partitions) as (source, table):
+                page, next_cursor = list_events(source, args.get("emp_id"), args.get("status"), window_since,
+                                                window_until, after, limit - len(events), descending, table)
+            events += page
+            if events:
+                after = encode_cursor(events[-1]["ts"], events[-1]["id"])
+            if len(events) == limit:
+                if next_cursor is None and i < len(windows) - 1:
+                    next_cursor = after  # Older/newer partitions may still hold rows
+                break
+        return {"events": events, "next": next_cursor}
+
+    def employee_timeline(self, conn: sqlite3.Connection, emp_id: str, args: dict) -> dict:
+        today = date.today().isoformat()
+        start_ts, end_ts = _day_bounds(args.get("first_day", today), args.get("last_day", today))
+        intervals = [{"status": status, "start": start, "end": end, "expected_seconds": expected}
+                     for status, start, end, expected in timeline(conn, emp_id, start_ts, end_ts)]
+        return {"emp_id": emp_id, "intervals": intervals,
+                "totals": status_durations(conn, emp_id, start_ts, end_ts)}
+
+    def team_summary(self, conn: sqlite3.Connection, args: dict, emp_ids: Optional[list[str]]) -> dict:
+        today = date.today().isoformat()
+        first_day, last_day = args.get("first_day", today), args.get("last_day", today)
+        _day_bounds(first_day, last_day)
+        return {"first_day": first_day, "last_day": last_day,
+                "employees": team_totals(conn, first_day, last_day, emp_ids)}
+
+    def team_apps(self, conn: sqlite3.Connection, args: dict, emp_ids: Optional[list[str]]) -> dict:
+        today = date.today().isoformat()
+        first_day, last_day = args.get("first_day", today), args.get("last_day", today)
+        _day_bounds(first_day, last_day)
+        by = _grouping(args)
+        return {"first_day": first_day, "last_day": last_day, "by": by,
+                "employees": app_totals(conn, first_day, last_day, emp_ids, by)}
+
+    def employee_apps(self, conn: sqlite3.Connection, emp_id: str, args: dict) -> dict:
+        day = args.get("day", date.today().isoformat())
+        _day_bounds(day, day)
+        by = _grouping(args)
+        return {"emp_id": emp_id, "day": day, "by": by, "responses": app_time_by_response(conn, emp_id, day, by)}
+
+
+def _int(args: dict, name: str) -> Optional[int]:
+    return int(args[name]) if name in args else None
+
+
+def _partition_bounds(path: str) -> Optional[tuple[int, int]]:
+    """[start, end) epoch seconds of a partition file, from its name."""
+    span = partition_day_span(path)
+    if span is None:
+        return None
+    first, last = (int(datetime.combine(day, datetime.min.time()).timestamp()) for day in span)
+    return first, last
+
+
+def _grouping(args: dict) -> str:
+    by = args.get("by", "app")
+    if by not in GROUPINGS:
+        raise ValueError(f"by must be one of {', '.join(GROUPINGS)}")
+    return by
+
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, cache: str = "HIT"):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Cache", cache)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        api: DashboardAPI = self.server.api  # type: ignore[attr-defined]
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        args = {name: values[-1] for name, values in query.items()}
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        try:
+            if parts == ["v1", "events", "stream"]:
+                self._stream(api, args)
+                return
+
+            key = (api.readers.data_version(), self.path)
+            body = api.cache.get(key)
+            if body is not None:
+                self._send(200, body)
+                return
+            with api.readers.connection() as conn:
+                if parts == ["v1", "agents", "current"]:
+                    result = api.current(conn, args)
+                elif parts == ["v1", "events"]:
+                    result = api.events(conn, args)
+                elif len(parts) == 4 and parts[:2] == ["v1", "employees"] and parts[3] == "timeline":
+                    result = api.employee_timeline(conn, parts[2], args)
+                elif len(parts) == 4 and parts[:2] == ["v1", "employees"] and parts[3] == "apps":
+                    result = api.employee_apps(conn, parts[2], args)
+                elif parts == ["v1", "team", "summary"]:
+                    result = api.team_summary(conn, args, query.get("emp_id"))
+                elif parts == ["v1", "team", "apps"]:
+                    result = api.team_apps(conn, args, query.get("emp_id"))
+                else:
+                    self._send(404, b'{"error": "not found"}', "MISS")
+                    return
+            body = json.dumps(result, separators=(",", ":")).encode()
+            if parts != ["v1", "agents", "current"]:  # "seconds in status" moves with the clock
+                api.cache.put(key, body)
+            self._send(200, body, "MISS")
+        except (ValueError, KeyError) as e:
+            self._send(400, json.dumps({"error": str(e)}).encode(), "MISS")
+        except queue.Empty:
+            self._send(503, b'{"error": "busy"}', "MISS")
+        except Exception as e:
+            logger.warning("Dashboard query failed: %s", e)
+            self._send(500, b'{"error": "internal error"}', "MISS")
+
+    def _stream(self, api: "DashboardAPI", args: dict):
+        """Chunked JSON lines; memory stays at one chunk regardless of the result size."""
+        since, until = _int(args, "since"), _int(args, "until")
+        descending = args.get("order") == "desc"
+        windows = api.event_windows(since, until, descending)
+        with api.readers.connection() as conn:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for partitions, window_since, window_until in windows:
+                    with api.event_source(conn, partitions) as (source, table):
+                        for events in iter_events(source, args.get("emp_id"), args.get("status"), window_since,
+                                                  window_until, descending, table):
+                            data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events).encode()
+                            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # Client went away mid-stream
+            except sqlite3.Error as e:
+                logger.warning("Event stream aborted: %s", e)
+                self.close_connection = True  # Headers are out; dropping the connection signals the error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only dashboard API over a tracker activity store.")
+    parser.add_argument("--db", default=DASHBOARD_DB_FILE)
+    parser.add_argument("--host", default=DASHBOARD_HOST)
+    parser.add_argument("--port", type=int, default=DASHBOARD_PORT)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--log-file", default=DASHBOARD_LOG_FILE, help="Structured JSON-lines log")
+    args = parser.parse_args()
+
+    from structured_log import setup_logging  # Only the CLI sets up the log pipeline; code embedding the class keeps its own
+    setup_logging(args.log_file)
+
+    api = DashboardAPI(args.db, args.host, args.port, args.archive_dir)
+    api.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n🛑 Dashboard API stopped by user.")
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
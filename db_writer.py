@@ -0,0 +1,279 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+WRITER_FLUSH_INTERVAL_MS = 250   # Commit pending rows at least every 250 ms
+WRITER_BATCH_ROWS = 100          # ...or as soon as 100 rows are waiting
+WRITER_QUEUE_SIZE = 5000         # Bounded in-memory queue; when full, UI events are dropped with a warning and background producers wait
+WRITER_BUSY_TIMEOUT_MS = 5000    # How long SQLite waits on a lock held by another process
+WRITER_SYNCHRONOUS = "NORMAL"    # With WAL this only fsyncs at checkpoints, not on every commit
+WRITER_RETRY_SECONDS = 300       # Keep retrying a batch on a locked DB this long before giving up on it
+WRITER_RETRY_MAX_DELAY = 5.0     # Backoff cap between retries of a locked batch
+
+
+def configure_connection(conn: sqlite3.Connection, synchronous: str = WRITER_SYNCHRONOUS):
+    """Applies the WAL journal and sync settings used by every tracker connection."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA busy_timeout={WRITER_BUSY_TIMEOUT_MS}")
+
+
+class BatchedWriter:
+    """Owns a single SQLite connection and commits queued statements in batches on a background thread."""
+
+    def __init__(self, db_file: str,
+                 flush_interval_ms: int = WRITER_FLUSH_INTERVAL_MS,
+                 batch_rows: int = WRITER_BATCH_ROWS,
+                 queue_size: int = WRITER_QUEUE_SIZE):
+        self.db_file = db_file
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_rows = batch_rows
+        self.dropped = 0
+        self.failed = 0      # Rows given up on: rejected by SQLite, or locked out for WRITER_RETRY_SECONDS
+        self.stalled = False # True while a batch is waiting on a locked database
+        self.dead = False    # True once the writer thread has crashed; submit() then refuses new rows
+        self._inflight = 0   # Rows taken off the queue but not yet committed
+        self.on_commit: Optional[Callable[[list[float]], None]] = None  # Gets enqueue-to-commit seconds per committed row
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        db = os.path.basename(db_file)
+        self._commit_seconds = REGISTRY.histogram("wfm_db_commit_seconds", "Duration of one batch transaction", db=db)
+        self._write_latency = REGISTRY.histogram("wfm_db_write_latency_seconds", "Enqueue-to-commit time per row", db=db)
+        self._committed_rows = REGISTRY.counter("wfm_db_rows_committed_total", "Rows committed", db=db)
+        self._failed_rows = REGISTRY.counter("wfm_db_rows_failed_total", "Rows given up on after errors or lock timeouts", db=db)
+        self._dropped_rows = REGISTRY.counter("wfm_db_rows_dropped_total", "Rows dropped on a full write queue", db=db)
+
+    def start(self):
+        """Starts the writer thread (idempotent) and registers the flush-on-exit hook."""
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+        db = os.path.basename(self.db_file)
+        REGISTRY.gauge("wfm_db_queue_depth", "Rows queued or being written", fn=self.pending, db=db)
+        REGISTRY.gauge("wfm_db_stalled", "1 while a batch waits on a locked database", fn=lambda: int(self.stalled), db=db)
+
+    def submit(self, sql: str, params: tuple = (), timeout: Optional[float] = None) -> bool:
+        """Queues one statement without touching the disk. Returns False if it had to be dropped.
+
+        UI callers leave `timeout` unset and never wait. Background producers (importers,
+        benchmarks) pass a timeout to block while the queue is full instead of dropping.
+        """
+        if self._closed:
+            return False
+        if self.dead:
+            self.dropped += 1
+            self._dropped_rows.inc()
+            logger.warning("DB writer for %s has stopped; event not saved.", self.db_file)
+            return False
+        if self._thread is None:
+            self.start()
+        item = (sql, params, None, time.monotonic())
+        try:
+            if timeout is None:
+                self._queue.put_nowait(item)
+            else:
+                self._queue.put(item, timeout=timeout)
+        except queue.Full:
+            self.dropped += 1
+            self._dropped_rows.inc()
+            logger.warning("DB write queue full (%d); dropped event #%d.", self._queue.maxsize, self.dropped)
+            return False
+        return True
+
+    def pending(self) -> int:
+        """Approximate number of statements not yet committed (queued plus the batch being written)."""
+        return self._queue.qsize() + self._inflight
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Blocks until everything queued before this call is committed (or the timeout expires)."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put((None, None, done, 0.0), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flushes the queue, commits and closes the connection. Safe to call more than once."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put((None, None, None, 0.0), timeout=timeout)  # Stop sentinel
+        except queue.Full:
+            logger.warning("DB write queue full at shutdown; some events may be lost.")
+        thread.join(timeout)
+
+    # --- Writer Thread ---
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            self.dead = True
+            self._inflight = 0
+            logger.exception("DB writer for %s stopped: %s. %d queued event(s) will not be saved.",
+                             self.db_file, e, self._queue.qsize())
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            configure_connection(conn)
+        except sqlite3.Error as e:
+            logger.warning("Could not enable WAL on %s: %s", self.db_file, e)
+
+        stopping = False
+        while not stopping:
+            batch: list[tuple[str, tuple, float]] = []
+            markers: list[threading.Event] = []
+
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                sql, params, marker, enqueued_at = item
+                if sql is not None:
+                    batch.append((sql, params, enqueued_at))
+                elif marker is not None:
+                    markers.append(marker)
+                    break  # Somebody is waiting on a flush; commit what we have now
+                else:
+                    stopping = True
+                    break
+
+                if len(batch) >= self.batch_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if stopping:
+                # Drain whatever was queued before the sentinel raced in
+                while True:
+                    try:
+                        sql, params, marker, enqueued_at = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if sql is not None:
+                        batch.append((sql, params, enqueued_at))
+                    elif marker is not None:
+                        markers.append(marker)
+
+            self._inflight = len(batch)
+            self._write_batch(conn, batch, give_up_after=0 if stopping else WRITER_RETRY_SECONDS)
+            self._inflight = 0
+            for marker in markers:
+                marker.set()
+
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list[tuple[str, tuple, float]], give_up_after: float = 0):
+        """Writes the batch in one transaction, grouping consecutive identical statements into executemany.
+
+        A locked database is retried with backoff for up to `give_up_after` seconds; meanwhile new
+        events keep queueing (the pending count grows) and callers are never blocked. Any other
+        error rolls the batch back and writes it row by row, so only the failing rows are lost.
+        """
+        if not batch:
+            return
+        first_attempt = time.monotonic()
+        delay = 0.1
+        while True:
+            attempt = time.monotonic()
+            try:
+                with conn:
+                    run_sql = batch[0][0]
+                    run_params: list[Any] = []
+                    for sql, params, _ in batch:
+                        if sql != run_sql:
+                            conn.executemany(run_sql, run_params)
+                            run_sql, run_params = sql, []
+                        run_params.append(params)
+                    conn.executemany(run_sql, run_params)
+                break
+            except sqlite3.OperationalError as e:
+                if not _is_locked(e):
+                    batch = self._write_rows(conn, batch)
+                    break
+                if time.monotonic() - first_attempt >= give_up_after:
+                    self._give_up(batch, e)
+                    return
+                if not self.stalled:
+                    logger.info("⏳ %s is locked; holding %d event(s) and retrying.", self.db_file, len(batch))
+                self.stalled = True
+                time.sleep(delay)
+                delay = min(delay * 2, WRITER_RETRY_MAX_DELAY)
+            except sqlite3.Error:
+                batch = self._write_rows(conn, batch)
+                break
+        self.stalled = False
+        if not batch:
+            return
+        committed_at = time.monotonic()
+        self._commit_seconds.observe(committed_at - attempt)
+        self._committed_rows.inc(len(batch))
+        latencies = [committed_at - enqueued_at for _, _, enqueued_at in batch]
+        for latency in latencies:
+            self._write_latency.observe(latency)
+        if self.on_commit is not None:
+            self.on_commit(latencies)
+
+    def _write_rows(self, conn: sqlite3.Connection,
+                    batch: list[tuple[str, tuple, float]]) -> list[tuple[str, tuple, float]]:
+        """One transaction, one statement at a time; drops the rows that fail and returns the rest."""
+        written, rejected = [], []
+        try:
+            with conn:
+                for row in batch:
+                    try:
+                        conn.execute(row[0], row[1])
+                    except sqlite3.Error as e:
+                        if _is_locked(e):
+                            raise
+                        self._give_up([row], e)
+                        rejected.append(row)
+                    else:
+                        written.append(row)
+        except sqlite3.Error as e:
+            # Still locked, or the commit failed: nothing was kept, so the rows not yet given up go too
+            self._give_up([row for row in batch if not any(row is bad for bad in rejected)], e)
+            return []
+        return written
+
+    def _give_up(self, batch: list[tuple[str, tuple, float]], error: Exception):
+        self.stalled = False
+        self.failed += len(batch)
+        self._failed_rows.inc(len(batch))
+        logger.error("Failed to write %d queued event(s) to %s: %s", len(batch), self.db_file, error)
+
+
+def _is_locked(error: sqlite3.Error) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
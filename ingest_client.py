@@ -0,0 +1,156 @@
+import gzip
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Optional
+
+from db_writer import WRITER_BUSY_TIMEOUT_MS, configure_connection
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+INGEST_UPLOAD_INTERVAL = 5.0      # Seconds between uploads while events are waiting
+INGEST_BATCH_EVENTS = 1000        # Events per upload; a reconnect drains the backlog in batches of this size
+INGEST_REQUEST_TIMEOUT = 15.0
+INGEST_RETRY_MAX_DELAY = 300.0    # Backoff cap while the service is down
+INGEST_COMPRESS_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+
+
+class IngestUnavailable(Exception):
+    """Upload not accepted; `retry_after` is the server's hint in seconds, if it sent one."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def post_batch(url: str, client_id: str, events: list[dict], timeout: float = INGEST_REQUEST_TIMEOUT) -> int:
+    """POSTs one batch and returns the highest sequence number the service acknowledged."""
+    import urllib.error  # urllib.request pulls in http.client, email and ssl; load them on the first upload
+    import urllib.request
+    body = json.dumps({"client_id": client_id, "events": events}, separators=(",", ":")).encode()
+    headers = {"Content-Type": "application/json"}
+    if len(body) >= INGEST_COMPRESS_MIN_BYTES:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return int(json.loads(response.read())["acked"])
+    except urllib.error.HTTPError as e:
+        retry_after = e.headers.get("Retry-After")
+        raise IngestUnavailable(f"HTTP {e.code}", float(retry_after) if retry_after else None)
+    except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+        raise IngestUnavailable(str(e))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full jitter: anywhere up to the exponential cap for this attempt, but not sooner than the server asked."""
+    cap = min(INGEST_RETRY_MAX_DELAY, INGEST_UPLOAD_INTERVAL * 2 ** attempt)
+    return max(random.uniform(0, cap), retry_after or 0)
+
+
+class IngestClient:
+    """Uploads the local outbox (see schema v7) to the central ingest service from a background thread.
+
+    Events reach the outbox in the same transaction that logs them, so nothing is lost to a
+    crash or an outage; the UI never waits on the network. Uploads go oldest first in batches
+    and only acknowledged rows are removed, so an interrupted sync resumes where it stopped.
+    Retries use jittered exponential backoff so a floor coming back online doesn't reconnect at once.
+    """
+
+    def __init__(self, url: str, db_file: str, batch_events: int = INGEST_BATCH_EVENTS):
+        self.url = url
+        self.db_file = db_file
+        self.batch_events = batch_events
+        self.client_id: Optional[str] = None
+        self.acked = 0
+        self.online = True
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Arms the outbox (first run only) and starts uploading. The schema must already be migrated."""
+        if self._thread is not None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO outbox_state (id, client_id) VALUES (1, ?)",
+                         (f"{platform.node()}-{os.urandom(4).hex()}",))
+            self.client_id, self.acked = conn.execute("SELECT client_id, acked_seq FROM outbox_state").fetchone()
+        self._thread = threading.Thread(target=self._run, name="ingest-client", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Makes one last upload attempt and stops the thread; anything left waits in the outbox."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Uploads now instead of at the next interval."""
+        self._wake.set()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+        configure_connection(conn)
+        return conn
+
+    def pending(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def upload_pending(self) -> int:
+        """Uploads the outbox oldest first until it is empty; returns how many events were acknowledged."""
+        sent = 0
+        with closing(self._connect()) as conn:
+            while True:
+                rows = conn.execute('''
+                    SELECT o.seq, o.timestamp, o.emp_id, s.name, o.response, o.remark, o.event_id
+                    FROM outbox o JOIN status_dict s ON s.id = o.status_id
+                    ORDER BY o.seq LIMIT ?
+                ''', (self.batch_events,)).fetchall()
+                if not rows:
+                    return sent
+                batch = [{"seq": seq, "ts": ts, "emp_id": emp_id, "status": status, "response": response,
+                          "remark": remark, "event_id": event_id}
+                         for seq, ts, emp_id, status, response, remark, event_id in rows]
+                acked = post_batch(self.url, self.client_id, batch)
+                if acked < rows[0][0]:
+                    raise IngestUnavailable(f"upload not acknowledged (acked {acked})")
+                with conn:
+                    removed = conn.execute("DELETE FROM outbox WHERE seq <= ?", (acked,)).rowcount
+                    conn.execute("UPDATE outbox_state SET acked_seq = MAX(acked_seq, ?)", (acked,))
+                sent += removed
+                self.acked = max(self.acked, acked)
+                if self._stopping:
+                    return sent  # One batch at shutdown; the rest goes out on the next start
+
+    def _run(self):
+        attempt = 0
+        delay = random.uniform(0, INGEST_UPLOAD_INTERVAL)  # Spread the first upload after a mass restart
+        while True:
+            self._wake.wait(delay)
+            self._wake.clear()
+            stopping = self._stopping
+            try:
+                sent = self.upload_pending()
+                if not self.online:
+                    logger.info("✅ Ingest service reachable again; uploaded %d queued event(s).", sent)
+                self.online = True
+                attempt = 0
+                delay = INGEST_UPLOAD_INTERVAL
+            except (IngestUnavailable, sqlite3.Error) as e:
+                if self.online:
+                    logger.warning("Ingest upload failed (%s); events stay in the outbox and will be retried.", e)
+                self.online = False
+                attempt += 1
+                delay = backoff_delay(attempt, getattr(e, "retry_after", None))
+            if stopping:
+                return
@@ -0,0 +1,229 @@
+import argparse
+import gzip
+import io
+import json
+import logging
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from change_stream import StatusBoard, serve_sse
+from db_writer import BatchedWriter
+from retention import ARCHIVE_DIR, RETENTION_KEEP_PARTITIONS, RETENTION_PARTITION, start_maintenance
+from schema import ACTIVITY_LOG_MIGRATIONS, INGEST_EVENT_INSERT_SQL, migrate_file
+from timer_scheduler import TimerScheduler
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+CENTRAL_DB_FILE = "central.db"      # Hot store for every agent; older days roll into ARCHIVE_DIR partitions
+INGEST_HOST = "127.0.0.1"
+INGEST_PORT = 8765
+INGEST_PATH = "/v1/events"
+INGEST_LOG_FILE = "ingest_service.jsonl"  # Structured log (JSON lines, rotated daily or at 5 MB, old files gzipped)
+
+# --- Constants ---
+INGEST_MAX_BODY_BYTES = 4 * 1024 * 1024  # Per request, after decompression
+INGEST_MAX_EVENTS = 5000                 # Per request; clients split larger backlogs
+INGEST_MAX_CONCURRENT = 64               # Uploads processed at once; the rest get 503 + Retry-After
+INGEST_COMMIT_TIMEOUT = 10.0             # Seconds an upload waits for its rows to be committed before acking
+INGEST_RETRY_AFTER_SECONDS = 5
+MAINTENANCE_INTERVAL_SECONDS = 6 * 3600  # How often the central store is rotated into partitions
+
+
+class IngestError(Exception):
+    """Rejected upload; carries the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class IngestService:
+    """Accepts batched event uploads from trackers and stores them once per (client_id, seq).
+
+    Dedupe is each client's high-water mark in the store's client_cursor table (a seq at or below
+    it is dropped), so a resend is still recognised after its rows rotated into a partition, and
+    the service keeps no per-client state in memory.
+    Memory is bounded by the request size limit, the concurrency limit and the writer's queue;
+    when any of them is exhausted the client is told to retry later instead of being buffered.
+    """
+
+    def __init__(self, db_file: str = CENTRAL_DB_FILE, host: str = INGEST_HOST, port: int = INGEST_PORT,
+                 archive_dir: str = ARCHIVE_DIR):
+        self.db_file = db_file
+        self.archive_dir = archive_dir
+        self.writer = BatchedWriter(db_file)
+        self.timers = TimerScheduler(name="ingest-maintenance")
+        self.slots = threading.BoundedSemaphore(INGEST_MAX_CONCURRENT)
+        self.received = 0
+        self.board = StatusBoard()  # Latest status per emp_id, pushed to /v1/live subscribers
+        self.stopping = threading.Event()
+        self.server = ThreadingHTTPServer((host, port), _IngestHandler)
+        self.server.daemon_threads = True
+        self.server.service = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+    # --- Lifecycle ---
+    def start(self):
+        version = migrate_file(self.db_file, ACTIVITY_LOG_MIGRATIONS)
+        conn = sqlite3.connect(self.db_file)
+        try:
+            self.board.load(conn)
+        finally:
+            conn.close()
+        self.writer.start()
+        self.timers.call_later(0, self._maintain)
+        self.timers.start()
+        self._thread = threading.Thread(target=self.server.serve_forever, name="ingest-http", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        print(f"✅ Ingest service listening on http://{host}:{port}{INGEST_PATH} (store {self.db_file}, schema v{version})")
+
+    def stop(self):
+        self.stopping.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.timers.stop()
+        self.writer.close()
+
+    def _maintain(self):
+        # Rolls closed days into ARCHIVE_DIR partitions on its own thread, off the scheduler
+        start_maintenance(self.db_file, ACTIVITY_LOG_MIGRATIONS, {"activity_log": "timestamp"},
+                          RETENTION_PARTITION, RETENTION_KEEP_PARTITIONS, self.archive_dir)
+        self.timers.call_later(MAINTENANCE_INTERVAL_SECONDS, self._maintain)
+
+    # --- Ingestion ---
+    def ingest(self, client_id: str, events: list[dict]) -> int:
+        """Stores a batch and returns the highest sequence number now durable for this client."""
+        if not client_id or not isinstance(events, list):
+            raise IngestError(400, "client_id and events are required")
+        if len(events) > INGEST_MAX_EVENTS:
+            raise IngestError(413, f"at most {INGEST_MAX_EVENTS} events per upload")
+        if not events:
+            return 0
+
+        acked = 0
+        failed_before = self.writer.failed
+        rows = []
+        for event in events:
+            try:
+                seq, ts = int(event["seq"]), int(event["ts"])
+                event_id = event.get("event_id")
+                row = (ts, event.get("emp_id"), str(event["status"]), event.get("response"), event.get("remark"),
+                       client_id, seq, int(event_id) if event_id is not None else None)
+            except (KeyError, TypeError, ValueError):
+                raise IngestError(400, f"malformed event: {event!r:.200}")
+            rows.append(row)
+        rows.sort(key=lambda row: row[6])  # In seq order, or the mark would skip a lower seq sent later in the batch
+        for row in rows:
+            if not self.writer.submit(INGEST_EVENT_INSERT_SQL, row, timeout=INGEST_COMMIT_TIMEOUT):
+                raise IngestError(503, "store is busy")
+            acked = max(acked, row[6])
+
+        # Ack only what is committed (at-least-once); concurrent uploads share the same commit.
+        # A failed batch anywhere since we started may have held our rows, so make the client resend.
+        if not self.writer.flush(INGEST_COMMIT_TIMEOUT) or self.writer.failed != failed_before:
+            raise IngestError(503, "store is busy")
+        self.received += len(events)
+        for ts, emp_id, status, _, remark, _, _, _ in rows:
+            self.board.apply(emp_id, status, ts, remark)
+        return acked
+
+
+class _IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # One line per upload would drown the console at floor scale
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 503:
+            self.send_header("Retry-After", str(INGEST_RETRY_AFTER_SECONDS))
+        if status >= 400:
+            # The request body may be unread; don't let it be parsed as the next request
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        service: IngestService = self.server.service  # type: ignore[attr-defined]
+        if self.path == "/v1/live":
+            serve_sse(self, service.board, service.stopping)
+        elif self.path == "/v1/live/snapshot":
+            self._reply(200, service.board.snapshot())
+        elif self.path == "/v1/health":
+            self._reply(200, {"ok": True, "pending_writes": service.writer.pending(), "received": service.received,
+                              "failed_writes": service.writer.failed, "agents": len(service.board.states),
+                              "live_subscribers": service.board.subscriber_count()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        service: IngestService = self.server.service  # type: ignore[attr-defined]
+        if self.path != INGEST_PATH:
+            self._reply(404, {"error": "not found"})
+            return
+        if not service.slots.acquire(blocking=False):
+            self._reply(503, {"error": "too many concurrent uploads"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0 or length > INGEST_MAX_BODY_BYTES:
+                raise IngestError(413, f"body must be 1..{INGEST_MAX_BODY_BYTES} bytes")
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.GzipFile(fileobj=io.BytesIO(body)).read(INGEST_MAX_BODY_BYTES + 1)
+                if len(body) > INGEST_MAX_BODY_BYTES:
+                    raise IngestError(413, "decompressed body too large")
+            try:
+                batch = json.loads(body)
+            except ValueError:
+                raise IngestError(400, "body is not JSON")
+            if not isinstance(batch, dict):
+                raise IngestError(400, "body must be a JSON object")
+            acked = service.ingest(str(batch.get("client_id") or ""), batch.get("events"))
+            self._reply(200, {"acked": acked, "accepted": len(batch["events"])})
+        except IngestError as e:
+            self._reply(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.warning("Upload failed: %s", e)
+            self._reply(500, {"error": "internal error"})
+        finally:
+            service.slots.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Central ingestion service for tracker events.")
+    parser.add_argument("--db", default=CENTRAL_DB_FILE)
+    parser.add_argument("--host", default=INGEST_HOST)
+    parser.add_argument("--port", type=int, default=INGEST_PORT)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--log-file", default=INGEST_LOG_FILE, help="Structured JSON-lines log")
+    args = parser.parse_args()
+
+    from structured_log import setup_logging  # Only the CLI sets up the log pipeline; code embedding the class keeps its own
+    setup_logging(args.log_file)
+
+    service = IngestService(args.db, args.host, args.port, args.archive_dir)
+    service.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n🛑 Ingest service stopped by user.")
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+INPUT_DEBOUNCE_SECONDS = 1.0  # Mouse moves arrive at ~100 Hz; one timestamp write per second is plenty
+
+
+class InputActivityMonitor:
+    """Tracks the time of the last mouse/keyboard input using pynput listeners.
+
+    The listener callbacks only store a float in `self._last_input` (a single attribute
+    assignment, atomic under the GIL), so readers never take a lock and an idle check is
+    an O(1) read instead of sleeping between two cursor samples.
+    """
+
+    def __init__(self, debounce_seconds: float = INPUT_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self.available = False
+        self._last_input = time.monotonic()
+        self._listeners: list = []
+
+    def start(self) -> bool:
+        """Starts the mouse and keyboard listeners. Returns False if pynput cannot hook input here."""
+        if self.available:
+            return True
+        try:
+            from pynput import keyboard, mouse
+            self._listeners = [
+                mouse.Listener(on_move=self._touch, on_click=self._touch, on_scroll=self._touch),
+                keyboard.Listener(on_press=self._touch),
+            ]
+            for listener in self._listeners:
+                listener.daemon = True
+                listener.start()
+            self.available = True
+        except Exception as e:
+            logger.warning("Input listeners unavailable (%s). Falling back to cursor sampling for idle checks.", e)
+            self._listeners = []
+            self.available = False
+        return self.available
+
+    def stop(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+        self.available = False
+
+    def _touch(self, *_args):
+        """Listener callback for every input kind; debounced so bursts cost one write."""
+        now = time.monotonic()
+        if now - self._last_input >= self.debounce_seconds:
+            self._last_input = now
+
+    def last_input(self) -> float:
+        """time.monotonic() of the last recorded input."""
+        return self._last_input
+
+    def idle_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds since the last input, or None when listeners are not running."""
+        if not self.available:
+            return None
+        return max(0.0, (now if now is not None else time.monotonic()) - self._last_input)
@@ -0,0 +1,198 @@
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, Optional
+
+from db_writer import WRITER_BUSY_TIMEOUT_MS, configure_connection
+from schema import ACTIVITY_LOG_MIGRATIONS, LEGACY_TS_TO_EPOCH, migrate, rebuild_activity_history
+
+# --- Constants ---
+IMPORT_BATCH_ROWS = 10000          # Rows per executemany call; the whole run is one transaction
+TEXT_LOG_LINE = re.compile(
+    r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \| ID: (.*?) \| Status: (.*?) \| Response: (.*?) \| Remark: (.*)$")
+JSON_LOG_NAME = re.compile(r"\.jsonl(\.\d+)?(\.gz)?$", re.IGNORECASE)  # wfm_tracker.jsonl and its rotated wfm_tracker.jsonl.3.gz
+
+# Event shape produced by every reader: (epoch, emp_id, status, response, remark, source_seq, event_id)
+ImportRow = tuple[int, Optional[str], str, Optional[str], Optional[str], int, Optional[int]]
+
+
+# --- Readers (streams; nothing is loaded whole) ---
+def read_text_log(path: str) -> Iterator[ImportRow]:
+    """Parses wfm_activity_log.txt lines; lines that don't start a record continue the previous remark."""
+    current: Optional[list] = None
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.rstrip("\r\n")
+            match = TEXT_LOG_LINE.match(line)
+            if match:
+                if current is not None:
+                    yield tuple(current)  # type: ignore[misc]
+                timestamp, emp_id, status, response, remark = match.groups()
+                epoch = int(datetime.fromisoformat(timestamp).timestamp())
+                current = [epoch, emp_id or None, status, response, remark, line_number, None]
+            elif current is not None:
+                current[4] += "\n" + line
+            elif line.strip():
+                print(f"⚠️ Warning: {path}:{line_number} is not a log record; skipped.")
+    if current is not None:
+        yield tuple(current)  # type: ignore[misc]
+
+
+def read_json_log(path: str, emp_id: Optional[str] = None) -> Iterator[ImportRow]:
+    """Parses a structured tracker log (.jsonl, or a rotated .jsonl.gz); only "activity" records are events.
+
+    Records carry the event_id stored with the event's row, so events already in the target (or
+    imported before from a differently named rotation) are skipped.
+    """
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as file:
+        for line_number, line in enumerate(file, start=1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Warning: {path}:{line_number} is not a JSON record; skipped.")
+                continue
+            if record.get("event") == "activity" and "epoch" in record:
+                yield (int(record["epoch"]), record.get("emp_id") or emp_id, record.get("status"), record.get("response"),
+                       record.get("remark"), line_number, record.get("event_id"))
+
+
+def read_sqlite(path: str, emp_id: Optional[str] = None) -> Iterator[ImportRow]:
+    """Streams activity_log or responses rows, in either the legacy TEXT layout or the current typed one."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        table = "activity_log" if "activity_log" in tables else "responses" if "responses" in tables else None
+        if table is None:
+            print(f"⚠️ Warning: {path} has no activity_log or responses table; skipped.")
+            return
+        columns = {row[1]: (row[2] or "").upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+        epoch = "t.timestamp" if columns.get("timestamp") == "INTEGER" else LEGACY_TS_TO_EPOCH.format(col="t.timestamp")
+        emp = "t.emp_id" if "emp_id" in columns else "?"
+        event_id = "t.event_id" if "event_id" in columns else "NULL"
+        if "status_id" in columns:
+            status, join = "s.name", "LEFT JOIN status_dict s ON s.id = t.status_id"
+        else:
+            status, join = "t.status", ""
+        cursor = conn.execute(f'''
+            SELECT {epoch}, {emp}, {status}, t.response, t.remark, t.id, {event_id} FROM {table} t {join}
+            WHERE t.timestamp IS NOT NULL
+        ''', (emp_id,) if emp == "?" else ())
+        while True:
+            rows = cursor.fetchmany(IMPORT_BATCH_ROWS)
+            if not rows:
+                break
+            if emp != "?" and emp_id is not None:
+                rows = [(ts, row_emp or emp_id, *rest) for ts, row_emp, *rest in rows]
+            yield from rows
+    finally:
+        conn.close()
+
+
+def read_source(path: str, emp_id: Optional[str] = None) -> Iterator[ImportRow]:
+    if JSON_LOG_NAME.search(path):
+        return read_json_log(path, emp_id)
+    return read_text_log(path) if path.lower().endswith((".txt", ".log")) else read_sqlite(path, emp_id)
+
+
+# --- Loader ---
+def _suspend_derived(conn: sqlite3.Connection) -> tuple[list[str], list[str]]:
+    """Drops triggers and secondary indexes that would otherwise run per row; returns their CREATE statements."""
+    objects = conn.execute('''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND (
+            (type = 'trigger' AND tbl_name IN ('activity_log', 'status_intervals'))
+            OR (type = 'index' AND tbl_name = 'activity_log'
+                AND name NOT IN ('idx_activity_client_seq', 'idx_activity_event_id')))
+    ''').fetchall()
+    for kind, name, _ in objects:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    return [sql for kind, _, sql in objects if kind == "index"], [sql for kind, _, sql in objects if kind == "trigger"]
+
+
+def import_files(db_file: str, paths: list[str], emp_id: Optional[str] = None) -> int:
+    """Loads every source into db_file's activity_log in one pass and returns the number of new rows.
+
+    Rows are keyed by (client_id "import:<absolute path>", source row id or line number), and
+    by their event_id where the source has one (structured logs, current tracker databases), so
+    importing the same file twice adds nothing and logged events already stored are skipped. Per-row triggers and secondary indexes are
+    dropped for the load; indexes are rebuilt once and intervals/rollups are re-derived afterwards
+    over just the time span each employee's rows cover. Everything runs in one transaction, so a failed or killed
+    import leaves the store exactly as it was.
+    """
+    conn = sqlite3.connect(db_file, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+    configure_connection(conn)
+    migrate(conn, ACTIVITY_LOG_MIGRATIONS)
+
+    status_ids = dict(conn.execute("SELECT name, id FROM status_dict"))
+    ranges: dict[Optional[str], tuple[int, int]] = {}  # emp_id -> (min_ts, max_ts) of the rows read
+    inserted = 0
+    conn.isolation_level = None  # Explicit transaction: schema changes, load and rebuild commit together
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        indexes, triggers = _suspend_derived(conn)
+        for path in paths:
+            client_id = "import:" + os.path.abspath(path)
+            source = read_source(path, emp_id)
+            while True:
+                rows = list(islice(source, IMPORT_BATCH_ROWS))
+                if not rows:
+                    break
+                for status in {row[2] for row in rows if row[2]} - status_ids.keys():
+                    conn.execute("INSERT OR IGNORE INTO status_dict (name) VALUES (?)", (status,))
+                    status_ids[status] = conn.execute("SELECT id FROM status_dict WHERE name = ?", (status,)).fetchone()[0]
+                before = conn.total_changes
+                conn.executemany('''
+                    INSERT OR IGNORE INTO activity_log (timestamp, emp_id, status_id, response, remark, client_id, client_seq,
+                                                        event_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(ts, emp, status_ids.get(status), response, remark, client_id, seq, event_id)
+                      for ts, emp, status, response, remark, seq, event_id in rows])
+                inserted += conn.total_changes - before
+                for ts, emp, *_ in rows:
+                    low, high = ranges.get(emp, (ts, ts))
+                    ranges[emp] = (min(low, ts), max(high, ts))
+            print(f"📥 Loaded {path}")
+
+        # Indexes before the rebuild so its queries can use them; triggers after so they don't fire on it
+        for sql in indexes:
+            conn.execute(sql)
+        if inserted:
+            rebuild_activity_history(conn, ranges)
+        for sql in triggers:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk-import legacy responses.db / prototype.db / wfm_activity_log.txt / wfm_tracker.jsonl files into an activity store.")
+    parser.add_argument("sources", nargs="+", help="Legacy .db files, .txt logs and .jsonl(.gz) structured logs")
+    parser.add_argument("--db", default="central.db", help="Target store (created/migrated if needed)")
+    parser.add_argument("--emp-id", help="Employee for rows that carry none (responses.db)")
+    args = parser.parse_args()
+
+    missing = [path for path in args.sources if not os.path.exists(path)]
+    if missing:
+        print(f"⚠️ Warning: not found: {', '.join(missing)}")
+        sys.exit(1)
+    started = time.perf_counter()
+    inserted = import_files(args.db, args.sources, args.emp_id)
+    print(f"✅ Imported {inserted} new row(s) into {args.db} in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
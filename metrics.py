@@ -0,0 +1,242 @@
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+from schema import METRICS_SNAPSHOT_INSERT_SQL
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Seconds
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0)  # Seconds past a deadline
+METRICS_SNAPSHOT_SECONDS = 300  # One metrics_snapshots row every 5 minutes
+
+Labels = tuple[tuple[str, str], ...]
+
+
+# --- Metric Types ---
+class Counter:
+    """Monotonic total (events, rows, failures). Rates come from differences between reads."""
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def sample(self) -> float:
+        return self.value
+
+
+class Gauge:
+    """Current level. Either set by the owner or read from `fn` at collection time (queue depth, threads)."""
+    kind = "gauge"
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float):
+        self.value = value
+
+    def sample(self) -> float:
+        if self.fn is None:
+            return self.value
+        try:
+            return float(self.fn())
+        except Exception:
+            return float("nan")  # A broken callback must not take the whole scrape down
+
+
+class Histogram:
+    """Fixed-bucket distribution: O(log buckets) per observation, constant memory."""
+    kind = "histogram"
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty; the top bound when above it)."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return None
+        rank, seen = q * count, 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def sample(self) -> dict:
+        return {"count": self.count, "sum": round(self.sum, 6), "p50": self.quantile(0.5), "p99": self.quantile(0.99)}
+
+
+# --- Registry ---
+class MetricsRegistry:
+    """Process-wide metrics by (name, labels). Getters create on first use and return the same object after.
+
+    Hot paths fetch their metric once (e.g. in __init__) and then only call inc/set/observe.
+    """
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, str]] = {}  # name -> (kind, help)
+        self._metrics: dict[tuple[str, Labels], object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, help_text: str, labels: dict, factory: Callable[[], object]):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text))
+            if family[0] != kind:
+                raise ValueError(f"metric {name} is already registered as a {family[0]}")
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = factory()
+            return metric
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", fn: Optional[Callable[[], float]] = None, **labels) -> Gauge:
+        """A callback gauge re-registered under the same labels (e.g. a restarted writer) reads the new callback."""
+        gauge = self._get("gauge", name, help_text, labels, Gauge)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name: str, help_text: str = "", buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                  **labels) -> Histogram:
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def collect(self) -> list[tuple[str, str, str, list[tuple[Labels, object]]]]:
+        """[(name, kind, help, [(labels, metric), ...])] sorted by name."""
+        with self._lock:
+            families = dict(self._families)
+            metrics = list(self._metrics.items())
+        grouped: dict[str, list[tuple[Labels, object]]] = {}
+        for (name, labels), metric in metrics:
+            grouped.setdefault(name, []).append((labels, metric))
+        return [(name, *families[name], sorted(grouped[name], key=lambda item: item[0])) for name in sorted(grouped)]
+
+    def render_text(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, kind, help_text, series in self.collect():
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series:
+                if isinstance(metric, Histogram):
+                    with metric._lock:
+                        counts, count, total = list(metric.counts), metric.count, metric.sum
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric.buckets + (float("inf"),), counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_label_text(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {total!r}")
+                    lines.append(f"{name}_count{_label_text(labels)} {count}")
+                else:
+                    value = metric.sample()
+                    lines.append(f"{name}{_label_text(labels)} {'NaN' if math.isnan(value) else _number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """{"counters": {series: value}, "gauges": {...}, "histograms": {series: {count, sum, p50, p99}}}."""
+        result: dict[str, dict] = {"counters": {}, "gauges": {}, "histograms": {}}
+        for name, kind, _, series in self.collect():
+            for labels, metric in series:
+                value = metric.sample()
+                if kind != "histogram":
+                    value = _number(value) if math.isfinite(value) else None  # JSON has no NaN
+                result[kind + "s"][name + _label_text(labels)] = value
+        return result
+
+
+def _label_text(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float):
+    """Whole numbers print without a trailing .0."""
+    return int(value) if math.isfinite(value) and value == int(value) else value
+
+
+REGISTRY = MetricsRegistry()  # Every tracker component records here; exported by metrics_server.py and SnapshotRecorder
+REGISTRY.gauge("wfm_threads", "Live Python threads in the tracker process", fn=threading.active_count)
+
+
+# --- Snapshots ---
+class SnapshotRecorder:
+    """Stores the registry as one metrics_snapshots row every `interval` seconds via the batched writer.
+
+    Each row also carries per-second counter rates over the last interval, so a floor-wide
+    query can spot a slow share or a silent tracker without scraping every machine.
+    """
+
+    def __init__(self, writer, timers, emp_id: Callable[[], Optional[str]], registry: MetricsRegistry = REGISTRY,
+                 interval: float = METRICS_SNAPSHOT_SECONDS):
+        self.writer = writer
+        self.timers = timers
+        self.emp_id = emp_id
+        self.registry = registry
+        self.interval = interval
+        self._previous: Optional[tuple[float, dict]] = None
+        self._timer = None
+
+    def start(self):
+        if self._timer is None:
+            self._previous = (time.monotonic(), self.registry.snapshot()["counters"])
+            self._timer = self.timers.call_later(self.interval, self._tick)
+
+    def stop(self):
+        """Cancels the timer and records a final row. Call before the writer is closed."""
+        if self._timer is not None:
+            self.timers.cancel(self._timer)
+            self._timer = None
+            self.record()
+
+    def record(self) -> bool:
+        now = time.monotonic()
+        data = self.registry.snapshot()
+        if self._previous is not None:
+            then, counters = self._previous
+            elapsed = now - then
+            if elapsed > 0:
+                data["rates"] = {series: round((value - counters.get(series, 0)) / elapsed, 4)
+                                 for series, value in data["counters"].items() if value is not None}
+        self._previous = (now, data["counters"])
+        return self.writer.submit(METRICS_SNAPSHOT_INSERT_SQL,
+                                  (int(time.time()), self.emp_id(), json.dumps(data, separators=(",", ":"))))
+
+    def _tick(self):
+        try:
+            self.record()
+        except Exception as e:
+            logger.warning("Metrics snapshot failed: %s", e)
+        self._timer = self.timers.call_later(self.interval, self._tick)
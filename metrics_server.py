@@ -0,0 +1,70 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+METRICS_HOST = "127.0.0.1"  # Local only: a collector on the machine (or an admin's curl) scrapes it
+METRICS_PORT = 8767
+
+
+class MetricsServer:
+    """Local text endpoint for the tracker's metrics registry.
+
+    GET /metrics        Prometheus text format
+    GET /metrics.json   the same values as one JSON object (histograms as count/sum/p50/p99)
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.registry = registry  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        logger.info("✅ Metrics on http://%s:%d/metrics", host, port)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        registry: MetricsRegistry = self.server.registry  # type: ignore[attr-defined]
+        path = self.path.split("?", 1)[0]
+        try:
+            if path == "/metrics":
+                self._send(200, registry.render_text().encode(), "text/plain; version=0.0.4; charset=utf-8")
+            elif path == "/metrics.json":
+                self._send(200, json.dumps(registry.snapshot(), separators=(",", ":")).encode(), "application/json")
+            else:
+                self._send(404, b"not found\n", "text/plain")
+        except Exception as e:
+            logger.exception("Metrics scrape failed: %s", e)
+            self._send(500, b"internal error\n", "text/plain")
@@ -0,0 +1,196 @@
+import glob
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from db_writer import WRITER_BUSY_TIMEOUT_MS
+from schema import Migration, migrate_file
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+ARCHIVE_DIR = "archive"            # Partition files live next to the app in this folder
+RETENTION_PARTITION = "day"        # "day" or "week": how much history goes into one partition file
+RETENTION_KEEP_PARTITIONS = 90     # Older partition files are deleted
+HISTORY_MAX_PARTITIONS = 9         # SQLite allows 10 attached databases by default (main + 9)
+DICTIONARY_TABLES = ["status_dict", "app_dict", "title_dict"]  # Copied along so partition rows resolve their ids
+
+
+# --- Partition Naming ---
+def partition_start(moment: datetime, period: str = RETENTION_PARTITION) -> datetime:
+    """Local-time start of the day/ISO week containing the given moment."""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def next_partition_start(start: datetime, period: str = RETENTION_PARTITION) -> datetime:
+    return start + timedelta(days=7 if period == "week" else 1)
+
+
+def partition_key(start: datetime, period: str = RETENTION_PARTITION) -> str:
+    """'2025-11-15' for daily partitions, '2025-W46' for weekly ones (sorts chronologically)."""
+    return start.strftime("%G-W%V") if period == "week" else start.strftime("%Y-%m-%d")
+
+
+def partition_path(db_file: str, key: str, archive_dir: str = ARCHIVE_DIR) -> str:
+    stem = os.path.splitext(os.path.basename(db_file))[0]
+    return os.path.join(archive_dir, f"{stem}_{key}.db")
+
+
+def list_partitions(db_file: str, archive_dir: str = ARCHIVE_DIR) -> list[str]:
+    """All partition files for a live DB, oldest first."""
+    return sorted(glob.glob(partition_path(db_file, "*", archive_dir)))
+
+
+def partition_day_span(path: str) -> Optional[tuple[date, date]]:
+    """[first, last) local days covered by a partition file, from its name (see partition_key)."""
+    key = os.path.splitext(os.path.basename(path))[0].rsplit("_", 1)[-1]
+    try:
+        if "-W" in key:
+            first = datetime.strptime(key + "-1", "%G-W%V-%u").date()
+            return first, first + timedelta(days=7)
+        first = date.fromisoformat(key)
+        return first, first + timedelta(days=1)
+    except ValueError:
+        return None
+
+
+def partitions_between(db_file: str, since: Optional[int] = None, until: Optional[int] = None,
+                       archive_dir: str = ARCHIVE_DIR) -> list[str]:
+    """Partition files that may hold rows in [since, until) (epoch seconds; None is open-ended), oldest first."""
+    first_day = date.fromtimestamp(since) if since is not None else None
+    last_day = date.fromtimestamp(until - 1) if until is not None else None
+    paths = []
+    for path in list_partitions(db_file, archive_dir):
+        span = partition_day_span(path)
+        if span and ((first_day and span[1] <= first_day) or (last_day and span[0] > last_day)):
+            continue
+        paths.append(path)
+    return paths
+
+
+# --- Rotation ---
+def rotate(db_file: str, migrations: list[Migration], tables: dict[str, str],
+           period: str = RETENTION_PARTITION, archive_dir: str = ARCHIVE_DIR,
+           now: Optional[datetime] = None) -> list[str]:
+    """Moves rows older than the current partition out of the live DB into per-period archive files.
+
+    `tables` maps each table to its epoch-seconds time column. Rows are copied with INSERT OR IGNORE
+    before being deleted, so a rotation interrupted by a crash is simply repeated on the next start.
+    Returns the partition files that were written.
+    """
+    cutoff = int(partition_start(now or datetime.now(), period).timestamp())
+    os.makedirs(archive_dir, exist_ok=True)
+    written: list[str] = []
+
+    conn = sqlite3.connect(db_file, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+    conn.isolation_level = None
+    try:
+        present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        dictionaries = [name for name in DICTIONARY_TABLES if name in present]
+        for table, ts_col in tables.items():
+            while True:
+                oldest = conn.execute(f"SELECT MIN({ts_col}) FROM {table} WHERE {ts_col} < ?", (cutoff,)).fetchone()[0]
+                if oldest is None:
+                    break
+                start = partition_start(datetime.fromtimestamp(oldest), period)
+                end = next_partition_start(start, period)
+                lo, hi = int(start.timestamp()), min(int(end.timestamp()), cutoff)
+
+                path = partition_path(db_file, partition_key(start, period), archive_dir)
+                migrate_file(path, migrations)
+                conn.execute("ATTACH DATABASE ? AS part", (path,))
+                try:
+                    # Partitions are plain copies: derived-data triggers (e.g. status intervals) must not fire there
+                    for (trigger,) in conn.execute("SELECT name FROM part.sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)).fetchall():
+                        conn.execute(f"DROP TRIGGER part.{trigger}")
+                    conn.execute("BEGIN IMMEDIATE")
+                    for dictionary in dictionaries:
+                        conn.execute(f"INSERT OR IGNORE INTO part.{dictionary} SELECT * FROM main.{dictionary}")
+                    conn.execute(f"INSERT OR IGNORE INTO part.{table} SELECT * FROM main.{table} WHERE {ts_col} >= ? AND {ts_col} < ?", (lo, hi))
+                    conn.execute(f"DELETE FROM main.{table} WHERE {ts_col} >= ? AND {ts_col} < ?", (lo, hi))
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                finally:
+                    conn.execute("DETACH DATABASE part")
+                if path not in written:
+                    written.append(path)
+    finally:
+        conn.close()
+    return written
+
+
+def prune(db_file: str, keep: int = RETENTION_KEEP_PARTITIONS, archive_dir: str = ARCHIVE_DIR) -> list[str]:
+    """Deletes all but the newest `keep` partition files. Returns the removed paths."""
+    partitions = list_partitions(db_file, archive_dir)
+    expired = partitions[:-keep] if keep > 0 else partitions
+    for path in expired:
+        for side in (path, path + "-wal", path + "-shm", path + "-journal"):
+            if os.path.exists(side):
+                os.remove(side)
+    return expired
+
+
+def compact(path: str):
+    """VACUUMs a closed partition so archived history takes as little disk as possible."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def run_maintenance(db_file: str, migrations: list[Migration], tables: dict[str, str],
+                    period: str = RETENTION_PARTITION, keep: int = RETENTION_KEEP_PARTITIONS,
+                    archive_dir: str = ARCHIVE_DIR):
+    """Rotate, prune and compact in one pass; meant to run off the UI thread."""
+    try:
+        written = rotate(db_file, migrations, tables, period, archive_dir)
+        removed = prune(db_file, keep, archive_dir)
+        for path in written:
+            if path not in removed:
+                compact(path)
+        if written or removed:
+            logger.info("🗄️ Archived %d partition(s), removed %d expired partition(s) for %s.", len(written), len(removed), db_file)
+    except Exception as e:
+        logger.error("Retention maintenance failed for %s: %s", db_file, e)
+
+
+def start_maintenance(db_file: str, migrations: list[Migration], tables: dict[str, str],
+                      period: str = RETENTION_PARTITION, keep: int = RETENTION_KEEP_PARTITIONS,
+                      archive_dir: str = ARCHIVE_DIR) -> threading.Thread:
+    thread = threading.Thread(target=run_maintenance, name="retention", daemon=True,
+                              args=(db_file, migrations, tables, period, keep, archive_dir))
+    thread.start()
+    return thread
+
+
+# --- Historical Queries ---
+def open_history(db_file: str, source: str, archive_dir: str = ARCHIVE_DIR,
+                 max_partitions: int = HISTORY_MAX_PARTITIONS, partitions: Optional[list[str]] = None,
+                 columns: str = "*") -> sqlite3.Connection:
+    """Opens the live DB with its newest partitions (or exactly `partitions`) attached read-only.
+
+    Creates a TEMP view `<source>_history` that unions `columns` of `source` (e.g. activity_events)
+    across the live file and the attached partitions. Raises ValueError when `partitions` holds
+    more files than can be attached.
+    """
+    if partitions is None:
+        partitions = list_partitions(db_file, archive_dir)[-max_partitions:] if max_partitions > 0 else []
+    elif len(partitions) > max_partitions:
+        raise ValueError(f"range spans {len(partitions)} archive partitions; at most {max_partitions} can be read at once")
+    conn = sqlite3.connect(db_file, uri=True, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+    selects = [f"SELECT {columns} FROM main.{source}"]
+    for i, path in enumerate(partitions):
+        uri = "file:" + os.path.abspath(path).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+        conn.execute("ATTACH DATABASE ? AS ?", (uri, f"p{i}"))
+        selects.append(f"SELECT {columns} FROM p{i}.{source}")
+    conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {source}_history AS " + " UNION ALL ".join(selects))
+    return conn
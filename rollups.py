@@ -0,0 +1,163 @@
+import heapq
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+from db_writer import WRITER_BUSY_TIMEOUT_MS, configure_connection
+from retention import ARCHIVE_DIR, list_partitions
+
+# --- Constants ---
+ARCHIVE_BACKFILL_MARKER = "archives"  # rollup_backfill row recording that archive partitions were rolled up
+STARTED_PREFIX = "Started for "       # "Started for N minutes." carries the expected length of a timed status
+
+
+# --- Queries ---
+def team_totals(conn: sqlite3.Connection, first_day: str, last_day: str,
+                emp_ids: Optional[Iterable[str]] = None) -> dict[str, dict[str, dict[str, int]]]:
+    """{emp_id: {status: {seconds, intervals, exceeded_count, exceeded_seconds}}} for days in [first_day, last_day].
+
+    Days are local 'YYYY-MM-DD' strings. Reads only the pre-aggregated daily rows (closed intervals).
+    """
+    sql = '''
+        SELECT d.emp_id, s.name, SUM(d.seconds), SUM(d.intervals), SUM(d.exceeded_count), SUM(d.exceeded_seconds)
+        FROM daily_status_totals d JOIN status_dict s ON s.id = d.status_id
+        WHERE d.day BETWEEN ? AND ?
+    '''
+    params: list = [first_day, last_day]
+    if emp_ids is not None:
+        emp_ids = list(emp_ids)
+        sql += f" AND d.emp_id IN ({', '.join('?' * len(emp_ids))})"
+        params += emp_ids
+    sql += " GROUP BY d.emp_id, s.name"
+
+    totals: dict[str, dict[str, dict[str, int]]] = defaultdict(dict)
+    for emp_id, status, seconds, intervals, exceeded_count, exceeded_seconds in conn.execute(sql, params):
+        totals[emp_id][status] = {"seconds": seconds, "intervals": intervals,
+                                  "exceeded_count": exceeded_count, "exceeded_seconds": exceeded_seconds}
+    return dict(totals)
+
+
+def daily_totals(conn: sqlite3.Connection, emp_id: str, first_day: str, last_day: str) -> list[tuple]:
+    """(day, status, seconds, exceeded_count, exceeded_seconds) rows for one employee, by day."""
+    return conn.execute('''
+        SELECT d.day, s.name, d.seconds, d.exceeded_count, d.exceeded_seconds
+        FROM daily_status_totals d JOIN status_dict s ON s.id = d.status_id
+        WHERE d.emp_id = ? AND d.day BETWEEN ? AND ?
+        ORDER BY d.day, s.name
+    ''', (emp_id or "", first_day, last_day)).fetchall()
+
+
+# --- Archive Backfill ---
+def _partition_events(path: str) -> Iterator[tuple]:
+    """(emp_id, timestamp, id, status, remark) from one partition, in (emp_id, timestamp) index order."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        yield from conn.execute('''
+            SELECT COALESCE(a.emp_id, ''), a.timestamp, a.id, s.name, a.remark
+            FROM activity_log a JOIN status_dict s ON s.id = a.status_id
+            ORDER BY a.emp_id, a.timestamp, a.id
+        ''')
+    finally:
+        conn.close()
+
+
+def split_by_day(start_ts: int, end_ts: int) -> Iterator[tuple[str, int]]:
+    """(local day, seconds) pieces of [start_ts, end_ts), same rule as the rollup trigger."""
+    day = datetime.fromtimestamp(start_ts).date()
+    while True:
+        day_start = int(datetime.combine(day, datetime.min.time()).timestamp())
+        day_end = int(datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp())
+        if day_start >= end_ts:
+            return
+        seconds = min(end_ts, day_end) - max(start_ts, day_start)
+        if seconds > 0:
+            yield day.isoformat(), seconds
+        day += timedelta(days=1)
+
+
+def backfill_archives(db_file: str, archive_dir: str = ARCHIVE_DIR) -> int:
+    """Rolls up archive partitions written before rollups existed, in one merged streaming pass.
+
+    Events are merged across partitions in (emp_id, timestamp) order, turned into intervals on
+    the fly and added to daily_status_totals. Only events older than each employee's first
+    materialized interval are used, so nothing already rolled up is counted twice. Runs once.
+    Returns the number of day/status rows updated.
+    """
+    conn = sqlite3.connect(db_file, timeout=WRITER_BUSY_TIMEOUT_MS / 1000)
+    configure_connection(conn)
+    try:
+        if conn.execute("SELECT 1 FROM rollup_backfill WHERE name = ?", (ARCHIVE_BACKFILL_MARKER,)).fetchone():
+            return 0
+        cutoffs = dict(conn.execute("SELECT COALESCE(emp_id, ''), MIN(start_ts) FROM status_intervals GROUP BY 1"))
+        status_ids = dict(conn.execute("SELECT name, id FROM status_dict"))
+
+        totals: dict[tuple[str, str, str], list[int]] = defaultdict(lambda: [0, 0, 0, 0])
+
+        def close(emp_id, status, start_ts, end_ts, expected):
+            duration = end_ts - start_ts
+            pieces = list(split_by_day(start_ts, end_ts))
+            for index, (day, seconds) in enumerate(pieces):
+                row = totals[(emp_id, day, status)]
+                row[0] += seconds
+                row[1] += 1
+                if index == len(pieces) - 1 and expected is not None and duration > expected:
+                    row[2] += 1
+                    row[3] += duration - expected
+
+        streams = [_partition_events(path) for path in list_partitions(db_file, archive_dir)]
+        current = None  # [emp_id, status, start_ts, expected_seconds, last_ts]
+        for emp_id, timestamp, _, status, remark in heapq.merge(*streams, key=lambda e: (e[0], e[1], e[2])):
+            cutoff = cutoffs.get(emp_id)
+            if cutoff is not None and timestamp >= cutoff:
+                continue
+            if current is not None and current[0] != emp_id:
+                # Last archived interval of the previous employee ends where live intervals begin
+                end = cutoffs.get(current[0], current[4])
+                close(current[0], current[1], current[2], max(end, current[2]), current[3])
+                current = None
+            if current is None or current[1] != status:
+                if current is not None:
+                    close(current[0], current[1], current[2], timestamp, current[3])
+                current = [emp_id, status, timestamp, None, timestamp]
+            current[4] = timestamp
+            if remark and remark.startswith(STARTED_PREFIX) and remark.endswith(" minutes."):
+                try:
+                    current[3] = int(remark[len(STARTED_PREFIX):-len(" minutes.")]) * 60
+                except ValueError:
+                    pass
+        if current is not None:
+            end = cutoffs.get(current[0], current[4])
+            close(current[0], current[1], current[2], max(end, current[2]), current[3])
+
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO status_dict (name) VALUES (?)",
+                             [(status,) for (_, _, status) in totals if status not in status_ids])
+            status_ids = dict(conn.execute("SELECT name, id FROM status_dict"))
+            conn.executemany('''
+                INSERT INTO daily_status_totals (emp_id, day, status_id, seconds, intervals, exceeded_count, exceeded_seconds)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (emp_id, day, status_id) DO UPDATE SET
+                    seconds = seconds + excluded.seconds,
+                    intervals = intervals + excluded.intervals,
+                    exceeded_count = exceeded_count + excluded.exceeded_count,
+                    exceeded_seconds = exceeded_seconds + excluded.exceeded_seconds
+            ''', [(emp_id, day, status_ids[status], *values) for (emp_id, day, status), values in totals.items()])
+            conn.execute("INSERT INTO rollup_backfill (name, finished_at) VALUES (?, ?)",
+                         (ARCHIVE_BACKFILL_MARKER, int(time.time())))
+        return len(totals)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Usage: python rollups.py prototype.db [archive_dir]
+    db = sys.argv[1] if len(sys.argv) > 1 else "prototype.db"
+    archive = sys.argv[2] if len(sys.argv) > 2 else ARCHIVE_DIR
+    if not os.path.exists(db):
+        print(f"⚠️ Warning: {db} not found.")
+        sys.exit(1)
+    print(f"✅ Backfilled {backfill_archives(db, archive)} daily rollup row(s) from {archive}.")
@@ -0,0 +1,830 @@
+import random
+import sqlite3
+from typing import Callable
+
+# --- Constants ---
+# Statuses seeded into the dictionary so the common ones get small, stable ids.
+KNOWN_STATUSES = ["Working", "Lunch", "Meeting", "Personal", "Break", "Offline", "Off work", "Idle"]
+
+# Converts the legacy local-time TEXT timestamps ('YYYY-MM-DD HH:MM:SS') to integer epoch seconds.
+LEGACY_TS_TO_EPOCH = "CAST(strftime('%s', {col}, 'utc') AS INTEGER)"
+
+ROLLUP_MAX_DAYS = 400  # Longest interval (in local days) the daily rollup splits; longer ones are truncated
+
+# Default app categories as (lower-case GLOB on the process name, category); the first match wins.
+# Sites replace them with app_usage.set_category_rules(); apps matching nothing are reported as "Other".
+DEFAULT_APP_CATEGORIES = [
+    ("chrome.exe", "Browser"), ("msedge.exe", "Browser"), ("firefox.exe", "Browser"),
+    ("code.exe", "Development"), ("pycharm*.exe", "Development"), ("devenv.exe", "Development"),
+    ("slack.exe", "Communication"), ("teams.exe", "Communication"), ("ms-teams.exe", "Communication"),
+    ("zoom.exe", "Meetings"), ("outlook.exe", "Email"),
+    ("excel.exe", "Office"), ("winword.exe", "Office"), ("powerpnt.exe", "Office"),
+]
+
+Migration = Callable[[sqlite3.Connection], None]
+
+
+# --- Shared Helpers ---
+def _table_columns(conn: sqlite3.Connection, table: str) -> dict[str, str]:
+    """Returns {column_name: declared_type} for a table (empty if it does not exist)."""
+    return {row[1]: (row[2] or "").upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _create_status_dict(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS status_dict (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    conn.executemany("INSERT OR IGNORE INTO status_dict (name) VALUES (?)", [(s,) for s in KNOWN_STATUSES])
+
+
+def _create_status_intervals(conn: sqlite3.Connection, source: str, emp_expr: str):
+    """Closed-interval table kept current by triggers on `source`, backfilled from existing rows.
+
+    A new interval opens whenever an event's status differs from the employee's open interval;
+    the open interval is closed at that event's timestamp. "Started for N minutes." rows set
+    the expected length, so exceedance is simply duration_seconds > expected_seconds.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS status_intervals (
+            id INTEGER PRIMARY KEY,
+            emp_id TEXT,
+            status_id INTEGER REFERENCES status_dict(id),
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER,
+            duration_seconds INTEGER,
+            expected_seconds INTEGER
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_emp_end ON status_intervals (emp_id, end_ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intervals_open ON status_intervals (emp_id) WHERE end_ts IS NULL")
+
+    _backfill_status_intervals(conn, source, "emp_id" if emp_expr != "NULL" else "NULL")
+    _create_interval_open_trigger(conn, source, emp_expr)
+
+
+def _create_interval_open_trigger(conn: sqlite3.Connection, source: str, emp_expr: str):
+    """(Re)creates the one trigger that keeps status_intervals current for `source`.
+
+    Its statements run in order: close the open interval if the status changed, open the next
+    one, then apply a "Started for N minutes." remark to whichever interval is now open. Being a
+    single trigger, nothing depends on the order SQLite fires separate triggers in.
+    """
+    conn.execute(f"DROP TRIGGER IF EXISTS {source}_interval_expected")
+    conn.execute(f"DROP TRIGGER IF EXISTS {source}_status_intervals")
+    conn.execute(f'''
+        CREATE TRIGGER {source}_status_intervals
+        AFTER INSERT ON {source}
+        WHEN NEW.status_id IS NOT NULL
+        BEGIN
+            UPDATE status_intervals
+            SET end_ts = MAX(NEW.timestamp, start_ts), duration_seconds = MAX(NEW.timestamp, start_ts) - start_ts
+            WHERE emp_id IS {emp_expr} AND end_ts IS NULL AND status_id IS NOT NEW.status_id;
+            INSERT INTO status_intervals (emp_id, status_id, start_ts)
+            SELECT {emp_expr}, NEW.status_id, NEW.timestamp
+            WHERE NOT EXISTS (SELECT 1 FROM status_intervals WHERE emp_id IS {emp_expr} AND end_ts IS NULL);
+            UPDATE status_intervals SET expected_seconds = CAST(substr(NEW.remark, 13) AS INTEGER) * 60
+            WHERE NEW.remark LIKE 'Started for % minutes.'
+              AND emp_id IS {emp_expr} AND end_ts IS NULL AND status_id = NEW.status_id;
+        END
+    ''')
+
+
+def _backfill_opening_expected(conn: sqlite3.Connection, source: str, emp_column: str):
+    """Fills expected_seconds the old trigger order missed: intervals opened by a "Started for N minutes." row."""
+    conn.execute(f'''
+        UPDATE status_intervals SET expected_seconds = (
+            SELECT CAST(substr(s.remark, 13) AS INTEGER) * 60 FROM {source} s
+            WHERE {emp_column} IS status_intervals.emp_id AND s.timestamp = status_intervals.start_ts
+              AND s.status_id = status_intervals.status_id AND s.remark LIKE 'Started for % minutes.'
+            ORDER BY s.id DESC LIMIT 1)
+        WHERE expected_seconds IS NULL
+    ''')
+
+
+def _backfill_status_intervals(conn: sqlite3.Connection, source: str, emp_column: str, where: str = "TRUE"):
+    """Builds intervals for the `source` rows matching `where` in one window-function pass.
+
+    Consecutive rows with the same status form a run (one interval); the last "Started for N
+    minutes." remark in the run sets its expected length, as the trigger does.
+    """
+    conn.execute(f'''
+        INSERT INTO status_intervals (emp_id, status_id, start_ts, end_ts, duration_seconds, expected_seconds)
+        SELECT emp_id, status_id, start_ts, next_ts, next_ts - start_ts, expected_seconds FROM (
+            SELECT emp_id, status_id, start_ts, expected_seconds,
+                   LEAD(start_ts) OVER (PARTITION BY emp_id ORDER BY start_ts, first_id) AS next_ts
+            FROM (
+                SELECT emp_id, MIN(status_id) AS status_id, MIN(timestamp) AS start_ts, MIN(id) AS first_id,
+                       CAST(substr(MAX(CASE WHEN remark LIKE 'Started for % minutes.'
+                                            THEN printf('%020d:', id) || substr(remark, 13) END), 22)
+                            AS INTEGER) * 60 AS expected_seconds  -- Latest such remark in the run wins
+                FROM (
+                    SELECT emp_id, timestamp, id, status_id, remark,
+                           SUM(changed) OVER (PARTITION BY emp_id ORDER BY timestamp, id) AS run
+                    FROM (
+                        SELECT {emp_column} AS emp_id, status_id, timestamp, id, remark,
+                               LAG(status_id) OVER (PARTITION BY {emp_column} ORDER BY timestamp, id)
+                                   IS NOT status_id AS changed
+                        FROM {source} WHERE status_id IS NOT NULL AND ({where})
+                    )
+                )
+                GROUP BY emp_id, run
+            )
+        )
+    ''')
+
+
+_ROLLUP_UPSERT = '''
+    ON CONFLICT (emp_id, day, status_id) DO UPDATE SET
+        seconds = seconds + excluded.seconds,
+        intervals = intervals + excluded.intervals,
+        exceeded_count = exceeded_count + excluded.exceeded_count,
+        exceeded_seconds = exceeded_seconds + excluded.exceeded_seconds
+'''
+_ROLLUP_COLUMNS = "emp_id, day, status_id, seconds, intervals, exceeded_count, exceeded_seconds"
+
+
+def _split_by_day(row: str, source: str) -> str:
+    """Per-day pieces of interval `row` ("NEW" in the trigger, a table alias in the backfill)."""
+    day = f"date({row}.start_ts, 'unixepoch', 'localtime', '+' || o.n || ' days')"
+    span = (f"CAST(julianday(date({row}.end_ts, 'unixepoch', 'localtime'))"
+            f" - julianday(date({row}.start_ts, 'unixepoch', 'localtime')) AS INTEGER)")
+    return f'''
+        SELECT emp_id, day, status_id,
+               MIN(end_ts, day_end) - MAX(start_ts, day_start) AS seconds,
+               1 AS intervals,
+               CASE WHEN day_end >= end_ts AND duration_seconds > expected_seconds THEN 1 ELSE 0 END AS exceeded_count,
+               CASE WHEN day_end >= end_ts AND duration_seconds > expected_seconds
+                    THEN duration_seconds - expected_seconds ELSE 0 END AS exceeded_seconds
+        FROM (
+            SELECT COALESCE({row}.emp_id, '') AS emp_id, {row}.status_id, {row}.start_ts, {row}.end_ts,
+                   {row}.duration_seconds, {row}.expected_seconds,
+                   {day} AS day,
+                   {LEGACY_TS_TO_EPOCH.format(col=day)} AS day_start,
+                   CAST(strftime('%s', {day}, '+1 day', 'utc') AS INTEGER) AS day_end
+            FROM {source}
+            WHERE o.n <= {span} AND {row}.status_id IS NOT NULL AND {row}.end_ts IS NOT NULL
+        )
+        WHERE day_start < end_ts AND day_end > start_ts
+    '''
+
+
+
+def _backfill_daily_rollups(conn: sqlite3.Connection, intervals: str = "status_intervals", sign: int = 1):
+    """Adds every closed interval in `intervals` (a table or subquery) to daily_status_totals (sign=-1 subtracts)."""
+    conn.execute(f'''
+        INSERT INTO daily_status_totals ({_ROLLUP_COLUMNS})
+        SELECT emp_id, day, status_id, {sign} * SUM(seconds), {sign} * SUM(intervals), {sign} * SUM(exceeded_count),
+               {sign} * SUM(exceeded_seconds)
+        FROM ({_split_by_day("i", f"{intervals} i JOIN rollup_day_offsets o")})
+        GROUP BY 1, 2, 3
+        {_ROLLUP_UPSERT}
+    ''')
+
+
+def _create_daily_rollups(conn: sqlite3.Connection):
+    """Per (emp_id, local day, status) totals, updated by a trigger whenever an interval closes.
+
+    Intervals crossing midnight are split across days using a small offsets table (triggers cannot
+    use CTEs). Exceedances are attributed to the day the interval ended. Only closed intervals are
+    rolled up; readers add the open interval themselves.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_status_totals (
+            emp_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            status_id INTEGER NOT NULL REFERENCES status_dict(id),
+            seconds INTEGER NOT NULL DEFAULT 0,
+            intervals INTEGER NOT NULL DEFAULT 0,
+            exceeded_count INTEGER NOT NULL DEFAULT 0,
+            exceeded_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (emp_id, day, status_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_day ON daily_status_totals (day)")
+    conn.execute("CREATE TABLE IF NOT EXISTS rollup_day_offsets (n INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TABLE IF NOT EXISTS rollup_backfill (name TEXT PRIMARY KEY, finished_at INTEGER)")
+    conn.executemany("INSERT OR IGNORE INTO rollup_day_offsets (n) VALUES (?)", [(n,) for n in range(ROLLUP_MAX_DAYS)])
+
+    # Backfill from every interval already closed (one pass over the interval table)
+    _backfill_daily_rollups(conn)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS status_intervals_rollup
+        AFTER UPDATE OF end_ts ON status_intervals
+        WHEN OLD.end_ts IS NULL AND NEW.end_ts IS NOT NULL
+        BEGIN
+            INSERT INTO daily_status_totals ({_ROLLUP_COLUMNS})
+            SELECT * FROM ({_split_by_day("NEW", "rollup_day_offsets o")}) WHERE true
+            {_ROLLUP_UPSERT};
+        END
+    ''')
+
+
+def _retype_table(conn: sqlite3.Connection, table: str, create_sql: str, columns: list[str]):
+    """Rebuilds a legacy TEXT-timestamp table into the typed layout, converting rows in place."""
+    existing = _table_columns(conn, table)
+    if existing and existing.get("timestamp") != "INTEGER":
+        legacy = f"{table}_legacy"
+        conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        conn.execute(create_sql)
+        conn.execute(f"INSERT OR IGNORE INTO status_dict (name) SELECT DISTINCT status FROM {legacy} WHERE status IS NOT NULL")
+        select_cols = ", ".join(columns)
+        conn.execute(f'''
+            INSERT INTO {table} (id, timestamp, status_id, {select_cols})
+            SELECT l.id,
+                   COALESCE({LEGACY_TS_TO_EPOCH.format(col="l.timestamp")}, 0),
+                   s.id,
+                   {", ".join("l." + c for c in columns)}
+            FROM {legacy} l LEFT JOIN status_dict s ON s.name = l.status
+            ORDER BY l.id
+        ''')
+        conn.execute(f"DROP TABLE {legacy}")
+    else:
+        conn.execute(create_sql)
+
+
+# --- prototype.db (activity_log) Migrations ---
+ACTIVITY_LOG_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS activity_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL,
+        emp_id TEXT,
+        status_id INTEGER REFERENCES status_dict(id),
+        response TEXT,
+        remark TEXT
+    )
+'''
+
+
+def _activity_v1_typed_table(conn: sqlite3.Connection):
+    """Epoch-second timestamps and a status dictionary instead of repeated status text."""
+    _create_status_dict(conn)
+    _retype_table(conn, "activity_log", ACTIVITY_LOG_TABLE_SQL, ["emp_id", "response", "remark"])
+
+
+def _activity_v2_indexes(conn: sqlite3.Connection):
+    """Composite indexes for per-employee range scans, last-status lookup and per-status reports."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_emp_ts ON activity_log (emp_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_status_ts ON activity_log (status_id, timestamp)")
+
+
+def _activity_v3_events_view(conn: sqlite3.Connection):
+    """Readable view with status names; inserting into it resolves/creates the status id."""
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS activity_events AS
+        SELECT a.id, a.timestamp, a.emp_id, s.name AS status, a.response, a.remark
+        FROM activity_log a LEFT JOIN status_dict s ON s.id = a.status_id
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS activity_events_insert
+        INSTEAD OF INSERT ON activity_events
+        BEGIN
+            INSERT OR IGNORE INTO status_dict (name) VALUES (NEW.status);
+            INSERT INTO activity_log (timestamp, emp_id, status_id, response, remark)
+            VALUES (NEW.timestamp, NEW.emp_id,
+                    (SELECT id FROM status_dict WHERE name = NEW.status),
+                    NEW.response, NEW.remark);
+        END
+    ''')
+
+
+def _activity_v4_status_intervals(conn: sqlite3.Connection):
+    _create_status_intervals(conn, "activity_log", "NEW.emp_id")
+
+
+def _activity_v5_daily_rollups(conn: sqlite3.Connection):
+    _create_daily_rollups(conn)
+
+
+def _activity_v6_client_sequence(conn: sqlite3.Connection):
+    """Origin of centrally ingested rows; (client_id, client_seq) is unique so re-uploads are ignored."""
+    conn.execute("ALTER TABLE activity_log ADD COLUMN client_id TEXT")
+    conn.execute("ALTER TABLE activity_log ADD COLUMN client_seq INTEGER")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_activity_client_seq ON activity_log (client_id, client_seq)
+        WHERE client_seq IS NOT NULL
+    ''')
+    conn.execute("DROP TRIGGER IF EXISTS activity_events_insert")
+    conn.execute("DROP VIEW IF EXISTS activity_events")
+    conn.execute('''
+        CREATE VIEW activity_events AS
+        SELECT a.id, a.timestamp, a.emp_id, s.name AS status, a.response, a.remark, a.client_id, a.client_seq
+        FROM activity_log a LEFT JOIN status_dict s ON s.id = a.status_id
+    ''')
+    conn.execute('''
+        CREATE TRIGGER activity_events_insert
+        INSTEAD OF INSERT ON activity_events
+        BEGIN
+            INSERT OR IGNORE INTO status_dict (name) VALUES (NEW.status);
+            INSERT INTO activity_log (timestamp, emp_id, status_id, response, remark, client_id, client_seq)
+            VALUES (NEW.timestamp, NEW.emp_id,
+                    (SELECT id FROM status_dict WHERE name = NEW.status),
+                    NEW.response, NEW.remark, NEW.client_id, NEW.client_seq);
+        END
+    ''')
+
+
+def _activity_v7_outbox(conn: sqlite3.Connection):
+    """Crash-safe upload queue: local rows are copied into outbox in the same transaction that logs them.
+
+    Only armed once a client registers in outbox_state, so trackers that never upload (and the
+    central store itself, whose rows all carry a client_seq) don't accumulate a queue.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            client_id TEXT NOT NULL,
+            acked_seq INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            seq INTEGER PRIMARY KEY,  -- activity_log.id: AUTOINCREMENT, so never reused
+            timestamp INTEGER NOT NULL,
+            emp_id TEXT,
+            status_id INTEGER NOT NULL,
+            response TEXT,
+            remark TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS activity_log_outbox
+        AFTER INSERT ON activity_log
+        WHEN NEW.client_seq IS NULL AND EXISTS (SELECT 1 FROM outbox_state)
+        BEGIN
+            INSERT INTO outbox (seq, timestamp, emp_id, status_id, response, remark)
+            VALUES (NEW.id, NEW.timestamp, NEW.emp_id, NEW.status_id, NEW.response, NEW.remark);
+        END
+    ''')
+
+
+def _activity_v8_timestamp_index(conn: sqlite3.Connection):
+    """Time-ordered listings across all employees (dashboard paging) and retention cut-offs."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_ts ON activity_log (timestamp)")
+
+
+def _activity_v9_window_intervals(conn: sqlite3.Connection):
+    """Foreground-window runs (see window_tracker.py) with app names and titles interned into dictionaries.
+
+    A run is keyed by (emp_id, start_ts): inserting it again through window_events extends the
+    stored row instead of adding one, so the sampler can checkpoint a long run in place.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS app_dict (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    conn.execute("CREATE TABLE IF NOT EXISTS title_dict (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS window_intervals (
+            id INTEGER PRIMARY KEY,
+            emp_id TEXT NOT NULL,
+            app_id INTEGER NOT NULL REFERENCES app_dict(id),
+            title_id INTEGER NOT NULL REFERENCES title_dict(id),
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 1,
+            UNIQUE (emp_id, start_ts)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_window_start ON window_intervals (start_ts)")
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS window_events AS
+        SELECT w.id, w.emp_id, a.name AS app, t.text AS title, w.start_ts, w.end_ts, w.samples
+        FROM window_intervals w JOIN app_dict a ON a.id = w.app_id JOIN title_dict t ON t.id = w.title_id
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS window_events_insert
+        INSTEAD OF INSERT ON window_events
+        BEGIN
+            INSERT OR IGNORE INTO app_dict (name) VALUES (NEW.app);
+            INSERT OR IGNORE INTO title_dict (text) VALUES (NEW.title);
+            INSERT INTO window_intervals (emp_id, app_id, title_id, start_ts, end_ts, samples)
+            VALUES (NEW.emp_id, (SELECT id FROM app_dict WHERE name = NEW.app),
+                    (SELECT id FROM title_dict WHERE text = NEW.title), NEW.start_ts, NEW.end_ts, NEW.samples)
+            ON CONFLICT (emp_id, start_ts) DO UPDATE SET
+                app_id = excluded.app_id, title_id = excluded.title_id,
+                end_ts = excluded.end_ts, samples = excluded.samples;
+        END
+    ''')
+
+
+_APP_USAGE_UPSERT = "ON CONFLICT (emp_id, day, app_id, status_id) DO UPDATE SET seconds = seconds + excluded.seconds"
+_APP_CATEGORY_OF = '''(
+    SELECT r.category FROM app_category_rules r WHERE lower({name}) GLOB r.pattern ORDER BY r.priority LIMIT 1)'''
+
+
+def _app_usage_pieces(row: str, start: str, end: str, source: str) -> str:
+    """Seconds of [start, end) of window run `row` per overlapping status interval `si`.
+
+    Window runs never cross local midnight (the sampler splits them), so a piece is booked on the
+    day it starts. Time before the employee's first status interval is not counted.
+    """
+    return f'''
+        SELECT {row}.emp_id AS emp_id, date(MAX({start}, si.start_ts), 'unixepoch', 'localtime') AS day,
+               {row}.app_id AS app_id, si.status_id AS status_id,
+               MIN({end}, COALESCE(si.end_ts, {end})) - MAX({start}, si.start_ts) AS seconds
+        FROM {source}
+        WHERE si.emp_id = {row}.emp_id AND si.status_id IS NOT NULL
+          AND si.start_ts < {end} AND (si.end_ts > {start} OR si.end_ts IS NULL)
+    '''
+
+
+def _intervals_after(row: str, start: str) -> str:
+    """status_intervals of `row`'s employee still open or ending after `start`, as two index range scans."""
+    return f'''(
+        SELECT * FROM status_intervals WHERE emp_id = {row}.emp_id AND end_ts > {start}
+        UNION ALL
+        SELECT * FROM status_intervals WHERE emp_id = {row}.emp_id AND end_ts IS NULL) si'''
+
+
+def _backfill_app_usage(conn: sqlite3.Connection, where: str = "TRUE", sign: int = 1):
+    """Adds every stored window run matching `where` (on alias w) to daily_app_totals (sign=-1 subtracts)."""
+    conn.execute(f'''
+        INSERT INTO daily_app_totals (emp_id, day, app_id, status_id, seconds)
+        SELECT emp_id, day, app_id, status_id, {sign} * SUM(seconds)
+        FROM ({_app_usage_pieces("w", "w.start_ts", "w.end_ts", "window_intervals w JOIN status_intervals si")}
+              AND ({where}))
+        GROUP BY 1, 2, 3, 4 HAVING SUM(seconds) > 0
+        {_APP_USAGE_UPSERT}
+    ''')
+
+
+def _activity_v10_app_usage(conn: sqlite3.Connection):
+    """Per (emp_id, local day, app, status) foreground seconds, kept current by triggers on window runs.
+
+    The sampler only ever extends a saved run, so an update adds just the new [old end, new end)
+    slice. Apps get a category from app_category_rules when first seen; categories are read
+    through app_dict at query time, so changing the rules needs no re-aggregation.
+    """
+    conn.execute("ALTER TABLE app_dict ADD COLUMN category TEXT")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS app_category_rules (
+            priority INTEGER PRIMARY KEY,
+            pattern TEXT NOT NULL,
+            category TEXT NOT NULL
+        )
+    ''')
+    conn.executemany("INSERT OR IGNORE INTO app_category_rules (priority, pattern, category) VALUES (?, ?, ?)",
+                     [(i, pattern, category) for i, (pattern, category) in enumerate(DEFAULT_APP_CATEGORIES)])
+    conn.execute("UPDATE app_dict SET category = " + _APP_CATEGORY_OF.format(name="app_dict.name"))
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS app_dict_category
+        AFTER INSERT ON app_dict
+        BEGIN
+            UPDATE app_dict SET category = {_APP_CATEGORY_OF.format(name="NEW.name")} WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_app_totals (
+            emp_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            app_id INTEGER NOT NULL REFERENCES app_dict(id),
+            status_id INTEGER NOT NULL REFERENCES status_dict(id),
+            seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (emp_id, day, app_id, status_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_daily_app_day ON daily_app_totals (day)")
+
+    _backfill_app_usage(conn)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS window_intervals_app_usage
+        AFTER INSERT ON window_intervals
+        BEGIN
+            INSERT INTO daily_app_totals (emp_id, day, app_id, status_id, seconds)
+            SELECT * FROM ({_app_usage_pieces("NEW", "NEW.start_ts", "NEW.end_ts", _intervals_after("NEW", "NEW.start_ts"))})
+            WHERE seconds > 0
+            {_APP_USAGE_UPSERT};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS window_intervals_app_usage_extend
+        AFTER UPDATE OF end_ts ON window_intervals
+        WHEN NEW.end_ts > OLD.end_ts
+        BEGIN
+            INSERT INTO daily_app_totals (emp_id, day, app_id, status_id, seconds)
+            SELECT * FROM ({_app_usage_pieces("NEW", "OLD.end_ts", "NEW.end_ts", _intervals_after("NEW", "OLD.end_ts"))})
+            WHERE seconds > 0
+            {_APP_USAGE_UPSERT};
+        END
+    ''')
+
+
+def _activity_v11_metrics_snapshots(conn: sqlite3.Connection):
+    """Periodic copies of the tracker's metrics registry (JSON), rotated with the rest of the day's rows."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS metrics_snapshots (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            emp_id TEXT,
+            metrics TEXT NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics_snapshots (timestamp)")
+
+
+def _activity_v12_client_cursor(conn: sqlite3.Connection):
+    """Highest client_seq stored per client; uploads at or below it are dropped even after their rows rotated out.
+
+    Kept by the activity_events insert trigger, in the same statement as the row, so the mark
+    never runs ahead of what is committed. Bulk imports write activity_log directly and leave it alone.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS client_cursor (
+            client_id TEXT PRIMARY KEY,
+            acked_seq INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO client_cursor (client_id, acked_seq)
+        SELECT client_id, MAX(client_seq) FROM activity_log
+        WHERE client_seq IS NOT NULL AND client_id NOT LIKE 'import:%'
+        GROUP BY client_id
+    ''')
+    conn.execute("DROP TRIGGER IF EXISTS activity_events_insert")
+    conn.execute('''
+        CREATE TRIGGER activity_events_insert
+        INSTEAD OF INSERT ON activity_events
+        BEGIN
+            INSERT OR IGNORE INTO status_dict (name) VALUES (NEW.status);
+            INSERT INTO activity_log (timestamp, emp_id, status_id, response, remark, client_id, client_seq)
+            SELECT NEW.timestamp, NEW.emp_id,
+                   (SELECT id FROM status_dict WHERE name = NEW.status),
+                   NEW.response, NEW.remark, NEW.client_id, NEW.client_seq
+            WHERE NEW.client_seq IS NULL
+               OR NEW.client_seq > COALESCE((SELECT acked_seq FROM client_cursor WHERE client_id = NEW.client_id), 0);
+            INSERT OR IGNORE INTO client_cursor (client_id, acked_seq)
+            SELECT NEW.client_id, NEW.client_seq WHERE NEW.client_seq IS NOT NULL;
+            UPDATE client_cursor SET acked_seq = MAX(acked_seq, NEW.client_seq)
+            WHERE NEW.client_seq IS NOT NULL AND client_id = NEW.client_id;
+        END
+    ''')
+
+
+def _activity_v13_event_id(conn: sqlite3.Connection):
+    """Random id each event keeps in the row, its structured log record and its upload.
+
+    Unique when set, so re-importing a log (under any file name) or a tracker's database skips
+    events that are already stored, wherever they arrived from.
+    """
+    conn.execute("ALTER TABLE activity_log ADD COLUMN event_id INTEGER")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_activity_event_id ON activity_log (event_id) WHERE event_id IS NOT NULL")
+    conn.execute("ALTER TABLE outbox ADD COLUMN event_id INTEGER")
+    conn.execute("DROP TRIGGER IF EXISTS activity_log_outbox")
+    conn.execute('''
+        CREATE TRIGGER activity_log_outbox
+        AFTER INSERT ON activity_log
+        WHEN NEW.client_seq IS NULL AND EXISTS (SELECT 1 FROM outbox_state)
+        BEGIN
+            INSERT INTO outbox (seq, timestamp, emp_id, status_id, response, remark, event_id)
+            VALUES (NEW.id, NEW.timestamp, NEW.emp_id, NEW.status_id, NEW.response, NEW.remark, NEW.event_id);
+        END
+    ''')
+    conn.execute("DROP TRIGGER IF EXISTS activity_events_insert")
+    conn.execute("DROP VIEW IF EXISTS activity_events")
+    conn.execute('''
+        CREATE VIEW activity_events AS
+        SELECT a.id, a.timestamp, a.emp_id, s.name AS status, a.response, a.remark, a.client_id, a.client_seq, a.event_id
+        FROM activity_log a LEFT JOIN status_dict s ON s.id = a.status_id
+    ''')
+    conn.execute('''
+        CREATE TRIGGER activity_events_insert
+        INSTEAD OF INSERT ON activity_events
+        BEGIN
+            INSERT OR IGNORE INTO status_dict (name) VALUES (NEW.status);
+            INSERT INTO activity_log (timestamp, emp_id, status_id, response, remark, client_id, client_seq, event_id)
+            SELECT NEW.timestamp, NEW.emp_id,
+                   (SELECT id FROM status_dict WHERE name = NEW.status),
+                   NEW.response, NEW.remark, NEW.client_id, NEW.client_seq, NEW.event_id
+            WHERE NEW.client_seq IS NULL
+               OR NEW.client_seq > COALESCE((SELECT acked_seq FROM client_cursor WHERE client_id = NEW.client_id), 0);
+            INSERT OR IGNORE INTO client_cursor (client_id, acked_seq)
+            SELECT NEW.client_id, NEW.client_seq WHERE NEW.client_seq IS NOT NULL;
+            UPDATE client_cursor SET acked_seq = MAX(acked_seq, NEW.client_seq)
+            WHERE NEW.client_seq IS NOT NULL AND client_id = NEW.client_id;
+        END
+    ''')
+
+
+def _activity_v14_expected_on_open(conn: sqlite3.Connection):
+    _create_interval_open_trigger(conn, "activity_log", "NEW.emp_id")
+    _backfill_opening_expected(conn, "activity_log", "emp_id")
+
+
+def _activity_v15_single_interval_trigger(conn: sqlite3.Connection):
+    _create_interval_open_trigger(conn, "activity_log", "NEW.emp_id")
+
+
+ACTIVITY_LOG_MIGRATIONS: list[Migration] = [
+    _activity_v1_typed_table,
+    _activity_v2_indexes,
+    _activity_v3_events_view,
+    _activity_v4_status_intervals,
+    _activity_v5_daily_rollups,
+    _activity_v6_client_sequence,
+    _activity_v7_outbox,
+    _activity_v8_timestamp_index,
+    _activity_v9_window_intervals,
+    _activity_v10_app_usage,
+    _activity_v11_metrics_snapshots,
+    _activity_v12_client_cursor,
+    _activity_v13_event_id,
+    _activity_v14_expected_on_open,
+    _activity_v15_single_interval_trigger,
+]
+
+# Shared by every front-end that logs activity rows (params: epoch, emp_id, status, response, remark, event_id)
+ACTIVITY_EVENT_INSERT_SQL = '''
+    INSERT INTO activity_events (timestamp, emp_id, status, response, remark, event_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Central ingestion: duplicates of an already stored (client_id, client_seq) or event_id are skipped
+INGEST_EVENT_INSERT_SQL = '''
+    INSERT OR IGNORE INTO activity_events (timestamp, emp_id, status, response, remark, client_id, client_seq, event_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def new_event_id() -> int:
+    """Id for a new activity event: 63 random bits, so trackers need no coordination to stay unique."""
+    return random.getrandbits(63)
+
+# Foreground-window runs (params: emp_id, app, title, start_ts, end_ts, samples); re-inserting a run updates it
+WINDOW_INTERVAL_INSERT_SQL = '''
+    INSERT INTO window_events (emp_id, app, title, start_ts, end_ts, samples)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Metrics registry snapshots (params: epoch, emp_id, metrics JSON)
+METRICS_SNAPSHOT_INSERT_SQL = "INSERT INTO metrics_snapshots (timestamp, emp_id, metrics) VALUES (?, ?, ?)"
+
+
+# --- responses.db (responses) Migrations ---
+RESPONSES_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS responses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL,
+        status_id INTEGER REFERENCES status_dict(id),
+        response TEXT,
+        remark TEXT
+    )
+'''
+
+
+def _responses_v1_typed_table(conn: sqlite3.Connection):
+    _create_status_dict(conn)
+    _retype_table(conn, "responses", RESPONSES_TABLE_SQL, ["response", "remark"])
+
+
+def _responses_v2_indexes(conn: sqlite3.Connection):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_ts ON responses (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_status_ts ON responses (status_id, timestamp)")
+
+
+def _responses_v3_events_view(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS response_events AS
+        SELECT r.id, r.timestamp, s.name AS status, r.response, r.remark
+        FROM responses r LEFT JOIN status_dict s ON s.id = r.status_id
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS response_events_insert
+        INSTEAD OF INSERT ON response_events
+        BEGIN
+            INSERT OR IGNORE INTO status_dict (name) VALUES (NEW.status);
+            INSERT INTO responses (timestamp, status_id, response, remark)
+            VALUES (NEW.timestamp, (SELECT id FROM status_dict WHERE name = NEW.status),
+                    NEW.response, NEW.remark);
+        END
+    ''')
+
+
+def _responses_v4_status_intervals(conn: sqlite3.Connection):
+    """Replaces the never-written legacy status_logs table with trigger-maintained intervals."""
+    if _table_columns(conn, "status_logs"):
+        if conn.execute("SELECT COUNT(*) FROM status_logs").fetchone()[0]:
+            conn.execute("ALTER TABLE status_logs RENAME TO status_logs_legacy")
+        else:
+            conn.execute("DROP TABLE status_logs")
+    _create_status_intervals(conn, "responses", "NULL")
+
+
+def _responses_v5_daily_rollups(conn: sqlite3.Connection):
+    _create_daily_rollups(conn)
+
+
+def _responses_v6_expected_on_open(conn: sqlite3.Connection):
+    _create_interval_open_trigger(conn, "responses", "NULL")
+    _backfill_opening_expected(conn, "responses", "NULL")
+
+
+def _responses_v7_single_interval_trigger(conn: sqlite3.Connection):
+    _create_interval_open_trigger(conn, "responses", "NULL")
+
+
+RESPONSES_MIGRATIONS: list[Migration] = [
+    _responses_v1_typed_table,
+    _responses_v2_indexes,
+    _responses_v3_events_view,
+    _responses_v4_status_intervals,
+    _responses_v5_daily_rollups,
+    _responses_v6_expected_on_open,
+    _responses_v7_single_interval_trigger,
+]
+
+
+# --- Bulk Loads ---
+def rebuild_activity_history(conn: sqlite3.Connection, ranges: dict):
+    """Re-derives intervals and daily totals around bulk-loaded rows; `ranges` maps emp_id to (min_ts, max_ts).
+
+    For bulk loads that bypass the triggers (see legacy_import.py). Per employee only the stretch
+    from the interval holding min_ts up to the next interval after max_ts (or the open interval)
+    is rebuilt; everything outside it, including totals of rows already rotated into archive
+    partitions, is kept. Inside the stretch, intervals whose rows were archived still contribute
+    their start, and the last rebuilt interval is closed there, so imported history never
+    becomes the open interval.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS rebuild_ranges (emp_id TEXT UNIQUE, min_ts INTEGER, max_ts INTEGER, "
+                 "lo INTEGER, hi INTEGER, close_ts INTEGER)")
+    conn.execute("DELETE FROM temp.rebuild_ranges")
+    conn.executemany("INSERT INTO temp.rebuild_ranges (emp_id, min_ts, max_ts) VALUES (?, ?, ?)",
+                     [(emp_id, min_ts, max_ts) for emp_id, (min_ts, max_ts) in ranges.items()])
+    conn.execute('''
+        UPDATE temp.rebuild_ranges SET
+            lo = COALESCE((SELECT MAX(start_ts) FROM status_intervals s
+                           WHERE s.emp_id IS rebuild_ranges.emp_id AND s.start_ts <= rebuild_ranges.min_ts), min_ts),
+            hi = (SELECT MIN(start_ts) FROM status_intervals s
+                  WHERE s.emp_id IS rebuild_ranges.emp_id AND (s.start_ts > rebuild_ranges.max_ts OR s.end_ts IS NULL))
+    ''')
+    conn.execute('''
+        UPDATE temp.rebuild_ranges SET close_ts = COALESCE(hi, MAX(max_ts, COALESCE(
+            (SELECT MAX(end_ts) FROM status_intervals s WHERE s.emp_id IS rebuild_ranges.emp_id AND s.start_ts >= lo), 0)))
+    ''')
+    in_range = ("EXISTS (SELECT 1 FROM temp.rebuild_ranges r WHERE r.emp_id IS {table}.emp_id AND r.lo < COALESCE(r.hi, r.lo + 1)"
+                " AND {table}.{column} >= r.lo AND (r.hi IS NULL OR {table}.{column} < r.hi))")
+    intervals_in_range = in_range.format(table="status_intervals", column="start_ts")
+    windows_in_range = ("EXISTS (SELECT 1 FROM temp.rebuild_ranges r WHERE r.emp_id = w.emp_id AND r.lo < COALESCE(r.hi, r.lo + 1)"
+                        " AND w.end_ts > r.lo AND (r.hi IS NULL OR w.start_ts < r.hi))")
+
+    # Take the old intervals' share out of the totals, then replace the intervals
+    _backfill_daily_rollups(conn, f"(SELECT * FROM status_intervals WHERE {intervals_in_range})", sign=-1)
+    _backfill_app_usage(conn, windows_in_range, sign=-1)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS rebuild_archived (emp_id TEXT, status_id INTEGER, timestamp INTEGER, "
+                 "expected_seconds INTEGER)")
+    conn.execute("DELETE FROM temp.rebuild_archived")
+    conn.execute(f'''
+        INSERT INTO temp.rebuild_archived
+        SELECT emp_id, status_id, start_ts, expected_seconds FROM status_intervals si
+        WHERE {in_range.format(table="si", column="start_ts")} AND NOT EXISTS (
+            SELECT 1 FROM activity_log a WHERE a.emp_id IS si.emp_id AND a.timestamp = si.start_ts AND a.status_id = si.status_id)
+    ''')
+    conn.execute("DELETE FROM status_intervals WHERE " + intervals_in_range)
+    points = '''(
+        SELECT emp_id, status_id, timestamp, id, remark FROM activity_log
+        UNION ALL
+        SELECT emp_id, status_id, timestamp, 0, 'Started for ' || (expected_seconds / 60) || ' minutes.'
+        FROM temp.rebuild_archived) AS points'''
+    _backfill_status_intervals(conn, points, "emp_id", in_range.format(table="points", column="timestamp"))
+    conn.execute(f'''
+        UPDATE status_intervals
+        SET end_ts = (SELECT r.close_ts FROM temp.rebuild_ranges r WHERE r.emp_id IS status_intervals.emp_id),
+            duration_seconds = (SELECT r.close_ts FROM temp.rebuild_ranges r WHERE r.emp_id IS status_intervals.emp_id) - start_ts
+        WHERE end_ts IS NULL AND {intervals_in_range}
+    ''')
+
+    _backfill_daily_rollups(conn, f"(SELECT * FROM status_intervals WHERE {intervals_in_range})")
+    _backfill_app_usage(conn, windows_in_range)
+    conn.execute("DELETE FROM daily_status_totals WHERE intervals <= 0 AND emp_id IN "
+                 "(SELECT COALESCE(emp_id, '') FROM temp.rebuild_ranges)")
+    conn.execute("DELETE FROM daily_app_totals WHERE seconds <= 0 AND emp_id IN (SELECT emp_id FROM temp.rebuild_ranges)")
+
+
+# --- Migration Runner ---
+def migrate(conn: sqlite3.Connection, migrations: list[Migration]) -> int:
+    """Applies every migration above the file's PRAGMA user_version, each in its own transaction."""
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # Manage transactions explicitly so DDL and user_version commit together
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, step in enumerate(migrations[version:], start=version + 1):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            version = target
+        return version
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+def migrate_file(db_file: str, migrations: list[Migration]) -> int:
+    """Opens the database file, upgrades it in place and returns the resulting schema version."""
+    conn = sqlite3.connect(db_file)
+    try:
+        return migrate(conn, migrations)
+    finally:
+        conn.close()
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+from typing import Optional
+
+# --- Constants ---
+TIMED_STATUSES = ("Break", "Lunch", "Meeting", "Personal")
+
+SESSION_FIELDS = (
+    "status",                  # Current status name ("Working", "Break", "Idle", ...)
+    "last_response_time",      # Start of the current work interval / status
+    "interval_seconds",        # User-selected prompt interval
+    "work_remaining_seconds",  # Remaining prompt time saved when Working was paused (0 = use full interval)
+    "timed_status_end_time",   # End of the active Break/Lunch/Meeting/Personal (for countdown)
+    "off_work_start_time",     # Start of Off work (for the 8h limit)
+    "break_exceeded",          # Exceeded/Idle state: a reason is mandatory on return to work
+    "idle_check",              # Idle caution has been shown and is awaiting activity
+    "break_check_start_time",  # When the exceeded state began
+    "last_exceed_log_time",    # Last "STILL Exceeded" log
+)
+
+
+class SessionSnapshot:
+    """Read-only, mutually consistent copy of the session taken under the state lock."""
+    __slots__ = SESSION_FIELDS
+
+    def __init__(self, values: dict):
+        for name in SESSION_FIELDS:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SessionSnapshot is read-only; use SessionState.transition()")
+
+    def __repr__(self) -> str:
+        return "SessionSnapshot(" + ", ".join(f"{n}={getattr(self, n)!r}" for n in SESSION_FIELDS) + ")"
+
+
+class SessionState:
+    """Single owner of the tracker's mutable session state, shared by the Tk thread and the timers.
+
+    Single attribute reads are atomic; anything that reads several fields should take a
+    snapshot(), and anything that changes state goes through transition() so readers
+    never observe a half-applied change.
+    """
+    __slots__ = SESSION_FIELDS + ("_lock",)
+
+    def __init__(self, now: Optional[datetime] = None, interval_seconds: int = 0):
+        self._lock = threading.Lock()
+        self.status = "Working"
+        self.last_response_time = now or datetime.now()
+        self.interval_seconds = interval_seconds
+        self.work_remaining_seconds = 0
+        self.timed_status_end_time = None
+        self.off_work_start_time = None
+        self.break_exceeded = False
+        self.idle_check = False
+        self.break_check_start_time = None
+        self.last_exceed_log_time = None
+
+    def snapshot(self) -> SessionSnapshot:
+        with self._lock:
+            return SessionSnapshot({name: getattr(self, name) for name in SESSION_FIELDS})
+
+    def transition(self, expect_status: Optional[str] = None, **changes) -> Optional[SessionSnapshot]:
+        """Atomically applies `changes` and returns the resulting snapshot.
+
+        If `expect_status` is given and the status has moved on in the meantime, nothing is
+        changed and None is returned (compare-and-set, so two monitors cannot both act).
+        """
+        unknown = set(changes) - set(SESSION_FIELDS)
+        if unknown:
+            raise AttributeError(f"Unknown session field(s): {', '.join(sorted(unknown))}")
+        with self._lock:
+            if expect_status is not None and self.status != expect_status:
+                return None
+            for name, value in changes.items():
+                setattr(self, name, value)
+            return SessionSnapshot({name: getattr(self, name) for name in SESSION_FIELDS})
+
+
+# --- Pure Timer Math ---
+def remaining_seconds(snapshot: SessionSnapshot, now: datetime) -> Optional[int]:
+    """Seconds until the current deadline, computed once per tick from a snapshot.
+
+    Working: until the next prompt (<= 0 means the prompt is due).
+    Timed statuses: until the status ends (negative = exceeded by that much).
+    Anything else: None.
+    """
+    if snapshot.status == "Working" and not snapshot.break_exceeded:
+        base = snapshot.work_remaining_seconds if snapshot.work_remaining_seconds > 0 else snapshot.interval_seconds
+        return base - int((now - snapshot.last_response_time).total_seconds())
+    if snapshot.status in TIMED_STATUSES and snapshot.timed_status_end_time:
+        return int((snapshot.timed_status_end_time - now).total_seconds())
+    return None
+
+
+def format_hms(total_seconds: int) -> str:
+    hours, remainder = divmod(max(0, total_seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_ms(total_seconds: int) -> str:
+    minutes, seconds = divmod(max(0, total_seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+# --- Constants ---
+APP_MODULE = "prototype2"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+WINDOW_TIMEOUT_SECONDS = 30.0
+MAX_STARTUP_MS = None  # e.g. 500 to make --check fail above half a second to the login window
+
+# Runs the real main() in a child process and reports when the login window is mapped and the DB is ready
+DRIVER = '''
+import os, sys, time
+sys.path.insert(0, {app_dir!r})
+import {module} as app
+
+seen = set()
+
+def mark(name):
+    if name not in seen:
+        seen.add(name)
+        print(name, repr(time.time()), flush=True)
+    if {{"first_window", "db_ready"}} <= seen:
+        app.LOG_WRITER.close()
+        os._exit(0)  # Either mark may come last, and db_ready arrives on init_db's thread
+
+original_login = app.LoginApp.__init__
+def login_init(self, master):
+    original_login(self, master)
+    master.bind("<Map>", lambda event: mark("first_window"), add="+")
+app.LoginApp.__init__ = login_init
+
+original_init_db = app.init_db
+def init_db():
+    original_init_db()
+    mark("db_ready")
+app.init_db = init_db
+
+mark("imported")
+app.main()
+'''
+
+
+# --- Import Breakdown ---
+def import_breakdown(module: str = APP_MODULE, top: int = 15) -> dict:
+    """`python -X importtime` for one module: total, heaviest direct imports and heaviest single modules (ms)."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=APP_DIR, capture_output=True, text=True)
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, len(indent) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    if completed.returncode != 0 or not rows:
+        raise RuntimeError(f"importing {module} failed: {completed.stderr.strip().splitlines()[-1:]}")
+    total = next(cumulative for name, depth, _, cumulative in rows if name == module and depth == 0)
+    direct = sorted(((name, cumulative) for name, depth, _, cumulative in rows if depth == 1),
+                    key=lambda row: -row[1])
+    heaviest = sorted(((name, self_ms) for name, _, self_ms, _ in rows), key=lambda row: -row[1])
+    return {"module": module, "total_ms": round(total, 1),
+            "direct_ms": [(name, round(ms, 1)) for name, ms in direct[:top]],
+            "self_ms": [(name, round(ms, 1)) for name, ms in heaviest[:top]]}
+
+
+# --- Time To First Window ---
+def _interpreter_ms() -> float:
+    started = time.time()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.time() - started) * 1000
+
+
+def time_to_first_window(module: str = APP_MODULE) -> dict:
+    """Launches the tracker once in a scratch directory (fresh DB) and times it from process spawn."""
+    with tempfile.TemporaryDirectory() as tmp:
+        script = DRIVER.format(app_dir=APP_DIR, module=module)
+        started = time.time()
+        try:
+            completed = subprocess.run([sys.executable, "-c", script], cwd=tmp, capture_output=True, text=True,
+                                       timeout=WINDOW_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"no window within {WINDOW_TIMEOUT_SECONDS}s")
+    marks = {}
+    for line in completed.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in ("imported", "first_window", "db_ready"):
+            marks[parts[0]] = round((float(parts[1]) - started) * 1000, 1)
+    if "first_window" not in marks:
+        raise RuntimeError((completed.stderr.strip().splitlines() or ["window was never mapped"])[-1])
+    return {f"{name}_ms": ms for name, ms in marks.items()}
+
+
+def run_benchmark(runs: int = 5, top: int = 15) -> dict:
+    result: dict = {"python_startup_ms": round(min(_interpreter_ms() for _ in range(3)), 1)}
+    result["imports"] = import_breakdown(APP_MODULE, top)
+    windows: list[dict] = []
+    error: Optional[str] = None
+    for _ in range(runs):
+        try:
+            windows.append(time_to_first_window())
+        except RuntimeError as e:
+            error = str(e)
+            break
+    if windows:
+        for key in windows[0]:
+            values = sorted(window[key] for window in windows if key in window)
+            result[key] = {"min": values[0], "median": values[len(values) // 2], "max": values[-1]}
+    else:
+        result["window_error"] = error  # e.g. no display on a CI box: only the import breakdown is meaningful
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tracker cold start: import cost and time to the first window.")
+    parser.add_argument("--runs", type=int, default=5, help="Launches to time (the first one is usually the coldest)")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list in the import breakdown")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--max-ms", type=float, default=MAX_STARTUP_MS,
+                        help="Exit with status 1 if the median time to the login window exceeds this")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs, args.top)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        imports = result["imports"]
+        print(f"⏱️ import {imports['module']}: {imports['total_ms']}ms (bare interpreter {result['python_startup_ms']}ms)")
+        print("  Direct imports (cumulative):")
+        for name, ms in imports["direct_ms"]:
+            print(f"    {name:<32} {ms:>8.1f}ms")
+        print("  Heaviest modules (self):")
+        for name, ms in imports["self_ms"]:
+            print(f"    {name:<32} {ms:>8.1f}ms")
+        if "window_error" in result:
+            print(f"⚠️ Warning: could not time the window: {result['window_error']}")
+        for key in ("imported_ms", "first_window_ms", "db_ready_ms"):
+            if key in result:
+                stats = result[key]
+                print(f"  {key:<24} min {stats['min']}ms  median {stats['median']}ms  max {stats['max']}ms")
+
+    first_window = result.get("first_window_ms")
+    if args.max_ms is not None and first_window and first_window["median"] > args.max_ms:
+        print(f"⚠️ median time to first window {first_window['median']}ms exceeds {args.max_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
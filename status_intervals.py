@@ -0,0 +1,81 @@
+import sqlite3
+import time
+from typing import Optional
+
+# --- Statements (run through the batched writer, in order with the event rows) ---
+CLOSE_OPEN_INTERVAL_SQL = '''
+    UPDATE status_intervals
+    SET end_ts = MAX(?, start_ts), duration_seconds = MAX(?, start_ts) - start_ts
+    WHERE emp_id IS ? AND end_ts IS NULL
+'''
+
+OPEN_INTERVAL_SQL = '''
+    INSERT INTO status_intervals (emp_id, status_id, start_ts)
+    VALUES (?, (SELECT id FROM status_dict WHERE name = ?), ?)
+'''
+
+
+def recovery_statements(emp_id: Optional[str], last_seen_ts: int, status: str = "Idle") -> list[tuple[str, tuple]]:
+    """After a crash: end the interval that was open at the last logged event and account the gap as `status`."""
+    return [
+        (CLOSE_OPEN_INTERVAL_SQL, (last_seen_ts, last_seen_ts, emp_id)),
+        (OPEN_INTERVAL_SQL, (emp_id, status, last_seen_ts)),
+    ]
+
+
+# --- Reports ---
+def status_durations(conn: sqlite3.Connection, emp_id: Optional[str], start_ts: int, end_ts: int,
+                     now_ts: Optional[int] = None) -> dict[str, int]:
+    """Seconds per status for one employee within [start_ts, end_ts).
+
+    Intervals are clipped to the window; the open interval counts up to `now_ts`. Closed
+    intervals come from an index range on (emp_id, end_ts), the open one from a partial index.
+    """
+    now_ts = int(time.time()) if now_ts is None else now_ts
+    rows = conn.execute('''
+        SELECT s.name, SUM(MIN(COALESCE(i.end_ts, :now), :end) - MAX(i.start_ts, :start))
+        FROM (
+            SELECT status_id, start_ts, end_ts FROM status_intervals
+            WHERE emp_id IS :emp AND end_ts > :start AND start_ts < :end
+            UNION ALL
+            SELECT status_id, start_ts, end_ts FROM status_intervals
+            WHERE emp_id IS :emp AND end_ts IS NULL AND start_ts < :end AND :now > :start
+        ) i JOIN status_dict s ON s.id = i.status_id
+        GROUP BY s.name
+    ''', {"emp": emp_id, "start": start_ts, "end": end_ts, "now": now_ts}).fetchall()
+    return {name: int(seconds) for name, seconds in rows if seconds and seconds > 0}
+
+
+def open_interval(conn: sqlite3.Connection, emp_id: Optional[str]) -> Optional[tuple[str, int]]:
+    """(status, start_ts) of the employee's current interval, if any."""
+    return conn.execute('''
+        SELECT s.name, i.start_ts FROM status_intervals i JOIN status_dict s ON s.id = i.status_id
+        WHERE i.emp_id IS ? AND i.end_ts IS NULL
+    ''', (emp_id,)).fetchone()
+
+
+def timeline(conn: sqlite3.Connection, emp_id: Optional[str], start_ts: int, end_ts: int) -> list[tuple]:
+    """(status, start_ts, end_ts, expected_seconds) intervals overlapping [start_ts, end_ts), oldest first.
+
+    The open interval comes last with end_ts None. Same index paths as status_durations.
+    """
+    return conn.execute('''
+        SELECT s.name, i.start_ts, i.end_ts, i.expected_seconds FROM (
+            SELECT status_id, start_ts, end_ts, expected_seconds FROM status_intervals
+            WHERE emp_id IS :emp AND end_ts > :start AND start_ts < :end
+            UNION ALL
+            SELECT status_id, start_ts, end_ts, expected_seconds FROM status_intervals
+            WHERE emp_id IS :emp AND end_ts IS NULL AND start_ts < :end
+        ) i JOIN status_dict s ON s.id = i.status_id
+        ORDER BY i.start_ts
+    ''', {"emp": emp_id, "start": start_ts, "end": end_ts}).fetchall()
+
+
+def current_statuses(conn: sqlite3.Connection) -> list[tuple]:
+    """(emp_id, status, since_ts, expected_seconds) for every employee, from the open-interval partial index."""
+    return conn.execute('''
+        SELECT i.emp_id, s.name, i.start_ts, i.expected_seconds
+        FROM status_intervals i JOIN status_dict s ON s.id = i.status_id
+        WHERE i.end_ts IS NULL
+        ORDER BY i.emp_id
+    ''').fetchall()
@@ -0,0 +1,117 @@
+from typing import Iterable, Optional
+
+# --- Constants ---
+EXCEEDED = "Exceeded"  # Pseudo-state: a timed status ran over (or Idle was forced) and needs a reason
+DEFAULT_BREAK_MINUTES = 15
+DEFAULT_LUNCH_MINUTES = 30
+
+
+class StatusSpec:
+    """Static description of one status: how it is shown and what selecting it implies."""
+    __slots__ = ("name", "display_text", "color", "selectable", "response_required",
+                 "warn_without_response", "timed", "ask_duration", "stops_prompts", "ends_session")
+
+    def __init__(self, name: str, display_text: str, color: str, selectable: bool = True,
+                 response_required: bool = False, warn_without_response: bool = False,
+                 timed: bool = False, ask_duration: bool = False,
+                 stops_prompts: bool = False, ends_session: bool = False):
+        self.name = name
+        self.display_text = display_text
+        self.color = color
+        self.selectable = selectable
+        self.response_required = response_required          # Task text is mandatory
+        self.warn_without_response = warn_without_response  # Empty reason allowed after a Manager/HR warning
+        self.timed = timed                                  # Runs a countdown and can be exceeded
+        self.ask_duration = ask_duration                    # Duration is asked from the user
+        self.stops_prompts = stops_prompts                  # No prompts or idle checks (Off work)
+        self.ends_session = ends_session                    # Program shuts down (Offline)
+
+
+STATUS_SPECS: dict[str, StatusSpec] = {spec.name: spec for spec in [
+    StatusSpec("Working", "On Work", "green", response_required=True),
+    StatusSpec("Break", "On Break", "red", timed=True),
+    StatusSpec("Lunch", "On Lunch", "red", timed=True),
+    StatusSpec("Meeting", "In Meeting", "orange", warn_without_response=True, timed=True, ask_duration=True),
+    StatusSpec("Personal", "On Personal Time", "orange", warn_without_response=True, timed=True, ask_duration=True),
+    StatusSpec("Offline", "Offline", "blue", ends_session=True),
+    StatusSpec("Off work", "Off Work (Tracking 8h Limit)", "darkgreen", stops_prompts=True),
+    StatusSpec("Idle", "Idle (No Activity)", "red", selectable=False),
+]}
+
+# Statuses whose label turns red while the exceeded flag is set
+EXCEEDED_RED_STATUSES = ("Break", "Lunch", "Personal", "Meeting", "Working", "Idle")
+
+
+class Transition:
+    """Everything a front-end needs to know to move from one state to a selected status."""
+    __slots__ = ("source", "target", "spec", "allowed", "exceed_reason_required", "pause_work_clock",
+                 "reset_work_clock", "restart_full_interval", "duration_minutes")
+
+    def __init__(self, source: str, target: str, spec: Optional[StatusSpec], allowed: bool,
+                 exceed_reason_required: bool = False, pause_work_clock: bool = False,
+                 reset_work_clock: bool = True, restart_full_interval: bool = False,
+                 duration_minutes: int = 0):
+        self.source = source
+        self.target = target
+        self.spec = spec
+        self.allowed = allowed
+        self.exceed_reason_required = exceed_reason_required  # Leaving Exceeded/Idle for Working needs a reason
+        self.pause_work_clock = pause_work_clock              # Save the remaining prompt time instead of resetting
+        self.reset_work_clock = reset_work_clock              # Restart last_response_time at the transition
+        self.restart_full_interval = restart_full_interval    # Remaining prompt time goes back to the full interval
+        self.duration_minutes = duration_minutes              # Fixed timer length (0 = none or asked)
+
+
+class StatusMachine:
+    """Precomputes the display table and every (state, selected status) transition once.
+
+    States are the status names plus EXCEEDED; a session is in EXCEEDED when its exceeded
+    flag is set on anything but Idle. Per-tick display and per-click decisions are dict lookups.
+    """
+
+    def __init__(self, statuses: Iterable[str],
+                 break_minutes: int = DEFAULT_BREAK_MINUTES,
+                 lunch_minutes: int = DEFAULT_LUNCH_MINUTES):
+        self.statuses = [s for s in statuses if s in STATUS_SPECS]
+        self.durations = {"Break": break_minutes, "Lunch": lunch_minutes}
+        states = list(dict.fromkeys(self.statuses + ["Idle", EXCEEDED]))
+
+        self.display: dict[tuple[str, bool], tuple[str, str]] = {}
+        for name, spec in STATUS_SPECS.items():
+            self.display[(name, False)] = (spec.display_text, spec.color)
+            self.display[(name, True)] = (spec.display_text, "red" if name in EXCEEDED_RED_STATUSES else spec.color)
+
+        self.transitions: dict[tuple[str, str], Transition] = {}
+        for source in states:
+            for target in self.statuses:
+                self.transitions[(source, target)] = self._build(source, target)
+
+    def _build(self, source: str, target: str) -> Transition:
+        spec = STATUS_SPECS[target]
+        if source == "Offline" or not spec.selectable:
+            return Transition(source, target, spec, allowed=False)
+
+        leaving_exceeded = source in (EXCEEDED, "Idle")
+        if target == "Working" and leaving_exceeded:
+            return Transition(source, target, spec, allowed=True, exceed_reason_required=True,
+                              restart_full_interval=True)
+        if source == "Working" and target != "Working":
+            return Transition(source, target, spec, allowed=True, pause_work_clock=True, reset_work_clock=False,
+                              duration_minutes=self.durations.get(target, 0))
+        return Transition(source, target, spec, allowed=True,
+                          duration_minutes=self.durations.get(target, 0))
+
+    # --- Lookups ---
+    def state_of(self, status: str, exceeded: bool) -> str:
+        return EXCEEDED if exceeded and status != "Idle" else status
+
+    def transition(self, status: str, exceeded: bool, target: str) -> Transition:
+        found = self.transitions.get((self.state_of(status, exceeded), target))
+        return found if found is not None else Transition(status, target, STATUS_SPECS.get(target), allowed=False)
+
+    def display_for(self, status: str, exceeded: bool) -> tuple[str, str]:
+        return self.display.get((status, exceeded), (status, "black"))
+
+    def is_timed(self, status: str) -> bool:
+        spec = STATUS_SPECS.get(status)
+        return bool(spec and spec.timed)
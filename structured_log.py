@@ -0,0 +1,160 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+from datetime import date, datetime
+from typing import Optional
+
+from metrics import REGISTRY
+
+# --- Constants ---
+LOG_FILE = "wfm_tracker.jsonl"    # One JSON object per line; replaces the pipe-delimited wfm_activity_log.txt
+LOG_LEVEL = "INFO"                # File level; DEBUG adds per-tick detail such as skipped popups
+CONSOLE_LOG_LEVEL = "INFO"        # Console level (the console is skipped when there is no stdout, e.g. pythonw)
+LOG_MAX_BYTES = 5 * 1024 * 1024   # Roll over at 5 MB...
+LOG_BACKUP_COUNT = 14             # ...or at the first record of a new day; older .gz backups are deleted
+LOG_QUEUE_SIZE = 10000            # Records waiting for the writer thread; beyond this they are dropped and counted
+CONSOLE_PREFIXES = {logging.WARNING: "⚠️ Warning: ", logging.ERROR: "❌ Error: ", logging.CRITICAL: "❌ Error: "}
+
+_pipeline: list[Optional[tuple[logging.Handler, logging.handlers.QueueListener]]] = [None]  # (queue handler, listener)
+
+
+# --- Formatters ---
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, thread, msg, then `event` and its `fields`.
+
+    Call sites attach data with extra={"event": "activity", "fields": {...}}; newlines inside
+    values are escaped, so a multi-line remark stays one parseable line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry["event"] = event
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The familiar console lines: `[time] ` plus a warning/error prefix, then the message."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
+        text = f"[{stamp}] {CONSOLE_PREFIXES.get(record.levelno, '')}{record.getMessage()}"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+# --- Handlers ---
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rolls over by size or when the local day changes; backups are gzipped (`<file>.1.gz` is the newest)."""
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.namer = lambda name: name + ".gz"
+        self.rotator = _gzip_rotate
+        self._day = date.fromtimestamp(os.path.getmtime(filename)) if os.path.exists(filename) else date.today()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        day = date.fromtimestamp(record.created)
+        if day != self._day:
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+            self._day = day  # Nothing written yet: start the day in the same file
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self._day = date.today()
+
+
+def _gzip_rotate(source: str, dest: str):
+    with open(source, "rb") as raw, gzip.open(dest, "wb") as packed:
+        shutil.copyfileobj(raw, packed)
+    os.remove(source)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without ever waiting; a full queue drops the record and counts it."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = REGISTRY.counter("wfm_log_records_dropped_total", "Log records dropped on a full log queue")
+        REGISTRY.gauge("wfm_log_queue_depth", "Log records waiting for the log writer thread", fn=log_queue.qsize)
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+
+
+# --- Setup ---
+def setup_logging(log_file: Optional[str] = LOG_FILE, level: str = LOG_LEVEL, console_level: Optional[str] = CONSOLE_LOG_LEVEL,
+                  max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT) -> logging.handlers.QueueListener:
+    """Routes every logger through one bounded queue to a JSON-lines file and the console.
+
+    Tracker threads only format the message and enqueue it. File writes, rotation, compression
+    and console output all happen on the listener thread, so a slow disk or a console whose
+    output is blocked or redirected stalls at most that thread (and then drops records), never
+    the timers, monitors or the UI. Safe to call again; the previous pipeline is stopped first.
+    """
+    stop_logging()
+    handlers: list[logging.Handler] = []
+    if log_file:
+        try:
+            file_handler = CompressedRotatingFileHandler(log_file, max_bytes, backup_count)
+            file_handler.setLevel(level)
+            file_handler.setFormatter(JsonLineFormatter())
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not open log file {log_file} ({e}); logging to the console only.")
+    if console_level and sys.stdout is not None:
+        console = logging.StreamHandler(sys.stdout)
+        console.setLevel(console_level)
+        console.setFormatter(ConsoleFormatter())
+        handlers.append(console)
+
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(min((handler.level for handler in handlers), default=logging.WARNING))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _pipeline[0] = (queue_handler, listener)
+    atexit.register(stop_logging)
+    return listener
+
+
+def stop_logging():
+    """Writes out queued records and closes the log file. Safe to call more than once.
+
+    Later records fall back to logging's default (warnings and errors on stderr).
+    """
+    pipeline, _pipeline[0] = _pipeline[0], None
+    if pipeline is None:
+        return
+    queue_handler, listener = pipeline
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from change_stream import StatusBoard
+from tracker_core import SimulatedClock, TrackerCore
+
+
+def record_events(core_events: list):
+    def log(response, status, remark="", log_time=None):
+        core_events.append((int(log_time.timestamp()), status, remark))
+    return log
+
+
+def test_timed_status_gets_expected_length_from_following_row():
+    # The tracker logs the switch to Break first and "Started for N minutes." as a second Break row
+    events: list = []
+    clock = SimulatedClock(datetime(2026, 3, 2, 9, 0, 0))
+    core = TrackerCore(record_events(events), clock=clock, interval_minutes=30, break_minutes=15)
+    core.start(run_thread=False)
+    core.begin_session()
+    assert core.submit("Working", "tickets")
+    core.advance(600)
+    assert core.submit("Break", "coffee")
+    assert [(status, remark.split(".")[0]) for _, status, remark in events[-2:]] == [
+        ("Break", "Work interval paused"), ("Break", "Started for 15 minutes")]
+
+    board = StatusBoard()
+    subscription = board.subscribe()
+    for ts, status, remark in events:
+        board.apply("E1", status, ts, remark)
+
+    state = board.snapshot()["E1"]
+    assert state["status"] == "Break"
+    assert state["since"] == int(clock.start.timestamp()) + 600
+    assert state["expected_seconds"] == 15 * 60
+    assert board.transitions == 2
+    assert subscription.next_frame(timeout=0)["E1"]["expected_seconds"] == 15 * 60
+
+
+def test_same_status_row_without_expected_length_is_not_published():
+    board = StatusBoard()
+    assert board.apply("E1", "Break", 100, "Started for 15 minutes.")
+    assert not board.apply("E1", "Break", 160, "STILL exceeded")
+    assert not board.apply("E1", "Break", 170, "Started for 15 minutes.")
+    assert board.snapshot()["E1"] == {"status": "Break", "since": 100, "ts": 170, "expected_seconds": 900}
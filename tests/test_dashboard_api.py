@@ -0,0 +1,65 @@
+import json
+import sqlite3
+import urllib.request
+from datetime import datetime, timedelta
+
+import pytest
+
+from dashboard_api import DashboardAPI
+from retention import HISTORY_MAX_PARTITIONS, list_partitions, rotate
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+DAYS = 12
+ROWS_PER_DAY = 3
+
+
+@pytest.fixture
+def api(tmp_path):
+    db_file, archive_dir = str(tmp_path / "central.db"), str(tmp_path / "archive")
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    first_day = datetime(2026, 3, 2)
+    conn = sqlite3.connect(db_file)
+    for day in range(DAYS + 1):  # The last day stays in the live file
+        for hour in range(ROWS_PER_DAY):
+            ts = int((first_day + timedelta(days=day, hours=9 + hour)).timestamp())
+            conn.execute(ACTIVITY_EVENT_INSERT_SQL, (ts, "E1", "Working", f"task {day}.{hour}", "", None))
+    conn.commit()
+    conn.close()
+    rotate(db_file, ACTIVITY_LOG_MIGRATIONS, {"activity_log": "timestamp"}, archive_dir=archive_dir,
+           now=first_day + timedelta(days=DAYS, hours=12))
+    assert len(list_partitions(db_file, archive_dir)) == DAYS > HISTORY_MAX_PARTITIONS
+
+    api = DashboardAPI(db_file, port=0, archive_dir=archive_dir)
+    api.start()
+    yield api
+    api.stop()
+
+
+def get(api: DashboardAPI, path: str) -> bytes:
+    host, port = api.address
+    with urllib.request.urlopen(f"http://{host}:{port}{path}") as response:
+        return response.read()
+
+
+def page_through(api: DashboardAPI, query: str) -> list[int]:
+    timestamps, after = [], None
+    while True:
+        page = json.loads(get(api, f"/v1/events?limit=5{query}" + (f"&after={after}" if after else "")))
+        timestamps += [event["ts"] for event in page["events"]]
+        after = page["next"]
+        if after is None:
+            return timestamps
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_unfiltered_listing_pages_through_every_partition(api, order):
+    timestamps = page_through(api, f"&order={order}")
+    assert len(timestamps) == (DAYS + 1) * ROWS_PER_DAY
+    assert timestamps == sorted(timestamps, reverse=order == "desc")
+
+
+def test_stream_reads_every_partition(api):
+    lines = get(api, "/v1/events/stream").decode().splitlines()
+    timestamps = [json.loads(line)["ts"] for line in lines]
+    assert len(timestamps) == (DAYS + 1) * ROWS_PER_DAY
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,111 @@
+import sqlite3
+import time
+
+import pytest
+
+import db_writer
+from db_writer import BatchedWriter
+
+INSERT_SQL = "INSERT INTO events (id, name) VALUES (?, ?)"
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_writer, "WRITER_BUSY_TIMEOUT_MS", 20)
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    conn.close()
+    return path
+
+
+def stored(db_file: str) -> list[int]:
+    conn = sqlite3.connect(db_file)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM events ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def hold_write_lock(db_file: str, writer: BatchedWriter) -> sqlite3.Connection:
+    writer.start()
+    assert writer.flush()  # The writer has connected and configured its busy timeout
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_a_rejected_row_does_not_take_the_batch_down(db_file):
+    writer = BatchedWriter(db_file, flush_interval_ms=50)
+    for row in [(1, "a"), (2, None), (3, "c"), (1, "duplicate"), (4, "d")]:
+        assert writer.submit(INSERT_SQL, row)
+    assert writer.flush()
+    writer.close()
+    assert stored(db_file) == [1, 3, 4]
+    assert writer.failed == 2
+
+
+def test_locked_batch_is_retried_until_the_lock_clears(db_file):
+    writer = BatchedWriter(db_file, flush_interval_ms=10)
+    lock = hold_write_lock(db_file, writer)
+    writer.submit(INSERT_SQL, (1, "a"))
+    wait_until(lambda: writer.stalled)
+    assert writer.pending() == 1
+
+    lock.execute("ROLLBACK")
+    assert writer.flush()
+    writer.close()
+    assert stored(db_file) == [1]
+    assert writer.failed == 0 and not writer.stalled
+
+
+def test_locked_batch_is_given_up_after_the_retry_window(db_file, monkeypatch):
+    monkeypatch.setattr(db_writer, "WRITER_RETRY_SECONDS", 0.2)
+    writer = BatchedWriter(db_file, flush_interval_ms=10)
+    lock = hold_write_lock(db_file, writer)
+    writer.submit(INSERT_SQL, (1, "a"))
+    wait_until(lambda: writer.failed == 1)
+    assert not writer.stalled
+
+    lock.execute("ROLLBACK")
+    writer.submit(INSERT_SQL, (2, "b"))
+    assert writer.flush()
+    writer.close()
+    assert stored(db_file) == [2]
+
+
+def test_full_queue_drops_ui_rows_and_times_out_producers(db_file):
+    writer = BatchedWriter(db_file, flush_interval_ms=10, queue_size=1)
+    lock = hold_write_lock(db_file, writer)
+    assert writer.submit(INSERT_SQL, (1, "a"))
+    wait_until(lambda: writer.stalled)  # Row 1 is in the batch being retried
+    assert writer.submit(INSERT_SQL, (2, "b"))
+    assert not writer.submit(INSERT_SQL, (3, "c"))
+    assert not writer.submit(INSERT_SQL, (4, "d"), timeout=0.05)
+    assert writer.dropped == 2
+
+    lock.execute("ROLLBACK")
+    assert writer.flush()
+    writer.close()
+    assert stored(db_file) == [1, 2]
+
+
+def test_crashed_writer_refuses_new_rows(db_file):
+    writer = BatchedWriter(db_file, flush_interval_ms=10)
+
+    def broken_callback(latencies):
+        raise RuntimeError("callback failed")
+
+    writer.on_commit = broken_callback
+    assert writer.submit(INSERT_SQL, (1, "a"))
+    wait_until(lambda: writer.dead)
+    assert not writer.submit(INSERT_SQL, (2, "b"))
+    assert writer.dropped == 1
+    assert stored(db_file) == [1]
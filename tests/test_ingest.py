@@ -0,0 +1,100 @@
+import json
+import sqlite3
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ingest_client import INGEST_RETRY_MAX_DELAY, INGEST_UPLOAD_INTERVAL, IngestClient, IngestUnavailable, backoff_delay, post_batch
+from ingest_service import INGEST_PATH, IngestService
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = IngestService(str(tmp_path / "central.db"), port=0, archive_dir=str(tmp_path / "archive"))
+    service.start()
+    yield service
+    service.stop()
+
+
+def url(service: IngestService) -> str:
+    host, port = service.address
+    return f"http://{host}:{port}{INGEST_PATH}"
+
+
+def events(*seqs: int, emp_id: str = "E1") -> list[dict]:
+    return [{"seq": seq, "ts": 1000 + seq, "emp_id": emp_id, "status": "Working", "response": f"task {seq}",
+             "remark": "", "event_id": 500 + seq} for seq in seqs]
+
+
+def stored(service: IngestService) -> list[tuple]:
+    conn = sqlite3.connect(service.db_file)
+    try:
+        return conn.execute("SELECT client_id, client_seq, event_id FROM activity_log ORDER BY client_id, client_seq").fetchall()
+    finally:
+        conn.close()
+
+
+def post_raw(service: IngestService, body: bytes) -> int:
+    request = urllib.request.Request(url(service), data=body, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_replayed_batch_is_stored_once(service):
+    assert post_batch(url(service), "pc-1", events(1, 2, 3)) == 3
+    assert post_batch(url(service), "pc-1", events(1, 2, 3)) == 3
+    assert stored(service) == [("pc-1", 1, 501), ("pc-1", 2, 502), ("pc-1", 3, 503)]
+
+
+def test_out_of_order_batch_is_stored_in_full_and_old_seqs_are_dropped(service):
+    assert post_batch(url(service), "pc-1", events(3, 1, 2)) == 3
+    assert post_batch(url(service), "pc-1", events(2, 4)) == 4  # 2 is below the mark; only 4 is new
+    assert [seq for _, seq, _ in stored(service)] == [1, 2, 3, 4]
+
+
+def test_event_arriving_from_another_client_is_stored_once(service):
+    post_batch(url(service), "pc-1", events(1, 2))
+    post_batch(url(service), "pc-2", events(1, 2, 3))  # Same event ids, e.g. a restored database
+    assert stored(service) == [("pc-1", 1, 501), ("pc-1", 2, 502), ("pc-2", 3, 503)]
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b'"x"', b'{"client_id": "pc-1"}',
+                                  json.dumps({"client_id": "pc-1", "events": [{"ts": 1}]}).encode()])
+def test_malformed_body_is_rejected(service, body):
+    assert post_raw(service, body) == 400
+    assert stored(service) == []
+
+
+def test_client_keeps_the_outbox_until_the_service_acknowledges(service, tmp_path):
+    db_file = str(tmp_path / "prototype.db")
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(db_file)
+    conn.execute("INSERT INTO outbox_state (id, client_id) VALUES (1, 'pc-9')")
+    for ts in (100, 200):
+        conn.execute(ACTIVITY_EVENT_INSERT_SQL, (ts, "E9", "Working", "tickets", "", ts))
+    conn.commit()
+    conn.close()
+
+    client = IngestClient("http://127.0.0.1:9/v1/events", db_file)  # Nothing listens on the discard port
+    client.client_id = "pc-9"
+    with pytest.raises(IngestUnavailable):
+        client.upload_pending()
+    assert client.pending() == 2
+
+    client.url = url(service)
+    assert client.upload_pending() == 2
+    assert client.pending() == 0
+    assert stored(service) == [("pc-9", 1, 100), ("pc-9", 2, 200)]
+
+
+def test_retry_delay_is_jittered_under_an_exponential_cap():
+    delays = [backoff_delay(1) for _ in range(200)]
+    assert all(0 <= delay <= 2 * INGEST_UPLOAD_INTERVAL for delay in delays)
+    assert len(set(delays)) > 1
+    assert all(backoff_delay(30) <= INGEST_RETRY_MAX_DELAY for _ in range(50))
+    assert all(backoff_delay(1, retry_after=60) >= 60 for _ in range(50))
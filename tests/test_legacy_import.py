@@ -0,0 +1,118 @@
+import sqlite3
+from datetime import datetime
+
+from legacy_import import import_files
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+# (local time, emp_id, status, response, remark); day one comes from the text log, the legacy .db adds
+# one more day-one event and one that falls between the rows the tracker already logged on day two
+TEXT_LOG_EVENTS = [
+    ("2026-03-02 09:00:00", "E1", "Working", "tickets", ""),
+    ("2026-03-02 10:30:00", "E1", "Break", "coffee", "Started for 15 minutes."),
+    ("2026-03-02 10:50:00", "E1", "Working", "tickets", ""),
+    ("2026-03-02 23:30:00", "E1", "Meeting", "late call", "Started for 60 minutes."),
+]
+LEGACY_DB_EVENTS = [
+    ("2026-03-02 12:00:00", "E1", "Lunch", "lunch", "Started for 30 minutes."),
+    ("2026-03-03 10:30:00", "E1", "Personal", "errand", ""),
+]
+LOGGED_EVENTS = [
+    ("2026-03-03 09:00:00", "E1", "Working", "standup", ""),
+    ("2026-03-03 11:00:00", "E1", "Working", "back", ""),
+    ("2026-03-03 12:00:00", "E1", "Break", "coffee", "Started for 15 minutes."),
+]
+
+
+def epoch(local_time: str) -> int:
+    return int(datetime.fromisoformat(local_time).timestamp())
+
+
+def log_events(db_file: str, events: list):
+    """Logs events one at a time, as the tracker does, so the triggers keep intervals and totals current."""
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(db_file)
+    with conn:
+        for seq, (local_time, emp_id, status, response, remark) in enumerate(events, start=1):
+            conn.execute(ACTIVITY_EVENT_INSERT_SQL, (epoch(local_time), emp_id, status, response, remark, seq))
+    conn.close()
+
+
+def write_text_log(path, events: list):
+    path.write_text("".join(f"[{local_time}] | ID: {emp_id} | Status: {status} | Response: {response} | Remark: {remark}\n"
+                            for local_time, emp_id, status, response, remark in events), encoding="utf-8")
+
+
+def write_legacy_db(path, events: list):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE activity_log (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, emp_id TEXT, "
+                 "status TEXT, response TEXT, remark TEXT)")
+    conn.executemany("INSERT INTO activity_log (timestamp, emp_id, status, response, remark) VALUES (?, ?, ?, ?, ?)",
+                     events)
+    conn.commit()
+    conn.close()
+
+
+def derived(db_file: str) -> dict:
+    conn = sqlite3.connect(db_file)
+    try:
+        return {
+            "events": conn.execute("SELECT COUNT(*) FROM activity_log").fetchone()[0],
+            "intervals": conn.execute('''
+                SELECT i.emp_id, s.name, i.start_ts, i.end_ts, i.duration_seconds, i.expected_seconds
+                FROM status_intervals i JOIN status_dict s ON s.id = i.status_id ORDER BY i.emp_id, i.start_ts
+            ''').fetchall(),
+            "totals": conn.execute('''
+                SELECT t.emp_id, t.day, s.name, t.seconds, t.intervals, t.exceeded_count, t.exceeded_seconds
+                FROM daily_status_totals t JOIN status_dict s ON s.id = t.status_id ORDER BY t.emp_id, t.day, s.name
+            ''').fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+def schema_objects(db_file: str) -> list:
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master WHERE type IN ('trigger', 'index') "
+                            "ORDER BY type, name").fetchall()
+    finally:
+        conn.close()
+
+
+def test_import_matches_incremental_logging_and_is_idempotent(tmp_path):
+    db_file = str(tmp_path / "central.db")
+    log_events(db_file, LOGGED_EVENTS)
+    objects = schema_objects(db_file)
+    text_log = tmp_path / "wfm_activity_log.txt"
+    write_text_log(text_log, TEXT_LOG_EVENTS)
+    legacy_db = tmp_path / "prototype.db"
+    write_legacy_db(legacy_db, LEGACY_DB_EVENTS)
+
+    assert import_files(db_file, [str(text_log), str(legacy_db)]) == len(TEXT_LOG_EVENTS) + len(LEGACY_DB_EVENTS)
+    assert schema_objects(db_file) == objects
+
+    expected_file = str(tmp_path / "incremental.db")
+    log_events(expected_file, sorted(TEXT_LOG_EVENTS + LEGACY_DB_EVENTS + LOGGED_EVENTS))
+    imported = derived(db_file)
+    assert imported == derived(expected_file)
+    assert imported["intervals"][-1][3] is None  # The tracker's latest row still holds the open interval
+
+    assert import_files(db_file, [str(text_log), str(legacy_db)]) == 0
+    assert derived(db_file) == imported
+    assert schema_objects(db_file) == objects
+
+
+def test_logging_after_an_import_still_maintains_intervals(tmp_path):
+    db_file = str(tmp_path / "central.db")
+    log_events(db_file, LOGGED_EVENTS)
+    text_log = tmp_path / "wfm_activity_log.txt"
+    write_text_log(text_log, TEXT_LOG_EVENTS)
+    import_files(db_file, [str(text_log)])
+
+    conn = sqlite3.connect(db_file)
+    with conn:
+        conn.execute(ACTIVITY_EVENT_INSERT_SQL, (epoch("2026-03-03 12:20:00"), "E1", "Working", "tickets", "", 99))
+    conn.close()
+    expected_file = str(tmp_path / "incremental.db")
+    log_events(expected_file, sorted(TEXT_LOG_EVENTS + LOGGED_EVENTS + [("2026-03-03 12:20:00", "E1", "Working", "tickets", "")]))
+    assert derived(db_file) == derived(expected_file)
@@ -0,0 +1,94 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import retention
+from retention import list_partitions, open_history, partition_key, partition_path, rotate
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+FIRST_DAY = datetime(2026, 3, 2)
+DAYS = 4
+TABLES = {"activity_log": "timestamp"}
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "prototype.db")
+    migrate_file(path, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(path)
+    for day in range(DAYS + 1):  # The last day is the current partition and stays live
+        for hour in (9, 12, 17):
+            ts = int((FIRST_DAY + timedelta(days=day, hours=hour)).timestamp())
+            conn.execute(ACTIVITY_EVENT_INSERT_SQL, (ts, "E1", "Working", f"day {day}", "", None))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def rotate_now(db_file: str, archive_dir: str) -> list[str]:
+    return rotate(db_file, ACTIVITY_LOG_MIGRATIONS, TABLES, archive_dir=archive_dir,
+                  now=FIRST_DAY + timedelta(days=DAYS, hours=12))
+
+
+def history_rows(db_file: str, archive_dir: str) -> list[tuple]:
+    conn = open_history(db_file, "activity_log", archive_dir, columns="id, timestamp")
+    try:
+        return conn.execute("SELECT id, timestamp FROM activity_log_history ORDER BY timestamp, id").fetchall()
+    finally:
+        conn.close()
+
+
+def live_days(db_file: str) -> int:
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("SELECT COUNT(DISTINCT date(timestamp, 'unixepoch', 'localtime')) FROM activity_log").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_interrupted_rotation_is_finished_by_the_next_one(db_file, tmp_path, monkeypatch):
+    archive_dir = str(tmp_path / "archive")
+    before = history_rows(db_file, archive_dir)
+
+    # Crash while preparing the third partition: the first two are already moved
+    real_migrate, calls = retention.migrate_file, []
+
+    def crash_on_third(path, migrations):
+        calls.append(path)
+        if len(calls) == 3:
+            raise OSError("disk went away")
+        return real_migrate(path, migrations)
+
+    monkeypatch.setattr(retention, "migrate_file", crash_on_third)
+    with pytest.raises(OSError):
+        rotate_now(db_file, archive_dir)
+    assert len(list_partitions(db_file, archive_dir)) == 2
+    assert history_rows(db_file, archive_dir) == before
+
+    monkeypatch.setattr(retention, "migrate_file", real_migrate)
+    rotate_now(db_file, archive_dir)
+    assert len(list_partitions(db_file, archive_dir)) == DAYS
+    assert live_days(db_file) == 1
+    assert history_rows(db_file, archive_dir) == before
+
+
+def test_rows_copied_before_a_crash_are_not_archived_twice(db_file, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    before = history_rows(db_file, archive_dir)
+
+    # The partition's copy landed but the crash came before the live rows were deleted
+    path = partition_path(db_file, partition_key(FIRST_DAY), archive_dir)
+    tmp_path.joinpath("archive").mkdir()
+    migrate_file(path, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(path)
+    conn.execute("ATTACH DATABASE ? AS live", (db_file,))
+    conn.execute("INSERT INTO activity_log SELECT * FROM live.activity_log WHERE timestamp < ?",
+                 (int((FIRST_DAY + timedelta(days=1)).timestamp()),))
+    conn.commit()
+    conn.close()
+
+    rotate_now(db_file, archive_dir)
+    rotate_now(db_file, archive_dir)  # Nothing left to move
+    assert len(list_partitions(db_file, archive_dir)) == DAYS
+    assert history_rows(db_file, archive_dir) == before
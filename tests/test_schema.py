@@ -0,0 +1,34 @@
+import sqlite3
+
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+
+def test_interval_opened_by_a_timed_row_gets_its_expected_length(tmp_path):
+    db_file = str(tmp_path / "activity.db")
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(db_file)
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (100, "E1", "Working", "tickets", "", 1))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (200, "E1", "Break", "coffee", "Started for 15 minutes.", 2))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (300, "E1", "Break", "coffee", "Started for 20 minutes.", 3))
+    rows = conn.execute("SELECT start_ts, expected_seconds FROM status_intervals ORDER BY start_ts").fetchall()
+    assert rows == [(100, None), (200, 20 * 60)]
+
+
+def test_status_intervals_are_kept_by_one_trigger_after_upgrade(tmp_path):
+    db_file = str(tmp_path / "activity.db")
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS[:14])  # Stores from before the close/open/expected fold
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    conn = sqlite3.connect(db_file)
+    triggers = conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'activity_log' "
+                            "AND sql LIKE '%status_intervals%'").fetchall()
+    assert triggers == [("activity_log_status_intervals",)]
+
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (100, "E1", "Working", "tickets", "", 1))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (200, "E1", "Break", "coffee", "Started for 15 minutes.", 2))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (300, "E1", "Break", "coffee", "Started for 20 minutes.", 3))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (1700, "E1", "Working", "tickets", "", 4))
+    conn.execute(ACTIVITY_EVENT_INSERT_SQL, (1800, "E1", "Working", "tickets", "", 5))
+    rows = conn.execute("SELECT start_ts, end_ts, expected_seconds FROM status_intervals ORDER BY start_ts").fetchall()
+    assert rows == [(100, 200, None), (200, 1700, 20 * 60), (1700, None, None)]
+    assert conn.execute("SELECT exceeded_count, exceeded_seconds FROM daily_status_totals d "
+                        "JOIN status_dict s ON s.id = d.status_id WHERE s.name = 'Break'").fetchone() == (1, 300)
@@ -0,0 +1,39 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import prototype2
+from db_writer import BatchedWriter
+from schema import ACTIVITY_LOG_MIGRATIONS, migrate_file
+
+
+def test_restart_after_crash_accounts_the_downtime_as_idle(tmp_path, monkeypatch):
+    db_file = str(tmp_path / "prototype.db")
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    writer = BatchedWriter(db_file)
+    monkeypatch.setattr(prototype2, "LOG_DB_FILE", db_file)
+    monkeypatch.setattr(prototype2, "LOG_WRITER", writer)
+    monkeypatch.setattr(prototype2, "start_maintenance", lambda *args: None)
+    monkeypatch.setattr(prototype2, "start_metrics_server", lambda: None)
+    monkeypatch.setattr(prototype2, "USER_EMP_ID", ["E1"])
+
+    # Previous session: working, then on Break when the process died
+    started = datetime.now().replace(microsecond=0) - timedelta(hours=2)
+    prototype2.log_to_db("Startup", "Working", "", log_time=started)
+    prototype2.log_to_db("coffee", "Break", "Started for 15 minutes.", log_time=started + timedelta(minutes=30))
+    assert writer.flush()
+
+    prototype2.startup_checks()
+    writer.close()
+    restarted = int(datetime.now().timestamp())
+
+    conn = sqlite3.connect(db_file)
+    intervals = conn.execute('''
+        SELECT s.name, i.start_ts, i.end_ts FROM status_intervals i JOIN status_dict s ON s.id = i.status_id
+        ORDER BY i.start_ts, i.id
+    ''').fetchall()
+    crashed = int(started.timestamp()) + 30 * 60
+    (working, start, end), (brk, brk_start, brk_end), (idle, idle_start, idle_end), (now_status, now_start, now_end) = intervals
+    assert (working, start, end) == ("Working", int(started.timestamp()), crashed)
+    assert (brk, brk_start, brk_end) == ("Break", crashed, crashed)
+    assert (idle, idle_start) == ("Idle", crashed) and restarted - 1 <= idle_end <= restarted
+    assert (now_status, now_start, now_end) == ("Working", idle_end, None)
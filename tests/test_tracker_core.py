@@ -0,0 +1,212 @@
+from datetime import datetime
+
+from tracker_core import IDLE_RETRY_SECONDS, SimulatedClock, TrackerCore, TrackerUI
+
+
+class RecordingUI(TrackerUI):
+    """Headless front-end that remembers what the core asked of it."""
+
+    def __init__(self, answer: str = "back now"):
+        self.answer = answer
+        self.notices: list = []
+        self.statuses: list = []
+        self.prompts: list = []
+        self.messages: list = []
+        self.checks: list = []
+
+    def refresh_status(self, status, caution=False):
+        self.statuses.append((status, caution))
+
+    def show_window(self, message):
+        self.prompts.append(message)
+
+    def ask_text(self, title, prompt):
+        return self.answer
+
+    def timed_status_over(self, status):
+        self.checks.append(("timed_status_over", status))
+
+    def presence_check(self):
+        self.checks.append(("presence_check", None))
+
+    def notify(self, kind, title, message):
+        self.notices.append((kind, title))
+        self.messages.append(message)
+
+
+def make_core(**options):
+    events: list = []
+
+    def log(response, status, remark="", log_time=None):
+        events.append((int((log_time - clock.start).total_seconds()), response, status))
+
+    clock = SimulatedClock(datetime(2026, 3, 2, 9, 0, 0))
+    ui = RecordingUI()
+    core = TrackerCore(log, ui=ui, clock=clock, interval_minutes=30, **options)
+    core.start(run_thread=False)
+    core.begin_session()
+    assert core.submit("Working", "tickets")
+    return core, ui, events
+
+
+def responses(events: list, since: int = 0) -> list:
+    return [(offset, response) for offset, response, _ in events if offset >= since]
+
+
+# --- Timed Statuses ---
+def test_break_exceeds_and_relogs_until_working():
+    core, ui, events = make_core(break_minutes=15)
+    assert core.submit("Break", "coffee")
+
+    core.advance(15 * 60 - 1)
+    assert not core.session.break_exceeded
+    core.advance(1)
+    assert core.session.break_exceeded
+    assert responses(events) == [(0, "tickets"), (0, "coffee"), (0, "coffee"),
+                                 (900, "Exceeded Break duration of 15m"), (900, "STILL Exceeded Break")]
+
+    core.advance(20 * 60)
+    assert responses(events, since=901) == [(1500, "STILL Exceeded Break"), (2100, "STILL Exceeded Break")]
+
+    # Back to work needs the exceed reason and restarts the full interval
+    assert core.submit("Working", "tickets")
+    assert events[-2][1:] == ("Exceedance/Inactivity resolved", "Break")
+    assert not core.session.break_exceeded
+    assert core.session.work_remaining_seconds == 30 * 60
+
+
+def test_changing_status_cancels_the_timed_status():
+    core, ui, events = make_core(break_minutes=15, idle_source=lambda: 0.0)
+    assert core.submit("Break", "coffee")
+    core.advance(5 * 60)
+    assert core.submit("Working", "tickets")
+    assert core.machine.transition("Working", False, "Break").allowed
+
+    core.advance(60 * 60)
+    assert not core.session.break_exceeded
+    assert not any(response.startswith(("Exceeded", "STILL")) for _, response, _ in events)
+    assert core.session.timed_status_end_time is None
+
+
+def test_front_end_settles_an_exceeded_break_without_the_reason_dialog():
+    core, ui, events = make_core(break_minutes=15, idle_source=lambda: 0.0)
+    assert core.submit("Break", "coffee")
+    core.advance(15 * 60)
+    assert ui.checks == [("timed_status_over", "Break")]
+
+    assert core.resume_working("No response", "No response to break over check.", logged_status="Idle")
+    assert events[-1] == (900, "No response", "Idle")
+    assert core.session.status == "Working" and not core.session.break_exceeded
+    core.advance(60 * 60)
+    assert not any(response.startswith("STILL") and offset > 900 for offset, response, _ in events)
+
+
+# --- Idle ---
+def test_idle_caution_then_idle_when_input_stops():
+    last_input = [0.0]
+    core, ui, events = make_core(idle_source=lambda: core.clock.monotonic() - last_input[0])
+
+    core.advance(599)
+    assert ui.notices == []
+    core.advance(1)
+    assert ui.notices == [("warning", "Caution!")]
+    assert ui.statuses[-1] == ("Working", True)
+    assert core.session.status == "Working"
+
+    core.advance(10)
+    assert core.session.status == "Idle"
+    assert events[-1] == (610, "Extended Idle Logged", "Idle")
+
+
+def test_idle_caution_names_the_configured_timeout():
+    core, ui, events = make_core(idle_timeout_seconds=300, idle_source=lambda: core.clock.monotonic())
+    core.advance(300)
+    assert ui.messages == ["No mouse/keyboard activity detected for 5 minutes. Please update your status or move your mouse."]
+
+
+def test_input_after_idle_caution_keeps_working():
+    last_input = [0.0]
+    core, ui, events = make_core(idle_source=lambda: core.clock.monotonic() - last_input[0])
+
+    core.advance(605)
+    assert ui.notices == [("warning", "Caution!")]
+    last_input[0] = core.clock.monotonic()
+
+    core.advance(60)
+    assert core.session.status == "Working"
+    assert not core.session.idle_check
+    assert events[-1] == (610, "Movement Detected", "Working")
+
+
+def test_cursor_sampling_marks_idle_when_the_mouse_stays_still():
+    core, ui, events = make_core(cursor_position=lambda: (10, 20))
+
+    core.advance(609)
+    assert core.session.status == "Working"
+    core.advance(1)
+    assert ui.notices == [("warning", "Caution!")]
+    assert core.session.status == "Idle"
+    assert events[-1] == (610, "Extended Idle Logged", "Idle")
+
+
+def test_cursor_sampling_keeps_working_when_the_mouse_moves():
+    position = [0]
+
+    def cursor():
+        position[0] += 1
+        return (position[0], 0)
+
+    core, ui, events = make_core(cursor_position=cursor)
+    core.advance(1200)
+    assert core.session.status == "Working"
+    assert ui.notices == []
+    assert not any(status == "Idle" for _, _, status in events)
+
+
+def test_idle_checks_continue_after_a_failed_check():
+    failures = [2]
+
+    def cursor():
+        if failures[0]:
+            failures[0] -= 1
+            raise OSError("no display")
+        return (10, 20)
+
+    core, ui, events = make_core(cursor_position=cursor)
+    core.advance(600 + 2 * IDLE_RETRY_SECONDS + 10)
+    assert failures[0] == 0
+    assert core.session.status == "Idle"
+
+
+def test_presence_check_restarts_the_idle_timeout_but_not_the_prompt():
+    position = [0]
+
+    def cursor():
+        position[0] += 1
+        return (position[0], 0)
+
+    core, ui, events = make_core(cursor_position=cursor)
+    core.advance(610)
+    assert ("presence_check", None) in ui.checks
+    assert core.restart_idle_timeout()
+    assert core.tick_view().remaining == 30 * 60 - 610
+
+    ui.checks.clear()
+    core.advance(590)
+    assert ui.checks == []
+
+
+# --- Off Work ---
+def test_off_work_stops_prompts_and_idle_checks():
+    core, ui, events = make_core(idle_source=lambda: core.clock.monotonic(), off_work_limit_hours=8)
+    core.advance(60)
+    assert core.submit("Off work", "done for today")
+    assert core.session.off_work_start_time == core.clock.now()
+
+    core.advance(9 * 3600)
+    assert core.session.status == "Off work"
+    assert ui.notices == []
+    assert ui.prompts == []
+    assert events[-1] == (60, "done for today", "Off work")
+    assert core.tick_view().timer_text == "(LIMIT EXCEEDED: 09:00:00)"
+
@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from metrics import LATENESS_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled callback. Cancelling only marks it; the heap drops it lazily."""
+    __slots__ = ("deadline", "seq", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, seq: int, callback: Callable[..., Any], args: tuple):
+        self.deadline = deadline
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other: "TimerHandle") -> bool:
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """One thread, one heap of deadlines: sleeps exactly until the earliest timer is due.
+
+    Replaces per-purpose polling loops and sleeper threads. Callbacks run on the scheduler
+    thread and must not block; anything slow or UI-related should be handed off.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = "timer-scheduler"):
+        self.clock = clock
+        self.name = name
+        self._heap: list[TimerHandle] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._lateness = REGISTRY.histogram("wfm_timer_lateness_seconds", "How late callbacks ran after their deadline",
+                                            LATENESS_BUCKETS, scheduler=name)
+
+    # --- Scheduling API ---
+    def call_at(self, deadline: float, callback: Callable[..., Any], *args) -> TimerHandle:
+        handle = TimerHandle(deadline, next(self._seq), callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, handle)
+            if self._heap[0] is handle:
+                self._cond.notify()  # New earliest deadline: wake the thread to re-arm its sleep
+        return handle
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args) -> TimerHandle:
+        return self.call_at(self.clock() + max(0.0, delay), callback, *args)
+
+    def cancel(self, handle: Optional[TimerHandle]):
+        if handle is not None:
+            handle.cancel()
+
+    def next_deadline(self) -> Optional[float]:
+        with self._cond:
+            self._drop_cancelled()
+            return self._heap[0].deadline if self._heap else None
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(1 for h in self._heap if not h.cancelled)
+
+    def overdue_seconds(self) -> float:
+        deadline = self.next_deadline()
+        return 0.0 if deadline is None else max(0.0, self.clock() - deadline)
+
+    # --- Execution ---
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Runs every callback whose deadline has passed, in deadline order. Returns how many ran."""
+        ran = 0
+        while True:
+            with self._cond:
+                self._drop_cancelled()
+                current = self.clock() if now is None else now
+                if not self._heap or self._heap[0].deadline > current:
+                    return ran
+                handle = heapq.heappop(self._heap)
+            self._invoke(handle)
+            ran += 1
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        # Grows without bound when the thread is stuck in a callback; a healthy scheduler reads ~0
+        REGISTRY.gauge("wfm_timer_overdue_seconds", "Age of the most overdue pending timer", fn=self.overdue_seconds,
+                       scheduler=self.name)
+
+    def stop(self, timeout: float = 2.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    self._drop_cancelled()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0].deadline - self.clock()
+                    if delay <= 0:
+                        handle = heapq.heappop(self._heap)
+                        break
+                    self._cond.wait(delay)
+            self._invoke(handle)
+
+    def _invoke(self, handle: TimerHandle):
+        if handle.cancelled:
+            return
+        self._lateness.observe(max(0.0, self.clock() - handle.deadline))
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            logger.exception("Timer callback %s failed: %s", getattr(handle.callback, "__name__", handle.callback), e)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from db_writer import BatchedWriter
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file, new_event_id
+from timer_scheduler import TimerScheduler
+from tracker_core import SimulatedClock, TrackerCore, TrackerUI
+
+# --- Constants ---
+DAY_START_HOUR = 9
+SHIFT_HOURS = 8.5
+BREAK_EXCEED_CHANCE = 0.25   # Share of breaks/lunches that overrun their limit
+IDLE_PERIODS_PER_DAY = (0, 2)
+IDLE_MINUTES = (12, 30)      # Long enough to cross the 10-minute idle timeout
+PROMPT_ANSWER_SECONDS = (10, 90)
+BENCH_START = datetime(2025, 11, 3)  # A Monday
+SUBMIT_TIMEOUT_SECONDS = 30.0
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def db_size(db_file: str) -> int:
+    return sum(os.path.getsize(db_file + suffix) for suffix in ("", "-wal") if os.path.exists(db_file + suffix))
+
+
+# --- Synthetic Agent ---
+class SimulatedAgent(TrackerUI):
+    """One agent: a TrackerCore plus a scripted day of status changes, overruns and idle spells."""
+
+    def __init__(self, emp_id: str, clock: SimulatedClock, timers: TimerScheduler, log, rng: random.Random,
+                 interval_minutes: int):
+        self.emp_id = emp_id
+        self.clock = clock
+        self.timers = timers
+        self.rng = rng
+        self.idle_since: Optional[float] = None  # Monotonic start of the current idle spell
+        self.duration_answer = "30"
+        self.core = TrackerCore(partial_log(log, emp_id), ui=self, clock=clock, interval_minutes=interval_minutes,
+                                idle_source=self.idle_seconds, timers=timers)
+
+    # --- UI port: answers come from the script instead of a person ---
+    def idle_seconds(self) -> Optional[float]:
+        return 0.0 if self.idle_since is None else self.clock.monotonic() - self.idle_since
+
+    def show_window(self, message: str):
+        if self.idle_since is None:
+            self.timers.call_later(self.rng.uniform(*PROMPT_ANSWER_SECONDS), self.submit, "Working", "Answering prompt")
+
+    def ask_text(self, title: str, prompt: str) -> Optional[str]:
+        return self.duration_answer if "Duration" in title else "Synthetic reason"
+
+    def confirm(self, title: str, message: str) -> bool:
+        return True
+
+    # --- Script ---
+    def submit(self, status: str, response: str = "Synthetic task"):
+        self.core.submit(status, response)
+
+    def at(self, when: datetime, callback, *args):
+        self.timers.call_at((when - self.clock.start).total_seconds(), callback, *args)
+
+    def plan_day(self, day: datetime):
+        """Schedules one working day: start, two breaks, lunch, meetings, idle spells, off work."""
+        rng = self.rng
+        start = day.replace(hour=DAY_START_HOUR) + timedelta(minutes=rng.uniform(-15, 15))
+        self.at(start, self.submit, "Working", "Starting the day")
+
+        for hour, status, limit in ((11, "Break", 15), (13, "Lunch", 30), (15.5, "Break", 15)):
+            begin = day + timedelta(hours=hour, minutes=rng.uniform(-30, 30))
+            overrun = rng.uniform(5, 40) if rng.random() < BREAK_EXCEED_CHANCE else rng.uniform(-5, 0)
+            self.at(begin, self.submit, status, "")
+            self.at(begin + timedelta(minutes=limit + overrun), self.submit, "Working", "Back at desk")
+
+        for _ in range(rng.randint(0, 2)):
+            begin = day + timedelta(hours=rng.uniform(9.5, 16.5))
+            self.at(begin, self.start_meeting, rng.choice((30, 60)))
+
+        for _ in range(rng.randint(*IDLE_PERIODS_PER_DAY)):
+            begin = day + timedelta(hours=rng.uniform(9.5, 17))
+            self.at(begin, self.go_idle)
+            self.at(begin + timedelta(minutes=rng.uniform(*IDLE_MINUTES)), self.come_back)
+
+        self.at(start + timedelta(hours=SHIFT_HOURS), self.submit, "Off work", "End of shift")
+
+    def start_meeting(self, minutes: int):
+        self.duration_answer = str(minutes)
+        self.submit("Meeting", "Team sync")
+        self.timers.call_later(minutes * 60, self.submit, "Working", "Meeting over")
+
+    def go_idle(self):
+        self.idle_since = self.clock.monotonic()
+
+    def come_back(self):
+        self.idle_since = None
+        self.submit("Working", "Back from idle")
+
+
+def partial_log(log, emp_id: str):
+    def agent_log(response, status, remark="", log_time=None):
+        log(emp_id, response, status, remark, log_time)
+    return agent_log
+
+
+# --- Benchmark ---
+def run_benchmark(agents: int, days: int, db_file: str, interval_minutes: int = 30, seed: int = 1) -> dict:
+    """Replays `agents` x `days` synthetic agent-days through the core and the batched writer."""
+    migrate_file(db_file, ACTIVITY_LOG_MIGRATIONS)
+    size_before = db_size(db_file)
+
+    writer = BatchedWriter(db_file)
+    latencies: list[float] = []
+    latency_lock = threading.Lock()
+
+    def record(batch_latencies: list[float]):
+        with latency_lock:
+            latencies.extend(batch_latencies)
+    writer.on_commit = record
+    writer.start()
+
+    events = [0]
+
+    def log(emp_id, response, status, remark, log_time):
+        # Background producer: wait on a full queue (backpressure) instead of dropping events
+        if writer.submit(ACTIVITY_EVENT_INSERT_SQL,
+                         (int(log_time.timestamp()), emp_id, status, response, remark, new_event_id()),
+                         timeout=SUBMIT_TIMEOUT_SECONDS):
+            events[0] += 1
+
+    clock = SimulatedClock(BENCH_START)
+    timers = TimerScheduler(clock=clock.monotonic)
+    rng = random.Random(seed)
+    fleet = [SimulatedAgent(f"SIM{i:05d}", clock, timers, log, random.Random(rng.random()), interval_minutes)
+             for i in range(agents)]
+
+    started = time.perf_counter()
+    callbacks = 0
+    for agent in fleet:
+        agent.core.start(run_thread=False)
+    for day_index in range(days):
+        day = BENCH_START + timedelta(days=day_index)
+        for agent in fleet:
+            agent.plan_day(day)
+        end_of_day = (day + timedelta(days=1) - clock.start).total_seconds()
+        while True:
+            deadline = timers.next_deadline()
+            if deadline is None or deadline > end_of_day:
+                break
+            clock.advance_to(deadline)
+            callbacks += timers.run_due()
+        clock.advance_to(end_of_day)
+    simulated = time.perf_counter() - started
+    writer.close(timeout=60)
+    elapsed = time.perf_counter() - started
+
+    agent_days = agents * days
+    latencies.sort()
+    return {
+        "agents": agents,
+        "days": days,
+        "events": events[0],
+        "timer_callbacks": callbacks,
+        "dropped": writer.dropped,
+        "failed": writer.failed,
+        "simulate_seconds": round(simulated, 3),
+        "total_seconds": round(elapsed, 3),
+        "events_per_sec": round(events[0] / elapsed, 1) if elapsed else 0.0,
+        "write_latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "write_latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "events_per_agent_day": round(events[0] / agent_days, 1),
+        "db_bytes_per_agent_day": round((db_size(db_file) - size_before) / agent_days, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic agent days through the tracker pipeline under a virtual clock.")
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--interval", type=int, default=30, help="Prompt interval in minutes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="Database file to write (default: a temporary file)")
+    parser.add_argument("--json", action="store_true", help="Print the result as one JSON object")
+    parser.add_argument("--max-p99-ms", type=float, help="Exit with status 1 if p99 write latency exceeds this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = args.db or os.path.join(tmp, "bench.db")
+        result = run_benchmark(args.agents, args.days, db_file, args.interval, args.seed)
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"⏱️ {result['agents']} agents x {result['days']} day(s): {result['events']} events in {result['total_seconds']}s")
+        for key, value in result.items():
+            print(f"  {key:<24} {value}")
+
+    if args.max_p99_ms is not None and result["write_latency_p99_ms"] > args.max_p99_ms:
+        print(f"⚠️ p99 write latency {result['write_latency_p99_ms']}ms exceeds {args.max_p99_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import logging
+from datetime import datetime
+from typing import Optional
+
+from db_writer import BatchedWriter
+from schema import ACTIVITY_EVENT_INSERT_SQL, ACTIVITY_LOG_MIGRATIONS, migrate_file, new_event_id
+from structured_log import setup_logging, stop_logging
+from tracker_core import STATUS_OPTIONS, TrackerCore, TrackerUI
+
+ACTIVITY_LOG = logging.getLogger("wfm.activity")
+
+# --- Configuration ---
+LOG_DB_FILE = "prototype.db"
+LOG_FILE = "wfm_tracker.jsonl"
+DEFAULT_INTERVAL_MINUTES = 30
+DEFAULT_PROMPT = "Hey, what are you doing right now?"
+
+
+class ConsoleUI(TrackerUI):
+    """Terminal front-end for the tracker core: prompts are printed, answers are read from stdin."""
+
+    def __init__(self):
+        self.exit_requested = False
+
+    def show_window(self, message: str):
+        print(f"\n🔔 {message}\n   Enter '<Status>: <task>' (statuses: {', '.join(STATUS_OPTIONS)})")
+
+    def refresh_status(self, status: str, caution: bool = False):
+        print(f"Current Status: {'IDLE (Caution)' if caution else status}")
+
+    def ask_text(self, title: str, prompt: str) -> Optional[str]:
+        try:
+            return input(f"[{title}] {prompt} ").strip() or None
+        except EOFError:
+            return None
+
+    def confirm(self, title: str, message: str) -> bool:
+        try:
+            return input(f"[{title}] {message} [y/N] ").strip().lower() in ("y", "yes")
+        except EOFError:
+            return False
+
+    def alert(self, kind: str, title: str, message: str):
+        print(f"{'⚠️' if kind != 'info' else 'ℹ️'} {title}: {message}")
+
+    def notify(self, kind: str, title: str, message: str):
+        self.alert(kind, title, message)
+
+    def request_exit(self):
+        self.exit_requested = True
+
+
+def parse_command(line: str) -> tuple[Optional[str], str]:
+    """'Break' or 'Working: fixing login bug' -> (status, response); unknown status -> (None, '')."""
+    name, _, response = line.partition(":")
+    by_lower = {s.lower(): s for s in STATUS_OPTIONS}
+    return by_lower.get(name.strip().lower()), response.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Console activity tracker (no display required).")
+    parser.add_argument("--emp-id", required=True)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_MINUTES, help="Prompt interval in minutes")
+    parser.add_argument("--db", default=LOG_DB_FILE)
+    parser.add_argument("--log-file", default=LOG_FILE, help="Structured JSON-lines log")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args()
+
+    setup_logging(args.log_file, args.log_level)
+
+    migrate_file(args.db, ACTIVITY_LOG_MIGRATIONS)
+    writer = BatchedWriter(args.db)
+    writer.start()
+
+    def log(response, status, remark="", log_time=None):
+        timestamp = log_time or datetime.now()
+        epoch = int(timestamp.timestamp())
+        event_id = new_event_id()
+        queued = writer.submit(ACTIVITY_EVENT_INSERT_SQL, (epoch, args.emp_id, status, response, remark, event_id))
+        ACTIVITY_LOG.info("✅ LOGGED to DB: %s | Status: %s | Remark: %s", response, status, remark,
+                          extra={"event": "activity", "fields": {"event_id": event_id, "epoch": epoch,
+                                                                 "emp_id": args.emp_id, "status": status,
+                                                                 "response": response, "remark": remark, "queued": queued}})
+
+    ui = ConsoleUI()
+    tracker = TrackerCore(log, ui=ui, interval_minutes=args.interval)
+    log("Startup", "Working", f"Initial program start for ID: {args.emp_id}.")
+    tracker.begin_session()
+    tracker.start()
+    ui.show_window(DEFAULT_PROMPT)
+
+    try:
+        while not ui.exit_requested:
+            line = input().strip()
+            if not line:
+                continue
+            if line.lower() == "status":
+                view = tracker.tick_view()
+                print(f"Current Status: {tracker.display_for(view.status)[0]} {view.timer_text}")
+                continue
+            status, response = parse_command(line)
+            if status is None:
+                print(f"⚠️ Unknown status. Use one of: {', '.join(STATUS_OPTIONS)}")
+                continue
+            tracker.submit(status, response)
+    except (EOFError, KeyboardInterrupt):
+        print("\n🛑 Tracker stopped by user.")
+        tracker.stop()
+    finally:
+        writer.close()
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main()
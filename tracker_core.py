@@ -0,0 +1,591 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from metrics import LATENESS_BUCKETS, REGISTRY
+from session_state import SessionSnapshot, SessionState, format_hms, format_ms, remaining_seconds
+from status_machine import StatusMachine
+from timer_scheduler import TimerHandle, TimerScheduler
+
+logger = logging.getLogger(__name__)
+
+# --- Constants (defaults; front-ends pass their own configuration) ---
+STATUS_OPTIONS = ["Working", "Lunch", "Meeting", "Personal", "Break", "Offline", "Off work"]
+IDLE_TIMEOUT_SECONDS = 600
+IDLE_CAUTION_DELAY = 10
+BREAK_DURATION_MINUTES = 15
+LUNCH_DURATION_MINUTES = 30
+OFF_WORK_LIMIT_HOURS = 8
+BREAK_EXCEED_LOG_INTERVAL = 600
+BREAK_EXCEED_BUFFER_MINUTES = 30
+IDLE_SAMPLE_INTERVAL = 5.0  # Cursor-sampling fallback re-check interval
+IDLE_RETRY_SECONDS = 30.0   # Next idle check after one failed (e.g. the cursor could not be read)
+
+LogSink = Callable[..., None]  # log(response, status, remark="", log_time=None)
+
+PROMPT_LATENESS = REGISTRY.histogram("wfm_prompt_lateness_seconds", "How long after its deadline a scheduled prompt fired",
+                                     LATENESS_BUCKETS)
+
+
+# --- Clocks ---
+class SystemClock:
+    """Wall clock for timestamps, monotonic clock for deadlines."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class SimulatedClock:
+    """Virtual time for tests and load generation; only moves when advanced."""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.start = start or datetime.now().replace(microsecond=0)
+        self._elapsed = 0.0
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def advance(self, seconds: float):
+        self._elapsed += max(0.0, seconds)
+
+    def advance_to(self, monotonic: float):
+        self._elapsed = max(self._elapsed, monotonic)
+
+
+# --- UI Port ---
+class TrackerUI:
+    """What the core needs from a front-end. Defaults do nothing, so the core runs headless."""
+
+    def is_window_visible(self) -> bool:
+        return False
+
+    def show_window(self, message: str):
+        """Bring the prompt up with `message` (a scheduled prompt, a reminder or a re-ask)."""
+
+    def hide_window(self):
+        pass
+
+    def refresh_status(self, status: str, caution: bool = False):
+        """Redraw the status line; `caution` means the idle caution is active."""
+
+    def ask_text(self, title: str, prompt: str) -> Optional[str]:
+        return None
+
+    def confirm(self, title: str, message: str) -> bool:
+        return False
+
+    def alert(self, kind: str, title: str, message: str):
+        """Blocking message during a user action. kind: "info", "warning" or "error"."""
+
+    def notify(self, kind: str, title: str, message: str):
+        """Non-blocking message raised by a timer."""
+
+    def request_exit(self):
+        """The user went Offline; the front-end should flush and exit."""
+
+    def timed_status_over(self, status: str):
+        """A timed status just ran out (now exceeded). Raised by a timer; a front-end may ask if the user is back."""
+
+    def presence_check(self):
+        """Nothing submitted for the idle timeout, but the cursor moved (sampling fallback). Raised by a timer."""
+
+
+class TickView:
+    """What a front-end shows for one display tick."""
+    __slots__ = ("status", "exceeded", "remaining", "timer_text", "countdown")
+
+    def __init__(self, status: str, exceeded: bool, remaining: Optional[int], timer_text: str, countdown: bool):
+        self.status = status
+        self.exceeded = exceeded
+        self.remaining = remaining
+        self.timer_text = timer_text
+        self.countdown = countdown  # timer_text is a MM:SS countdown (eligible for blinking)
+
+
+# --- Core ---
+class TrackerCore:
+    """Headless tracking engine: session state, status machine, prompt/timed/idle deadlines and logging.
+
+    Everything user-facing goes through `ui`, everything time-related through `clock`, and
+    every event through `log`, so the same engine runs under Tk, pyautogui, a console or
+    a simulated clock.
+    """
+
+    def __init__(self, log: LogSink, ui: Optional[TrackerUI] = None, clock=None,
+                 interval_minutes: float = 30, statuses: Optional[list[str]] = None,
+                 break_minutes: int = BREAK_DURATION_MINUTES,
+                 lunch_minutes: int = LUNCH_DURATION_MINUTES,
+                 idle_timeout_seconds: float = IDLE_TIMEOUT_SECONDS,
+                 idle_caution_delay: float = IDLE_CAUTION_DELAY,
+                 exceed_log_interval: float = BREAK_EXCEED_LOG_INTERVAL,
+                 exceed_buffer_minutes: float = BREAK_EXCEED_BUFFER_MINUTES,
+                 off_work_limit_hours: float = OFF_WORK_LIMIT_HOURS,
+                 idle_source: Optional[Callable[[], Optional[float]]] = None,
+                 cursor_position: Optional[Callable[[], tuple]] = None,
+                 timers: Optional[TimerScheduler] = None):
+        self.log = log
+        self.ui = ui or TrackerUI()
+        self.clock = clock or SystemClock()
+        self.machine = StatusMachine(statuses or STATUS_OPTIONS, break_minutes, lunch_minutes)
+        self.session = SessionState(now=self.clock.now(), interval_seconds=int(interval_minutes * 60))
+        self.timers = timers or TimerScheduler(clock=self.clock.monotonic)  # May be shared by many simulated agents
+
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.idle_caution_delay = idle_caution_delay
+        self.exceed_log_interval = exceed_log_interval
+        self.exceed_buffer_seconds = exceed_buffer_minutes * 60
+        self.off_work_limit_seconds = int(off_work_limit_hours * 3600)
+        self.idle_source = idle_source          # Seconds since last input, or None if unknown
+        self.cursor_position = cursor_position  # Sampling fallback when idle_source has no data
+
+        self._prompt_timer: Optional[TimerHandle] = None
+        self._prompt_generation = 0  # Bumped on every reschedule so stale prompt jobs do not re-arm
+        self._prompt_lock = threading.Lock()
+        self._timed_timers: dict[str, TimerHandle] = {}  # "expire" / "relog" / "remind"
+        self._timed_generation = 0  # Bumped on every start/cancel so stale exceed jobs do not re-arm
+        self._timed_lock = threading.Lock()
+        self._idle_timer: Optional[TimerHandle] = None
+        self._idle_sample: Optional[tuple] = None
+
+    # --- Lifecycle ---
+    def start(self, run_thread: bool = True):
+        """Arms the prompt and idle deadlines. Without `run_thread`, drive time with advance()."""
+        self.reschedule_prompt()
+        self._idle_timer = self.timers.call_later(0, self._idle_job)
+        if run_thread:
+            self.timers.start()
+
+    def stop(self):
+        self.cancel_prompt()
+        self.cancel_timed_status()
+        self.timers.cancel(self._idle_timer)
+        self.timers.stop()
+
+    def advance(self, seconds: float) -> int:
+        """Simulated time only: moves the clock forward, firing each deadline at its exact time."""
+        target = self.clock.monotonic() + seconds
+        fired = 0
+        while True:
+            deadline = self.timers.next_deadline()
+            if deadline is None or deadline > target:
+                break
+            self.clock.advance_to(deadline)
+            fired += self.timers.run_due()
+        self.clock.advance_to(target)
+        return fired
+
+    def set_interval(self, interval_minutes: float):
+        self.session.transition(interval_seconds=int(interval_minutes * 60))
+        logger.info("Periodic popup interval set to %s minutes.", interval_minutes)
+        self.reschedule_prompt()
+
+    def begin_session(self):
+        """Initializes the remaining work time to the full interval at startup."""
+        self.session.transition(work_remaining_seconds=self.session.interval_seconds)
+
+    def _log(self, response, status, remark=""):
+        self.log(response, status, remark, log_time=self.clock.now())
+
+    # --- Display ---
+    def tick_view(self) -> TickView:
+        """One consistent snapshot and one remaining-time computation for a display tick."""
+        snap = self.session.snapshot()
+        now = self.clock.now()
+        remaining = remaining_seconds(snap, now)
+        status = snap.status
+        timer_text = ""
+        countdown = False
+
+        if status == "Working" and not snap.break_exceeded:
+            # --- WORKING: COUNTDOWN TO NEXT PROMPT (MM:SS) ---
+            if remaining is not None and remaining > 0:
+                timer_text, countdown = f"({format_ms(remaining)} until prompt)", True
+            else:
+                timer_text = "(00:00 until prompt)"
+
+        elif self.machine.is_timed(status):
+            # --- TIMED STATUSES: COUNTDOWN or EXCEEDED TIME (HH:MM:SS) ---
+            if remaining is None:
+                # Fallback for unexpected state - display elapsed time
+                timer_text = f"(Elapsed: {format_hms(int((now - snap.last_response_time).total_seconds()))})"
+            elif remaining > 0:
+                timer_text, countdown = f"({format_ms(remaining)} remaining)", True
+            else:
+                timer_text = f"(Exceeded by: {format_hms(-remaining)})"
+
+        elif status == "Off work":
+            # --- OFF WORK: ELAPSED TIME (HH:MM:SS) against the limit ---
+            if snap.off_work_start_time:
+                total_seconds = int((now - snap.off_work_start_time).total_seconds())
+                limit_hours = self.off_work_limit_seconds // 3600
+                if total_seconds < self.off_work_limit_seconds:
+                    timer_text = f"({format_hms(total_seconds)} of {limit_hours}h)"
+                else:
+                    timer_text = f"(LIMIT EXCEEDED: {format_hms(total_seconds)})"
+            else:
+                timer_text = "(Timer Pending Start)"
+
+        return TickView(status, snap.break_exceeded, remaining, timer_text, countdown)
+
+    def display_for(self, status: str) -> tuple[str, str]:
+        return self.machine.display_for(status, self.session.break_exceeded)
+
+    # --- Status Submission ---
+    def submit(self, status: str, response: str) -> bool:
+        """Applies a status selected by the user. Returns True when the status was accepted."""
+        response = (response or "").strip()
+        log_remark = ""
+        snap = self.session.snapshot()
+        previous_status = snap.status
+        work_remaining = snap.work_remaining_seconds
+
+        # Everything this click implies comes from the precomputed transition table
+        transition = self.machine.transition(previous_status, snap.break_exceeded, status)
+        spec = transition.spec
+        if not transition.allowed or spec is None:
+            logger.warning("Transition from %s to %s is not allowed.", previous_status, status)
+            return False
+
+        # --- Work Interval Pausing Logic (Saving remaining time when leaving "Working") ---
+        if transition.pause_work_clock:
+            remaining = remaining_seconds(snap, self.clock.now())
+            work_remaining = max(0, remaining) if remaining is not None else 0
+            log_remark = f"Work interval paused. {int(work_remaining/60)}m remaining for next prompt."
+
+        # --- EXCEEDED/IDLE REASON VALIDATION (When returning to Working) ---
+        if transition.exceed_reason_required:
+            exceeded_status_text = "Idle/Inactivity" if previous_status == "Idle" else previous_status
+            reason = self.ui.ask_text(
+                "Reason Required",
+                f"You are exiting the EXCEEDED/IDLE status ({exceeded_status_text}). Please enter the reason for the exceedance/inactivity (mandatory):",
+            )
+            if not reason or not reason.strip():
+                self.ui.alert("error", "Validation Error", "Reason for exceeding/inactivity is mandatory.")
+                # Re-display the window with the previous status and do not proceed
+                self.ui.show_window(f"Reason required to proceed from {previous_status} (EXCEEDED/IDLE)!")
+                return False
+
+            # Log the exceedance resolution
+            self._log("Exceedance/Inactivity resolved", previous_status,
+                      f"Exceedance/Inactivity resolved: Back to {status}. Reason: {reason}")
+
+        # --- Validation Rules for new status submission ---
+        if spec.response_required and not response:
+            self.ui.alert("warning", "Input Required", f"Please enter a task or activity when status is '{status}'.")
+            return False
+
+        if spec.warn_without_response and not response:
+            warning_msg = "Hey, you are not entering any reason for Personal / Meeting. This will intimate notification to your reporting manager & HR. Do you wish to proceed?"
+            if not self.ui.confirm("Reason Not Entered", warning_msg):
+                self.ui.show_window("Please enter a reason or select a different status.")
+                return False
+            response = "(No Reason Entered - User Accepted Warning)"
+            log_remark += f"| NO REASON ENTERED - Manager/HR Notification Intimated (Logging to DB/File)"
+
+        # --- Status Submission ---
+
+        # Back from Exceeded/Idle: full interval. Fresh Working submission: full interval only if nothing is saved.
+        if transition.restart_full_interval or (status == "Working" and work_remaining <= 0):
+            work_remaining = snap.interval_seconds
+
+        # One atomic transition: status, work clock, cleared flags and timed/off-work timers together.
+        # Flags reset upon *any* submission; Off Work start is cleared when going back to work/break/etc.
+        now = self.clock.now()
+        changes = dict(status=status, work_remaining_seconds=work_remaining, timed_status_end_time=None,
+                       break_exceeded=False, idle_check=False)
+        if transition.reset_work_clock:
+            changes["last_response_time"] = now
+        if not spec.stops_prompts:
+            changes["off_work_start_time"] = None
+        elif snap.off_work_start_time is None:
+            changes["off_work_start_time"] = now  # Start monitoring the Off work limit
+
+        if self.session.transition(expect_status=previous_status, **changes) is None:
+            # A monitor changed the status while a dialog was open; make the user confirm against the new state
+            self.ui.show_window(f"Your status changed to {self.session.status} meanwhile. Please submit again.")
+            return False
+
+        # Any accepted submission ends the previous timed status (expiry, exceed re-logs, reminders)
+        self.cancel_timed_status()
+        self._log(response, status, log_remark)
+        self.ui.refresh_status(status)
+
+        if spec.ends_session:
+            self._log("Shutting Down", "Offline", "User manually logged off.")
+            self.ui.alert("info", "Offline Mode", "Offline Mode Activated. Program shutting down.")
+            self.stop()
+            self.ui.request_exit()
+            return True
+
+        if spec.stops_prompts:
+            # Ensure the prompt deadline is cancelled so no popups happen
+            self.cancel_prompt()
+            logger.info("⏳ Off work Mode: Tracking %d-hour limit. No popups or idle checks.", self.off_work_limit_seconds // 3600)
+            self.ui.hide_window()
+            return True
+
+        if spec.timed:
+            duration = transition.duration_minutes
+            if spec.ask_duration:
+                duration_str = self.ui.ask_text(f"{status} Duration", f"Enter duration for {status} in minutes (e.g., 60):")
+                try:
+                    duration = int(duration_str) if duration_str else 0
+                except ValueError:
+                    duration = 0
+
+            if duration > 0:
+                # Set the end time for the timer display before arming the expiry timer
+                self.session.transition(expect_status=status, timed_status_end_time=self.clock.now() + timedelta(minutes=duration))
+                self.start_timed_status(status, duration)
+                self._log(response, status, f"Started for {duration} minutes.")
+                logger.info("⏳ %s Mode: Prompts paused for %d minutes.", status, duration)
+            else:
+                self._log(response, status, "Duration not specified, defaulting to Working status.")
+                # Reset remaining time to full interval if reverting to working
+                self.session.transition(expect_status=status, status="Working", work_remaining_seconds=self.session.interval_seconds)
+                self.ui.refresh_status("Working")
+                self.ui.alert("warning", "Status Change", f"Invalid or zero duration entered for {status}. Reverting to 'Working'.")
+
+        # Working (re)starts the prompt countdown; any other status stops it at the next evaluation
+        self.reschedule_prompt()
+        self.ui.hide_window()
+        return True
+
+    def resume_working(self, response: str, remark: str, logged_status: str = "Working") -> bool:
+        """Back to Working with a full interval, skipping the exceed-reason dialog.
+
+        For front-ends that settle an exceeded timed status with their own check (the chatbot's
+        "Break Over Check"); the row is logged under `logged_status`.
+        """
+        snap = self.session.snapshot()
+        if self.session.transition(expect_status=snap.status, status="Working", work_remaining_seconds=snap.interval_seconds,
+                                   last_response_time=self.clock.now(), timed_status_end_time=None,
+                                   break_exceeded=False, idle_check=False, off_work_start_time=None) is None:
+            return False
+        self.cancel_timed_status()
+        self._log(response, logged_status, remark)
+        self.ui.refresh_status("Working")
+        self.reschedule_prompt()
+        return True
+
+    def restart_idle_timeout(self) -> bool:
+        """Starts the idle timeout over from now (after a presence check) without moving the prompt deadline."""
+        snap = self.session.snapshot()
+        remaining = remaining_seconds(snap, self.clock.now())
+        if snap.status != "Working" or snap.break_exceeded or remaining is None:
+            return False
+        return self.session.transition(expect_status="Working", last_response_time=self.clock.now(),
+                                       work_remaining_seconds=max(1, remaining)) is not None
+
+    # --- Prompt Deadline ---
+    def check_and_show_popup(self) -> Optional[int]:
+        """Shows the prompt if it is due. Returns seconds until the next prompt, or None when not Working."""
+        snap = self.session.snapshot()
+        remaining = remaining_seconds(snap, self.clock.now())
+
+        if snap.status != "Working" or snap.break_exceeded or remaining is None:
+            return None
+        if remaining > 0:
+            return remaining
+        PROMPT_LATENESS.observe(-remaining)
+
+        # Time for prompt has arrived: reset the remaining time for the next full cycle and restart
+        # the countdown immediately. Compare-and-set so a concurrent status change wins over the prompt.
+        if self.session.transition(expect_status="Working", work_remaining_seconds=snap.interval_seconds,
+                                   last_response_time=self.clock.now()) is None:
+            return None
+
+        interval_minutes = snap.interval_seconds // 60
+        if not self.ui.is_window_visible():
+            self.ui.show_window(f"It's been {interval_minutes} minutes. What's your current task?")
+        else:
+            logger.debug("Popup skipped: Window is already visible.")
+
+        # Log the required action
+        self._log("Prompt Displayed", "Working", f"Scheduled {interval_minutes}m prompt shown.")
+        return snap.interval_seconds
+
+    def _prompt_job(self, generation: int):
+        if generation != self._prompt_generation:
+            return
+        remaining = self.check_and_show_popup()
+        with self._prompt_lock:
+            if remaining is not None and generation == self._prompt_generation:
+                self._prompt_timer = self.timers.call_later(max(1, remaining), self._prompt_job, generation)
+
+    def reschedule_prompt(self):
+        """Re-evaluates the prompt deadline now; call whenever status or the work clock changes."""
+        with self._prompt_lock:
+            self._prompt_generation += 1
+            self.timers.cancel(self._prompt_timer)
+            self._prompt_timer = self.timers.call_later(0, self._prompt_job, self._prompt_generation)
+
+    def cancel_prompt(self):
+        with self._prompt_lock:
+            self._prompt_generation += 1
+            self.timers.cancel(self._prompt_timer)
+            self._prompt_timer = None
+
+    # --- Timed Status Deadlines ---
+    def start_timed_status(self, status: str, duration_minutes: int):
+        """Arms the expiry deadline for Break/Lunch/Meeting/Personal, replacing any previous one."""
+        with self._timed_lock:
+            if self._timed_timers:
+                logger.warning("Cancelling previous timed status monitor.")
+            self._cancel_timed_locked()
+            self._timed_timers["expire"] = self.timers.call_later(duration_minutes * 60, self._expire_timed_status,
+                                                                  status, duration_minutes, self._timed_generation)
+
+    def cancel_timed_status(self):
+        with self._timed_lock:
+            self._cancel_timed_locked()
+
+    def _cancel_timed_locked(self):
+        self._timed_generation += 1
+        for handle in self._timed_timers.values():
+            self.timers.cancel(handle)
+        self._timed_timers.clear()
+
+    def _arm_timed(self, generation: int, key: str, delay: float, callback, *args):
+        """Re-arms an exceed job unless the timed status was cancelled or replaced since `generation`."""
+        with self._timed_lock:
+            if generation == self._timed_generation:
+                self._timed_timers[key] = self.timers.call_later(delay, callback, *args, generation)
+
+    def _expire_timed_status(self, status: str, duration_minutes: int, generation: int):
+        # Set flag for mandatory reason check, only if the user is still on this status
+        if generation != self._timed_generation:
+            return
+        if self.session.transition(expect_status=status, break_exceeded=True, break_check_start_time=self.clock.now(),
+                                   last_exceed_log_time=None) is None:
+            return
+        self._log(f"Exceeded {status} duration of {duration_minutes}m", status, "Time limit reached. Auto-transition to exceeded state.")
+        self.ui.timed_status_over(status)
+
+        # --- The timer display will calculate the exact exceeded time ---
+        self._relog_exceeded(status, generation)
+        self._arm_timed(generation, "remind", self.exceed_buffer_seconds, self._remind_exceeded, status)
+
+    def _relog_exceeded(self, status: str, generation: int):
+        """Logs the ongoing exceedance now and every exceed_log_interval until the status changes."""
+        if generation != self._timed_generation:
+            return
+        if self.session.transition(expect_status=status, last_exceed_log_time=self.clock.now()) is None:
+            return
+        self._log(f"STILL Exceeded {status}", status, "Exceeded time limit. Logging this to DB every 10m.")
+        self._arm_timed(generation, "relog", self.exceed_log_interval, self._relog_exceeded, status)
+
+    def _remind_exceeded(self, status: str, generation: int):
+        """Simple reminder once the exceed buffer has passed; repeats while the window stays hidden."""
+        if generation != self._timed_generation or self.session.status != status:
+            return
+        if not self.ui.is_window_visible():
+            self.ui.notify("info", "Status Check", f"Simple Reminder: You are still on {status} and exceeded the buffer time. Please update your status.")
+            self.ui.show_window(f"Please update your status from exceeded {status} mode.")
+        self._arm_timed(generation, "remind", self.exceed_log_interval, self._remind_exceeded, status)
+
+    # --- Idle Deadlines ---
+    def _idle_job(self):
+        delay = IDLE_RETRY_SECONDS
+        try:
+            delay = self.check_idle()
+        except Exception as e:
+            logger.warning("Idle check failed: %s", e)
+        finally:
+            self._idle_timer = self.timers.call_later(delay, self._idle_job)
+
+    def seconds_without_activity(self, snap: SessionSnapshot, input_idle: Optional[float]) -> float:
+        """Seconds since the later of the last status response and the last mouse/keyboard input."""
+        since_response = (self.clock.now() - snap.last_response_time).total_seconds()
+        return since_response if input_idle is None else min(since_response, input_idle)
+
+    def check_idle(self) -> float:
+        """Evaluates idle state once and returns the seconds until it needs evaluating again."""
+        snap = self.session.snapshot()
+
+        # Only check idle if currently "Working" and not already in an exceeded state.
+        # Returning to Working resets last_response_time, so no idle deadline can be nearer than the timeout.
+        if snap.status != "Working" or snap.break_exceeded or snap.off_work_start_time is not None:
+            return self.idle_timeout_seconds
+
+        input_idle = self.idle_source() if self.idle_source else None
+        if input_idle is None and self.cursor_position is not None:
+            return self._check_idle_by_sampling(snap)
+
+        idle_for = self.seconds_without_activity(snap, input_idle)
+        idle_check = snap.idle_check
+
+        if idle_for >= self.idle_timeout_seconds:
+            if not idle_check:
+                if self.session.transition(expect_status="Working", idle_check=True) is None:
+                    return self.idle_timeout_seconds
+                self._show_idle_caution()
+                idle_check = True
+
+            if idle_for >= self.idle_timeout_seconds + self.idle_caution_delay:
+                self._mark_extended_idle()
+                return self.idle_timeout_seconds
+
+        elif idle_check:
+            self._clear_idle_caution()
+            return self.idle_timeout_seconds
+
+        # Wake exactly when the next idle threshold could be crossed; any input only pushes it later
+        next_threshold = self.idle_timeout_seconds + (self.idle_caution_delay if idle_check else 0)
+        return max(1.0, next_threshold - idle_for)
+
+    def _show_idle_caution(self):
+        self.ui.refresh_status("Working", caution=True)
+        minutes, seconds = divmod(int(self.idle_timeout_seconds), 60)
+        span = f"{minutes} minute{'s' if minutes != 1 else ''}" if not seconds else f"{int(self.idle_timeout_seconds)} seconds"
+        self.ui.notify("warning", "Caution!", f"No mouse/keyboard activity detected for {span}. Please update your status or move your mouse.")
+
+    def _clear_idle_caution(self):
+        """Activity resumed after the caution: back to a normal Working state."""
+        if self.session.transition(expect_status="Working", idle_check=False, last_response_time=self.clock.now()) is None:
+            return
+        self._log("Movement Detected", "Working", "Activity detected after extended idle caution.")
+        self.ui.refresh_status("Working")
+
+    def _mark_extended_idle(self):
+        """Forces status to Idle after the caution period; a reason is mandatory on return to work."""
+        # Reset last_response_time so the IDLE state's duration is tracked.
+        if self.session.transition(expect_status="Working", status="Idle", break_exceeded=True, idle_check=False,
+                                   last_response_time=self.clock.now()) is None:
+            return
+        self._log("Extended Idle Logged", "Idle", f"No mouse/keyboard activity. Status changed to IDLE. Mandatory reason on return to work.")
+        self.ui.refresh_status("Idle")
+
+    def _check_idle_by_sampling(self, snap: SessionSnapshot) -> float:
+        """Fallback when input listeners are unavailable: compares two cursor samples idle_caution_delay apart."""
+        elapsed_since_response = (self.clock.now() - snap.last_response_time).total_seconds()
+        if elapsed_since_response < self.idle_timeout_seconds:
+            self._idle_sample = None
+            return max(1.0, self.idle_timeout_seconds - elapsed_since_response)
+
+        mouse_before, mouse_after = self._idle_sample, tuple(self.cursor_position())
+        if mouse_before is None:
+            self._idle_sample = mouse_after
+            return self.idle_caution_delay  # Take the second sample after the caution delay
+        self._idle_sample = None
+
+        if mouse_before == mouse_after:
+            if not snap.idle_check and self.session.transition(expect_status="Working", idle_check=True) is not None:
+                self._show_idle_caution()
+            if elapsed_since_response >= self.idle_timeout_seconds + self.idle_caution_delay:
+                self._mark_extended_idle()
+
+        elif snap.idle_check:
+            self._clear_idle_caution()
+        else:
+            self.ui.presence_check()
+
+        return IDLE_SAMPLE_INTERVAL
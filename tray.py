@@ -0,0 +1,102 @@
+import logging
+from typing import Callable, Optional
+
+from timer_scheduler import TimerHandle
+from tracker_core import TrackerCore
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+TRAY_REFRESH_SECONDS = 30.0    # Tooltip/icon refresh while resident; status changes redraw at once
+TRAY_ICON_SIZE = 32
+TRAY_TITLE_MAX_CHARS = 127     # Windows notification-area tooltip limit
+TRAY_APP_NAME = "Activity Tracker"
+
+
+def tooltip_text(tracker: TrackerCore) -> tuple[str, str]:
+    """(tooltip, color) for the current state, with the countdown in whole minutes.
+
+    Minutes rather than MM:SS so the text only changes a few times per refresh period.
+    """
+    view = tracker.tick_view()
+    text, color = tracker.display_for(view.status)
+    if view.countdown and view.remaining is not None and view.remaining > 0:
+        minutes = (view.remaining + 59) // 60
+        what = "until prompt" if view.status == "Working" else "remaining"
+        detail = f"{minutes} min {what}"
+    else:
+        detail = view.timer_text.strip("()")
+    title = f"{TRAY_APP_NAME}: {text}" + (f" - {detail}" if detail else "")
+    return title[:TRAY_TITLE_MAX_CHARS], color
+
+
+class TrayIcon:
+    """Notification-area icon for tray-resident mode: status colour, coarse countdown, "Open" and "Exit" items.
+
+    pystray runs its own message loop thread; the tooltip is refreshed from the tracker's timer
+    thread every TRAY_REFRESH_SECONDS and only touched when the text or colour changed.
+    """
+
+    def __init__(self, tracker: TrackerCore, on_open: Callable[[], None], on_exit: Callable[[], None]):
+        self.tracker = tracker
+        self.on_open = on_open
+        self.on_exit = on_exit
+        self.available = False
+        self._icon = None
+        self._images: dict[str, object] = {}
+        self._shown: Optional[tuple[str, str]] = None
+        self._timer: Optional[TimerHandle] = None
+
+    def start(self) -> bool:
+        """Shows the icon. Returns False if pystray/Pillow are missing or there is no notification area."""
+        if self.available:
+            return True
+        try:
+            import pystray  # Optional dependency; only tray mode needs it
+            title, color = tooltip_text(self.tracker)
+            menu = pystray.Menu(pystray.MenuItem("Open", lambda icon, item: self.on_open(), default=True),
+                                pystray.MenuItem("Exit", lambda icon, item: self.on_exit()))
+            self._icon = pystray.Icon("wfm_tracker", self._image(color), title, menu)
+            self._icon.run_detached()
+            self._shown = (title, color)
+            self.available = True
+        except Exception as e:
+            logger.warning("Tray icon unavailable (%s). Keeping the tracker window instead.", e)
+            self._icon = None
+            return False
+        self._timer = self.tracker.timers.call_later(TRAY_REFRESH_SECONDS, self._tick)
+        return True
+
+    def stop(self):
+        self.tracker.timers.cancel(self._timer)
+        if self._icon is not None:
+            self._icon.stop()
+        self.available = False
+
+    def refresh(self):
+        """Redraws the tooltip/icon if they changed. Safe from any thread."""
+        if not self.available:
+            return
+        title, color = tooltip_text(self.tracker)
+        if (title, color) == self._shown:
+            return
+        if self._shown is None or color != self._shown[1]:
+            self._icon.icon = self._image(color)
+        self._icon.title = title
+        self._shown = (title, color)
+
+    def _tick(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning("Tray refresh failed: %s", e)
+        self._timer = self.tracker.timers.call_later(TRAY_REFRESH_SECONDS, self._tick)
+
+    def _image(self, color: str):
+        image = self._images.get(color)
+        if image is None:
+            from PIL import Image, ImageDraw  # Installed with pystray
+            image = Image.new("RGBA", (TRAY_ICON_SIZE, TRAY_ICON_SIZE), (0, 0, 0, 0))
+            ImageDraw.Draw(image).ellipse((2, 2, TRAY_ICON_SIZE - 3, TRAY_ICON_SIZE - 3), fill=color)
+            self._images[color] = image
+        return image
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+UI_FRAME_MS = 50        # Queued UI commands are applied at most once per frame
+UI_IDLE_FRAME_MS = 500  # Frame interval while the queue is empty: 2 wakeups/s instead of 20 when resident
+
+
+class UIDispatcher:
+    """Runs UI commands posted from any thread on the Tk thread, one frame at a time.
+
+    Timer callbacks and monitors must not touch Tk widgets. They post commands here and the Tk
+    loop drains them every frame, or every idle frame while nothing is queued. Commands posted
+    under the same key coalesce (only the newest runs), so a burst of status/window updates
+    costs one redraw. Modal dialogs wait in their own queue and are shown one at a time; a
+    dialog identical to one already waiting or on screen is dropped instead of popping up twice.
+    """
+
+    def __init__(self, after: Callable[[int, Callable[[], Any]], Any], frame_ms: int = UI_FRAME_MS,
+                 idle_frame_ms: int = UI_IDLE_FRAME_MS):
+        self._after = after  # e.g. tk.Misc.after; only ever called on the Tk thread
+        self.frame_ms = frame_ms
+        self.idle_frame_ms = idle_frame_ms
+        self.coalesced = 0   # Updates and dialogs that were merged into an existing one
+        self._updates: OrderedDict[Hashable, tuple[Callable, tuple]] = OrderedDict()
+        self._modals: OrderedDict[Hashable, tuple[Callable, tuple]] = OrderedDict()
+        self._showing: Optional[Hashable] = None
+        self._in_modal = False
+        self._running = False
+        self._last_frame = time.monotonic()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the frame loop. Tk thread only."""
+        if not self._running:
+            self._running = True
+            self._last_frame = time.monotonic()
+            self._after(self.frame_ms, self._pump)
+            REGISTRY.gauge("wfm_ui_pending", "UI commands waiting for the Tk thread", fn=self.pending)
+            # Frames keep coming inside dialogs; a large age means the Tk thread itself is blocked
+            REGISTRY.gauge("wfm_monitor_heartbeat_age_seconds", fn=lambda: time.monotonic() - self._last_frame,
+                           monitor="ui")
+
+    def stop(self):
+        self._running = False
+
+    # --- Posting (any thread) ---
+    def post(self, key: Hashable, callback: Callable, *args):
+        """Queues an update; replaces a pending update with the same key."""
+        with self._lock:
+            if self._updates.pop(key, None) is not None:
+                self.coalesced += 1
+            self._updates[key] = (callback, args)
+
+    def post_modal(self, key: Hashable, callback: Callable, *args):
+        """Queues a blocking dialog; ignored if the same dialog is already waiting or on screen."""
+        with self._lock:
+            if key in self._modals or key == self._showing:
+                self.coalesced += 1
+                return
+            self._modals[key] = (callback, args)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._updates) + len(self._modals)
+
+    # --- Tk Thread ---
+    @contextmanager
+    def modal(self):
+        """Wraps a dialog opened directly on the Tk thread so queued dialogs wait until it closes."""
+        previous, self._in_modal = self._in_modal, True
+        try:
+            yield
+        finally:
+            self._in_modal = previous
+
+    def drain(self):
+        """Applies pending updates, then shows the next queued dialog unless one is already open."""
+        with self._lock:
+            updates, self._updates = self._updates, OrderedDict()
+        for callback, args in updates.values():
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.exception("UI update failed: %s", e)
+
+        if self._in_modal:
+            return  # Running inside a dialog's nested event loop
+        with self._lock:
+            if not self._modals:
+                return
+            key, (callback, args) = self._modals.popitem(last=False)
+            self._showing = key
+        try:
+            with self.modal():
+                callback(*args)
+        except Exception as e:
+            logger.exception("UI dialog failed: %s", e)
+        finally:
+            with self._lock:
+                self._showing = None
+
+    def _pump(self):
+        if not self._running:
+            return
+        self._last_frame = time.monotonic()
+        # Re-arm first: a dialog blocks in drain() while its nested loop keeps delivering frames
+        self._after(self.frame_ms if self.pending() else self.idle_frame_ms, self._pump)
+        self.drain()
@@ -0,0 +1,195 @@
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from db_writer import BatchedWriter
+from metrics import REGISTRY
+from schema import WINDOW_INTERVAL_INSERT_SQL
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+WINDOW_SAMPLE_SECONDS = 5.0         # Foreground-window probe rate; only changes are written, not samples
+WINDOW_CHECKPOINT_SECONDS = 900     # An unchanged run is re-saved (same row) every 15 minutes so a crash loses little
+WINDOW_IDLE_SECONDS = 120           # No input for this long closes the run; idle time is not attributed to a window
+WINDOW_GAP_SAMPLES = 3              # Missing this many probes (sleep, suspended thread) starts a new run
+WINDOW_TITLE_MAX_CHARS = 200        # Titles are cut before interning (long URLs and document paths)
+WINDOW_PROCESS_CACHE = 256          # pid -> process name entries kept between probes
+
+Window = tuple[str, str]  # (app, title)
+
+
+# --- Probe ---
+_process_names: dict[int, str] = {}
+
+
+def _process_name(window) -> str:
+    """Executable name of the window's process (Windows only); "" when it cannot be resolved."""
+    hwnd = getattr(window, "_hWnd", None)
+    if hwnd is None or sys.platform != "win32":
+        return ""
+    import ctypes
+    pid = ctypes.c_ulong()
+    ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    name = _process_names.get(pid.value)
+    if name is None:
+        import psutil  # Optional dependency; only needed to name the process
+        try:
+            name = psutil.Process(pid.value).name()
+        except psutil.Error:
+            name = ""
+        if len(_process_names) >= WINDOW_PROCESS_CACHE:
+            _process_names.clear()
+        _process_names[pid.value] = name
+    return name
+
+
+def foreground_window() -> Optional[Window]:
+    """(app, title) of the focused window, or None when nothing has focus (locked screen, desktop)."""
+    import pygetwindow  # Optional dependency; needs a desktop session
+    window = pygetwindow.getActiveWindow()
+    if not window:
+        return None
+    title = getattr(window, "title", window)  # macOS returns the title string itself
+    return _process_name(window), str(title or "")
+
+
+# --- Sampler ---
+class WindowSampler:
+    """Samples the foreground window on a background thread and stores run-length encoded intervals.
+
+    A probe only compares (app, title) with the open run in memory. A row is written when the
+    window changes, input goes idle, the local day rolls over, or the run reaches
+    WINDOW_CHECKPOINT_SECONDS (re-saving the same row), so an agent-day is a few hundred rows
+    instead of one per sample. App names and titles are interned into app_dict/title_dict by
+    the window_events view, and repeated strings share one object in memory.
+    """
+
+    def __init__(self, writer: BatchedWriter, emp_id: Callable[[], Optional[str]],
+                 interval: float = WINDOW_SAMPLE_SECONDS,
+                 idle_source: Optional[Callable[[], Optional[float]]] = None,
+                 idle_after: float = WINDOW_IDLE_SECONDS,
+                 checkpoint_seconds: float = WINDOW_CHECKPOINT_SECONDS,
+                 probe: Callable[[], Optional[Window]] = foreground_window,
+                 clock: Callable[[], float] = time.time):
+        self.writer = writer
+        self.emp_id = emp_id
+        self.interval = interval
+        self.idle_source = idle_source
+        self.idle_after = idle_after
+        self.checkpoint_seconds = checkpoint_seconds
+        self.probe = probe
+        self.clock = clock
+        self.samples = 0
+        self.writes = 0
+        self.last_sample_at = time.monotonic()  # Heartbeat for the stuck-thread gauge
+        self.available = True
+        self._run: Optional[list] = None  # [emp_id, app, title, start_ts, end_ts, samples]
+        self._saved_at = 0
+        self._strings: dict[str, str] = {}
+        self._probe_failing = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Starts sampling. Returns False if the window probe cannot run here (missing pygetwindow/psutil)."""
+        if self._thread is not None:
+            return True
+        try:
+            self.probe()
+        except ImportError as e:
+            logger.warning("Window tracking unavailable (%s).", e)
+            self.available = False
+            return False
+        self._thread = threading.Thread(target=self._loop, name="window-sampler", daemon=True)
+        self._thread.start()
+        REGISTRY.gauge("wfm_monitor_heartbeat_age_seconds", "Seconds since a monitor thread last completed a pass",
+                       fn=lambda: time.monotonic() - self.last_sample_at, monitor="window-sampler")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Stops the thread and saves the open run. Call before the writer is closed."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_run()
+
+    def _loop(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            self.sample_once()
+            deadline += self.interval
+            # Fixed-rate schedule; after a long stall (sleep) resume from now instead of catching up
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                deadline, delay = time.monotonic(), 0
+            self._stop.wait(delay)
+
+    def _intern(self, text: str) -> str:
+        return self._strings.setdefault(text, text)
+
+    def _current(self, now: int) -> tuple[Optional[tuple], int]:
+        """(emp_id, app, title) in focus now, or None, and the time the previous run should end at."""
+        emp_id = self.emp_id()
+        if not emp_id:
+            return None, now
+        if self.idle_source is not None:
+            idle = self.idle_source()
+            if idle is not None and idle >= self.idle_after:
+                return None, now - int(idle)
+        try:
+            window = self.probe()
+            self._probe_failing = False
+        except Exception as e:
+            if not self._probe_failing:
+                logger.warning("Foreground window probe failed: %s", e)
+            self._probe_failing = True
+            window = None
+        if window is None:
+            return None, now
+        app, title = window
+        return (emp_id, self._intern(app or ""), self._intern(title[:WINDOW_TITLE_MAX_CHARS])), now
+
+    def sample_once(self, now: Optional[float] = None):
+        """One probe: extends the open run or closes it and opens the next."""
+        now = int(self.clock() if now is None else now)
+        self.samples += 1
+        self.last_sample_at = time.monotonic()
+        key, end = self._current(now)
+        run = self._run
+        start = now
+        if run is not None:
+            contiguous = now - run[4] <= self.interval * WINDOW_GAP_SAMPLES
+            same_day = datetime.fromtimestamp(run[3]).date() == datetime.fromtimestamp(now).date()
+            if contiguous and same_day and key == tuple(run[:3]):
+                run[4] = now
+                run[5] += 1
+                if now - self._saved_at >= self.checkpoint_seconds:
+                    self._save()
+                return
+            if contiguous:
+                run[4] = max(run[3], min(end, now))  # The switch happened since the last probe
+                if not same_day:
+                    # Split at local midnight so a day's rows are final once it is archived
+                    midnight = int(datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0).timestamp())
+                    run[4] = max(run[3], min(run[4], midnight))
+                    if key == tuple(run[:3]):
+                        start = midnight
+            self._close_run()
+        if key is not None:
+            self._run = [*key, start, now, 1]
+            self._saved_at = start
+
+    def _close_run(self):
+        if self._run is not None:
+            self._save()
+            self._run = None
+
+    def _save(self):
+        if self.writer.submit(WINDOW_INTERVAL_INSERT_SQL, tuple(self._run)):
+            self.writes += 1
+        self._saved_at = self._run[4]